@@ -9,9 +9,11 @@ https://docs.djangoproject.com/en/3.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
+
 import logging
 import os
 import random
+import tempfile
 from pathlib import Path
 
 import dj_database_url
@@ -172,6 +174,30 @@ CACHES = {
     }
 }
 
+# Délai maximal avant qu'un worker ne constate la modification d'une table de
+# référence (voir `dora.core.enum_registry`)
+ENUM_REGISTRY_CHECK_SECONDS = int(os.environ.get("ENUM_REGISTRY_CHECK_SECONDS", 5))
+
+# Registre des divisions administratives (voir `dora.admin_express.registry`) :
+# répertoire local des fichiers projetés en mémoire, et délai maximal avant
+# qu'un worker ne constate un nouvel import
+ADMIN_DIVISION_REGISTRY_DIR = os.environ.get(
+    "ADMIN_DIVISION_REGISTRY_DIR",
+    os.path.join(tempfile.gettempdir(), "dora-admin-divisions"),
+)
+ADMIN_DIVISION_REGISTRY_CHECK_SECONDS = int(
+    os.environ.get("ADMIN_DIVISION_REGISTRY_CHECK_SECONDS", 60)
+)
+
+# Tuiles vectorielles (voir `dora.admin_express.tiles`) : durée de conservation
+# dans le cache (la clé change avec les données), et durée de validité côté client
+TILES_CACHE_SECONDS = int(os.environ.get("TILES_CACHE_SECONDS", 7 * 24 * 3600))
+TILES_MAX_AGE = int(os.environ.get("TILES_MAX_AGE", 300))
+# délai maximal avant que les tuiles des services ne reflètent une modification
+TILES_SERVICES_VERSION_SECONDS = int(
+    os.environ.get("TILES_SERVICES_VERSION_SECONDS", 300)
+)
+
 AUTH_USER_MODEL = "users.User"
 
 # Password validation
@@ -434,6 +460,14 @@ ORIENTATION_SIRENE_BLACKLIST = [
 # Services
 DEFAULT_SEARCH_RADIUS = 15  # in km
 RECENT_SERVICES_CUTOFF_DAYS = 30
+# Flux de modifications de l'API (voir `dora.core.models.ChangeLogEntry`)
+CHANGE_LOG_RETENTION_DAYS = int(os.environ.get("CHANGE_LOG_RETENTION_DAYS", 90))
+# les entrées plus récentes ne sont pas encore servies : une transaction plus
+# ancienne peut encore écrire des entrées d'identifiant inférieur
+CHANGE_FEED_DELAY_SECONDS = int(os.environ.get("CHANGE_FEED_DELAY_SECONDS", 10))
+# Listes non paginées renvoyées en flux (voir `dora.core.streaming`)
+STREAMING_LIST_RESPONSES = os.environ.get("STREAMING_LIST_RESPONSES", "true") == "true"
+STREAMING_LIST_CHUNK_SIZE = int(os.environ.get("STREAMING_LIST_CHUNK_SIZE", 500))
 # Bot user
 DORA_BOT_USER = "dora-bot@dora.beta.gouv.fr"
 
@@ -449,6 +483,58 @@ DATA_INCLUSION_STREAM_SOURCES = (lambda s: s.split(",") if s else None)(
     os.environ.get("DATA_INCLUSION_STREAM_SOURCES")
 )
 DATA_INCLUSION_TIMEOUT_SECONDS = os.environ.get("DATA_INCLUSION_TIMEOUT_SECONDS")
+# la recherche d·i est exécutée dans un thread, en parallèle de la recherche DORA
+DATA_INCLUSION_SEARCH_CONCURRENT = (
+    os.environ.get("DATA_INCLUSION_SEARCH_CONCURRENT", "true") == "true"
+)
+DATA_INCLUSION_SEARCH_MAX_WORKERS = int(
+    os.environ.get("DATA_INCLUSION_SEARCH_MAX_WORKERS", 8)
+)
+# délai maximum (en secondes) accordé à la phase d·i d'une recherche,
+# au-delà duquel seuls les résultats DORA sont renvoyés
+DATA_INCLUSION_SEARCH_DEADLINE_SECONDS = (lambda s: float(s) if s else None)(
+    os.environ.get("DATA_INCLUSION_SEARCH_DEADLINE_SECONDS")
+)
+# recherche des services d·i dans leur copie locale plutôt que par l'API
+# (voir la commande `sync_data_inclusion_services`)
+DATA_INCLUSION_SEARCH_MIRROR = os.environ.get("DATA_INCLUSION_SEARCH_MIRROR") == "true"
+# taille des pages demandées à d·i (taille par défaut de l'API si non renseignée)
+DATA_INCLUSION_PAGE_SIZE = (lambda s: int(s) if s else None)(
+    os.environ.get("DATA_INCLUSION_PAGE_SIZE")
+)
+# nombre de pages récupérées simultanément, une fois le nombre de pages connu
+DATA_INCLUSION_MAX_CONCURRENT_PAGES = int(
+    os.environ.get("DATA_INCLUSION_MAX_CONCURRENT_PAGES", 4)
+)
+# nombre de fiches d·i récupérées simultanément (ex. : liste des favoris)
+DATA_INCLUSION_MAX_CONCURRENT_LOOKUPS = int(
+    os.environ.get("DATA_INCLUSION_MAX_CONCURRENT_LOOKUPS", 8)
+)
+# cache des recherches et fiches d·i (voir dora.data_inclusion.cache)
+DATA_INCLUSION_CACHE_ENABLED = (
+    os.environ.get("DATA_INCLUSION_CACHE_ENABLED", "true") == "true"
+)
+# durée pendant laquelle une entrée est considérée fraîche
+DATA_INCLUSION_CACHE_TTL_SECONDS = int(
+    os.environ.get("DATA_INCLUSION_CACHE_TTL_SECONDS", 10 * 60)
+)
+# durée supplémentaire pendant laquelle une entrée périmée reste servie
+# (et rafraîchie en arrière-plan)
+DATA_INCLUSION_CACHE_STALE_TTL_SECONDS = int(
+    os.environ.get("DATA_INCLUSION_CACHE_STALE_TTL_SECONDS", 60 * 60)
+)
+# durée de mise en cache des services introuvables (404)
+DATA_INCLUSION_CACHE_NEGATIVE_TTL_SECONDS = int(
+    os.environ.get("DATA_INCLUSION_CACHE_NEGATIVE_TTL_SECONDS", 5 * 60)
+)
+# disjoncteur : nombre d'échecs consécutifs (erreurs de connexion, délais dépassés, 5xx)
+# avant de ne plus appeler d·i, et durée avant une nouvelle tentative
+DATA_INCLUSION_CIRCUIT_FAILURE_THRESHOLD = int(
+    os.environ.get("DATA_INCLUSION_CIRCUIT_FAILURE_THRESHOLD", 5)
+)
+DATA_INCLUSION_CIRCUIT_RECOVERY_SECONDS = float(
+    os.environ.get("DATA_INCLUSION_CIRCUIT_RECOVERY_SECONDS", 30)
+)
 SKIP_DI_INTEGRATION_TESTS = True
 
 # Data inclusion user account
@@ -129,6 +129,10 @@ private_api_patterns = [
     path(
         "city-label/<insee_code:insee_code>/", dora.admin_express.views.get_city_label
     ),
+    path(
+        "tiles/<str:layer>/<int:z>/<int:x>/<int:y>.mvt",
+        dora.admin_express.views.tile,
+    ),
     path("search-sirene/<insee_code:citycode>/", dora.sirene.views.search_sirene),
     path("search-siret/", dora.sirene.views.search_siret),
     path("search-safir/", dora.sirene.views.search_safir),
@@ -0,0 +1,165 @@
+"""Index d'autocomplétion des divisions administratives.
+
+L'endpoint `admin-division-search` (sélecteur de commune, d'EPCI…) est appelé
+à chaque frappe. Plutôt que de calculer `TrigramSimilarity` sur toute la table,
+chaque process construit en mémoire, une fois par version du registre des
+divisions (c'est-à-dire par import, voir `dora.admin_express.registry`) :
+- la liste triée des codes, pour les recherches par début de code ;
+- un index inversé trigramme → divisions, à partir des noms normalisés.
+
+Les trigrammes et la similarité sont calculés comme le fait `pg_trgm`, et les
+résultats sont classés comme par la requête SQL (similarité, puis population
+pour les communes) : l'index renvoie les mêmes divisions, dans le même ordre.
+Les égalités sont départagées par code.
+"""
+
+import bisect
+import heapq
+import re
+import struct
+import threading
+from array import array
+from collections import Counter
+from typing import NamedTuple, Optional
+
+from .models import ADMIN_DIVISION_MODELS, AdminDivisionType, City
+from .registry import get_admin_division_registry
+
+# `pg_trgm` découpe le texte en mots de caractères alphanumériques
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+_lock = threading.Lock()
+# index et version du registre à partir de laquelle il a été construit,
+# par type de division
+_indexes = {}
+
+
+class AutocompleteResult(NamedTuple):
+    code: str
+    name: str
+    similarity: float
+
+
+def trigrams(text: str) -> set[str]:
+    """Return the trigrams of ``text``, as computed by ``pg_trgm``.
+
+    Each word is lowercased and padded with two spaces before and one after.
+    """
+    result = set()
+    for word in _WORD_RE.findall(text.lower()):
+        padded = f"  {word} "
+        result.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def _float4(value: float) -> float:
+    # `similarity()` renvoie un `real` : les égalités sont celles de PostgreSQL
+    return struct.unpack("f", struct.pack("f", value))[0]
+
+
+class AutocompleteIndex:
+    def __init__(self, rows, rank_by_population: bool):
+        self.rank_by_population = rank_by_population
+        self.codes = []
+        self.names = []
+        self.populations = array("i")
+        self.trigram_counts = array("H")
+        self.postings = {}
+
+        for i, (code, name, normalized_name, population) in enumerate(sorted(rows)):
+            self.codes.append(code)
+            self.names.append(name)
+            self.populations.append(population or 0)
+            name_trigrams = trigrams(normalized_name)
+            self.trigram_counts.append(len(name_trigrams))
+            for trigram in name_trigrams:
+                posting = self.postings.get(trigram)
+                if posting is None:
+                    posting = self.postings[trigram] = array("I")
+                posting.append(i)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _rank_key(self, i, similarity):
+        if self.rank_by_population:
+            return (-similarity, -self.populations[i], self.codes[i])
+        return (-similarity, self.codes[i])
+
+    def _results(self, ranked):
+        return [
+            AutocompleteResult(self.codes[i], self.names[i], similarity)
+            for i, similarity in ranked
+        ]
+
+    def search_code(self, prefix: str, limit: int) -> list[AutocompleteResult]:
+        """Divisions whose code starts with ``prefix``."""
+        start = bisect.bisect_left(self.codes, prefix)
+        end = start
+        while end < len(self.codes) and self.codes[end].startswith(prefix):
+            end += 1
+        ranked = heapq.nsmallest(
+            limit,
+            ((i, 1.0) for i in range(start, end)),
+            key=lambda item: self._rank_key(*item),
+        )
+        return self._results(ranked)
+
+    def search_name(
+        self, normalized_query: str, threshold: float, limit: int
+    ) -> list[AutocompleteResult]:
+        """Divisions whose name is more similar than ``threshold`` to the query."""
+        query_trigrams = trigrams(normalized_query)
+        if not query_trigrams:
+            return []
+
+        # nombre de trigrammes en commun, pour chaque division en ayant au moins un
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self.postings.get(trigram, ()))
+
+        query_count = len(query_trigrams)
+        candidates = []
+        for i, count in shared.items():
+            similarity = _float4(count / (query_count + self.trigram_counts[i] - count))
+            if similarity > threshold:
+                candidates.append((i, similarity))
+        ranked = heapq.nsmallest(
+            limit, candidates, key=lambda item: self._rank_key(*item)
+        )
+        return self._results(ranked)
+
+
+def _build_index(kind) -> AutocompleteIndex:
+    if kind == AdminDivisionType.CITY:
+        rows = City.objects.values_list("code", "name", "normalized_name", "population")
+    else:
+        rows = (
+            (code, name, normalized_name, None)
+            for code, name, normalized_name in ADMIN_DIVISION_MODELS[
+                kind
+            ].objects.values_list("code", "name", "normalized_name")
+        )
+    return AutocompleteIndex(rows, rank_by_population=kind == AdminDivisionType.CITY)
+
+
+def get_autocomplete_index(kind) -> Optional[AutocompleteIndex]:
+    """Return the autocomplete index of the divisions of type ``kind``."""
+    if kind not in ADMIN_DIVISION_MODELS:
+        return None
+    kind = AdminDivisionType(kind)
+    version = get_admin_division_registry().version
+    entry = _indexes.get(kind)
+    if entry is not None and entry[1] == version:
+        return entry[0]
+
+    with _lock:
+        entry = _indexes.get(kind)
+        if entry is None or entry[1] != version:
+            entry = (_build_index(kind), version)
+            _indexes[kind] = entry
+        return entry[0]
+
+
+def clear_autocomplete_indexes():
+    _indexes.clear()
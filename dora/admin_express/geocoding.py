@@ -0,0 +1,120 @@
+"""Géocodage inverse : division administrative contenant un point.
+
+Les contours des communes, EPCI, départements et régions sont de grands
+multipolygones (côtes, enclaves…) : leurs boîtes englobantes, seules
+exploitées par l'index spatial, sont très larges, et chaque test de
+`ST_Covers` parcourt des milliers de sommets. Chaque contour est donc aussi
+découpé (`ST_Subdivide`) en polygones d'au plus `SUBDIVIDE_MAX_VERTICES`
+sommets, stockés avec le code de leur division dans les tables `*Part`
+(géométries planes, plus rapides à tester que les `geography`).
+
+Les morceaux sont recalculés à chaque enregistrement d'une division, et
+entièrement par `import_admin_express`.
+"""
+
+from typing import Iterable, Optional
+
+from django.contrib.gis.geos import Point
+from django.db import connection, transaction
+
+from .models import (
+    ADMIN_DIVISION_MODELS,
+    EPCI,
+    City,
+    CityPart,
+    Department,
+    DepartmentPart,
+    EPCIPart,
+    Region,
+    RegionPart,
+)
+
+SUBDIVIDE_MAX_VERTICES = 256
+
+PART_MODELS = {
+    City: CityPart,
+    EPCI: EPCIPart,
+    Department: DepartmentPart,
+    Region: RegionPart,
+}
+
+_INSERT_PARTS_SQL = """
+INSERT INTO {parts} (code, geom)
+SELECT code, ST_Subdivide(geom::geometry, %(max_vertices)s)
+FROM {divisions}
+WHERE %(code)s::text IS NULL OR code = %(code)s::text
+"""
+
+_DELETE_PARTS_SQL = """
+DELETE FROM {parts}
+WHERE %(code)s::text IS NULL OR code = %(code)s::text
+"""
+
+# une ligne par point, dans l'ordre des points, avec le code de la division
+# qui le contient (ou NULL)
+_FIND_DIVISIONS_SQL = """
+SELECT (
+    SELECT part.code
+    FROM {parts} AS part
+    WHERE ST_Covers(part.geom, ST_SetSRID(ST_MakePoint(p.x, p.y), 4326))
+    LIMIT 1
+)
+FROM unnest(%(x)s::float8[], %(y)s::float8[]) WITH ORDINALITY AS p (x, y, i)
+ORDER BY p.i
+"""
+
+
+def _execute(sql: str, Model, params: dict):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql.format(
+                parts=PART_MODELS[Model]._meta.db_table,
+                divisions=Model._meta.db_table,
+            ),
+            params,
+        )
+
+
+def update_admin_division_parts(Model, code: Optional[str] = None):
+    """Recompute the parts of the division ``code`` (or all divisions) of ``Model``."""
+    params = {"code": code, "max_vertices": SUBDIVIDE_MAX_VERTICES}
+    with transaction.atomic():
+        _execute(_DELETE_PARTS_SQL, Model, params)
+        _execute(_INSERT_PARTS_SQL, Model, params)
+
+
+def delete_admin_division_parts(Model, code: str):
+    _execute(_DELETE_PARTS_SQL, Model, {"code": code})
+
+
+def rebuild_admin_division_parts():
+    for Model in PART_MODELS:
+        update_admin_division_parts(Model)
+
+
+def find_divisions(kind: str, points: Iterable[Point]) -> list[Optional[str]]:
+    """Return the code of the division of type ``kind`` covering each point.
+
+    All the points (in WGS 84) are resolved with a single query; the code is
+    ``None`` for points outside any division.
+    """
+    points = list(points)
+    if not points:
+        return []
+    parts = PART_MODELS[ADMIN_DIVISION_MODELS[kind]]._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _FIND_DIVISIONS_SQL.format(parts=parts),
+            {"x": [p.x for p in points], "y": [p.y for p in points]},
+        )
+        return [code for (code,) in cursor.fetchall()]
+
+
+def find_division(kind: str, point: Point) -> Optional[str]:
+    """Return the code of the division of type ``kind`` covering ``point``."""
+    return (
+        PART_MODELS[ADMIN_DIVISION_MODELS[kind]]
+        .objects.filter(geom__covers=point)
+        .values_list("code", flat=True)
+        .first()
+    )
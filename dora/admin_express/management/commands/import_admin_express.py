@@ -9,9 +9,19 @@ from django.core.management.base import BaseCommand
 from django.db import connection
 from django.db.models import F, Func, Value
 
-from dora.admin_express.models import EPCI, City, Department, Region
+from dora.admin_express.geocoding import rebuild_admin_division_parts
+from dora.admin_express.models import (
+    EPCI,
+    City,
+    Department,
+    Region,
+    disable_admin_division_receivers,
+)
+from dora.admin_express.registry import invalidate_admin_division_registry
+from dora.admin_express.tiles import rebuild_admin_division_tile_geometries
 from dora.admin_express.utils import normalize_string_for_search
 from dora.core.utils import code_insee_to_code_dept
+from dora.services.coverage import rebuild_services_coverage
 
 EXE_7ZR = "/app/.apt/usr/lib/p7zip/7zr" if not settings.DEBUG else "7zr"
 
@@ -35,7 +45,13 @@ class Command(BaseCommand):
     help = "Import the latest Admin Express COG database"
 
     def handle(self, *args, **options):
-        with tempfile.TemporaryDirectory() as tmp_dir_name:
+        # chaque division enregistrée invaliderait le registre, serait
+        # subdivisée et simplifiée : tout est reconstruit une seule fois à la
+        # fin de l'import
+        with (
+            disable_admin_division_receivers(),
+            tempfile.TemporaryDirectory() as tmp_dir_name,
+        ):
             if USE_TEMP_DIR:
                 the_dir = pathlib.Path(tmp_dir_name)
             else:
@@ -142,6 +158,22 @@ class Command(BaseCommand):
             normalize_model(Region)
             self.stdout.write(self.style.SUCCESS("Done"))
 
+        self.stdout.write(self.style.SUCCESS("Subdividing geometries"))
+        rebuild_admin_division_parts()
+        self.stdout.write(self.style.SUCCESS("Done"))
+
+        self.stdout.write(self.style.SUCCESS("Simplifying geometries for map tiles"))
+        rebuild_admin_division_tile_geometries()
+        self.stdout.write(self.style.SUCCESS("Done"))
+
+        # nouvelle version du registre des noms et rattachements, reconstruit
+        # par chaque conteneur à la première utilisation
+        invalidate_admin_division_registry()
+
+        self.stdout.write(self.style.SUCCESS("Updating services coverage"))
+        rebuild_services_coverage()
+        self.stdout.write(self.style.SUCCESS("Done"))
+
         self.stdout.write(self.style.SUCCESS("VACUUM ANALYZE"))
         cursor = connection.cursor()
         cursor.execute("VACUUM ANALYZE")
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-17 10:02
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+TABLES = [
+    "admin_express_city",
+    "admin_express_epci",
+    "admin_express_department",
+    "admin_express_region",
+]
+
+
+def init_centers(apps, schema_editor):
+    for table in TABLES:
+        schema_editor.execute(
+            f"UPDATE {table} SET center = ST_PointOnSurface(geom::geometry)::geography"
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("admin_express", "0007_city_epcis_epci_departments_epci_regions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="city",
+            name="center",
+            field=django.contrib.gis.db.models.fields.PointField(
+                blank=True, geography=True, null=True, srid=4326
+            ),
+        ),
+        migrations.AddField(
+            model_name="department",
+            name="center",
+            field=django.contrib.gis.db.models.fields.PointField(
+                blank=True, geography=True, null=True, srid=4326
+            ),
+        ),
+        migrations.AddField(
+            model_name="epci",
+            name="center",
+            field=django.contrib.gis.db.models.fields.PointField(
+                blank=True, geography=True, null=True, srid=4326
+            ),
+        ),
+        migrations.AddField(
+            model_name="region",
+            name="center",
+            field=django.contrib.gis.db.models.fields.PointField(
+                blank=True, geography=True, null=True, srid=4326
+            ),
+        ),
+        migrations.RunPython(init_centers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 4.2.7 on 2026-10-17 14:21
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+TABLES = ["city", "epci", "department", "region"]
+
+
+def init_parts(apps, schema_editor):
+    for table in TABLES:
+        schema_editor.execute(
+            f"INSERT INTO admin_express_{table}part (code, geom) "
+            "SELECT code, ST_Subdivide(geom::geometry, 256) "
+            f"FROM admin_express_{table}"
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("admin_express", "0008_admin_division_center"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CityPart",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("code", models.CharField(db_index=True, max_length=9)),
+                (
+                    "geom",
+                    django.contrib.gis.db.models.fields.GeometryField(srid=4326),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="DepartmentPart",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("code", models.CharField(db_index=True, max_length=9)),
+                (
+                    "geom",
+                    django.contrib.gis.db.models.fields.GeometryField(srid=4326),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="EPCIPart",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("code", models.CharField(db_index=True, max_length=9)),
+                (
+                    "geom",
+                    django.contrib.gis.db.models.fields.GeometryField(srid=4326),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="RegionPart",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("code", models.CharField(db_index=True, max_length=9)),
+                (
+                    "geom",
+                    django.contrib.gis.db.models.fields.GeometryField(srid=4326),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.RunPython(init_parts, migrations.RunPython.noop),
+    ]
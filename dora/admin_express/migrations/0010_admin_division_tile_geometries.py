@@ -0,0 +1,127 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:02
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+# paliers de zoom des contours simplifiés de chaque table, voir
+# `dora.admin_express.tiles`
+TABLES = {
+    "city": [8, 12],
+    "epci": [4, 8, 12],
+    "department": [0, 4, 8, 12],
+    "region": [0, 4, 8, 12],
+}
+
+
+def init_tile_geometries(apps, schema_editor):
+    for table, zooms in TABLES.items():
+        for zoom in zooms:
+            tolerance = 40075016.68557849 / (256 * 2 ** (zoom + 3))
+            schema_editor.execute(
+                f"INSERT INTO admin_express_{table}tilegeometry (code, zoom, geom) "
+                f"SELECT code, {zoom}, ST_SimplifyPreserveTopology("
+                f"ST_Transform(geom::geometry, 3857), {tolerance}) "
+                f"FROM admin_express_{table}"
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("admin_express", "0009_admin_division_parts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CityTileGeometry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("code", models.CharField(db_index=True, max_length=9)),
+                ("zoom", models.PositiveSmallIntegerField()),
+                (
+                    "geom",
+                    django.contrib.gis.db.models.fields.GeometryField(srid=3857),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="DepartmentTileGeometry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("code", models.CharField(db_index=True, max_length=9)),
+                ("zoom", models.PositiveSmallIntegerField()),
+                (
+                    "geom",
+                    django.contrib.gis.db.models.fields.GeometryField(srid=3857),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="EPCITileGeometry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("code", models.CharField(db_index=True, max_length=9)),
+                ("zoom", models.PositiveSmallIntegerField()),
+                (
+                    "geom",
+                    django.contrib.gis.db.models.fields.GeometryField(srid=3857),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="RegionTileGeometry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("code", models.CharField(db_index=True, max_length=9)),
+                ("zoom", models.PositiveSmallIntegerField()),
+                (
+                    "geom",
+                    django.contrib.gis.db.models.fields.GeometryField(srid=3857),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.RunPython(init_tile_geometries, migrations.RunPython.noop),
+    ]
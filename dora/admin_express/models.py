@@ -1,6 +1,10 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from django.contrib.gis.db import models
 from django.contrib.postgres.fields import ArrayField
 from django.contrib.postgres.indexes import GinIndex
+from django.db import transaction
 
 
 class AdminDivisionType(models.TextChoices):
@@ -11,54 +15,23 @@ class AdminDivisionType(models.TextChoices):
     COUNTRY = ("country", "France entière")
 
 
-sentinel = object()
-
-
-class GeoManager(models.Manager):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._cache = {}
-
-
-# Cache progressif pour les tables comportant de nombreuses géometries
-class ManyGeoManager(GeoManager):
-    def get_from_code(self, insee_code):
-        value = self._cache.get(insee_code, sentinel)
-        if value is not sentinel:
-            return value
-
-        try:
-            value = self.defer("geom").get(code=insee_code)
-        except self.model.DoesNotExist:
-            value = None
-        self._cache[insee_code] = value
-        return value
-
-
-# Cache instantané pour les tables comportant peu de géometries
-# on fait la requête une fois pour toute
-class FewGeoManager(GeoManager):
-    def get_from_code(self, insee_code):
-        if len(self._cache):
-            return self._cache.get(insee_code)
-
-        values = self.defer("geom").all()
-        self._cache = {value.code: value for value in values}
-        return self._cache.get(insee_code)
-
-
 class AdminDivision(models.Model):
     code = models.CharField(max_length=9, primary_key=True)
     name = models.CharField(max_length=230)
     normalized_name = models.CharField(max_length=230)
     geom = models.MultiPolygonField(srid=4326, geography=True, spatial_index=True)
+    # Point représentatif de la division (toujours situé à l'intérieur de son
+    # contour, contrairement au centroïde), utilisé comme origine des calculs
+    # de distance à la place du multipolygone complet
+    center = models.PointField(srid=4326, geography=True, null=True, blank=True)
 
     class Meta:
         abstract = True
 
-
-class CityManager(ManyGeoManager):
-    pass
+    def save(self, *args, **kwargs):
+        if "geom" not in self.get_deferred_fields():
+            self.center = self.geom.point_on_surface if self.geom else None
+        super().save(*args, **kwargs)
 
 
 class City(AdminDivision):
@@ -71,7 +44,6 @@ class City(AdminDivision):
         default=list,
     )
     population = models.IntegerField()
-    objects = CityManager()
 
     class Meta:
         indexes = [
@@ -83,10 +55,6 @@ class City(AdminDivision):
         ]
 
 
-class EPCIManager(ManyGeoManager):
-    pass
-
-
 class EPCI(AdminDivision):
     nature = models.CharField(max_length=150, db_index=True)
     departments = ArrayField(
@@ -99,7 +67,6 @@ class EPCI(AdminDivision):
         blank=True,
         default=list,
     )
-    objects = EPCIManager()
 
     class Meta:
         indexes = [
@@ -111,13 +78,8 @@ class EPCI(AdminDivision):
         ]
 
 
-class DepartmentManager(FewGeoManager):
-    pass
-
-
 class Department(AdminDivision):
     region = models.CharField(max_length=2, db_index=True)
-    objects = DepartmentManager()
 
     class Meta:
         indexes = [
@@ -129,13 +91,7 @@ class Department(AdminDivision):
         ]
 
 
-class RegionManager(FewGeoManager):
-    pass
-
-
 class Region(AdminDivision):
-    objects = RegionManager()
-
     class Meta:
         indexes = [
             GinIndex(
@@ -144,3 +100,165 @@ class Region(AdminDivision):
                 opclasses=("gin_trgm_ops",),
             )
         ]
+
+
+ADMIN_DIVISION_MODELS = {
+    AdminDivisionType.CITY: City,
+    AdminDivisionType.EPCI: EPCI,
+    AdminDivisionType.DEPARTMENT: Department,
+    AdminDivisionType.REGION: Region,
+}
+
+
+class AdminDivisionPart(models.Model):
+    # Morceau du contour d'une division (`ST_Subdivide`, voir
+    # `dora.admin_express.geocoding`) : les recherches de point dans un contour
+    # portent sur des polygones de quelques centaines de sommets, aux boîtes
+    # englobantes serrées, plutôt que sur les multipolygones complets
+    code = models.CharField(max_length=9, db_index=True)
+    geom = models.GeometryField(srid=4326, spatial_index=True)
+
+    class Meta:
+        abstract = True
+
+
+class CityPart(AdminDivisionPart):
+    pass
+
+
+class EPCIPart(AdminDivisionPart):
+    pass
+
+
+class DepartmentPart(AdminDivisionPart):
+    pass
+
+
+class RegionPart(AdminDivisionPart):
+    pass
+
+
+class AdminDivisionTileGeometry(models.Model):
+    # Contour d'une division simplifié pour un niveau de zoom des tuiles
+    # vectorielles (voir `dora.admin_express.tiles`), en Web Mercator : les
+    # tuiles sont générées sans reprojeter ni simplifier les contours complets
+    code = models.CharField(max_length=9, db_index=True)
+    zoom = models.PositiveSmallIntegerField()
+    geom = models.GeometryField(srid=3857, spatial_index=True)
+
+    class Meta:
+        abstract = True
+
+
+class CityTileGeometry(AdminDivisionTileGeometry):
+    pass
+
+
+class EPCITileGeometry(AdminDivisionTileGeometry):
+    pass
+
+
+class DepartmentTileGeometry(AdminDivisionTileGeometry):
+    pass
+
+
+class RegionTileGeometry(AdminDivisionTileGeometry):
+    pass
+
+
+# vrai pendant un import complet (`import_admin_express`), qui reconstruit
+# ensuite le registre, les contours subdivisés et simplifiés en une seule
+# fois : les signaux ci-dessous sont ignorés
+_receivers_disabled = ContextVar("admin_division_receivers_disabled", default=False)
+
+
+@contextmanager
+def disable_admin_division_receivers():
+    """Skip the per-division receivers: the caller rebuilds what they maintain."""
+    token = _receivers_disabled.set(True)
+    try:
+        yield
+    finally:
+        _receivers_disabled.reset(token)
+
+
+def _update_admin_division_parts(sender, instance, **kwargs):
+    from .geocoding import update_admin_division_parts
+
+    if _receivers_disabled.get():
+        return
+    if "geom" not in instance.get_deferred_fields():
+        update_admin_division_parts(sender, instance.code)
+
+
+def _delete_admin_division_parts(sender, instance, **kwargs):
+    from .geocoding import delete_admin_division_parts
+
+    if _receivers_disabled.get():
+        return
+    delete_admin_division_parts(sender, instance.code)
+
+
+def _update_admin_division_tile_geometries(sender, instance, **kwargs):
+    from .tiles import update_admin_division_tile_geometries
+
+    if _receivers_disabled.get():
+        return
+    if "geom" not in instance.get_deferred_fields():
+        update_admin_division_tile_geometries(sender, instance.code)
+
+
+def _delete_admin_division_tile_geometries(sender, instance, **kwargs):
+    from .tiles import delete_admin_division_tile_geometries
+
+    if _receivers_disabled.get():
+        return
+    delete_admin_division_tile_geometries(sender, instance.code)
+
+
+def _invalidate_admin_division_registry(sender, **kwargs):
+    from .registry import invalidate_admin_division_registry
+
+    if _receivers_disabled.get():
+        return
+    invalidate_admin_division_registry()
+    # et de nouveau une fois la transaction validée : un process qui aurait
+    # reconstruit le registre entre-temps l'aurait fait avec les divisions
+    # précédentes, et les garderait jusqu'à la modification suivante
+    transaction.on_commit(invalidate_admin_division_registry)
+
+
+# registre des noms et rattachements (voir `dora.admin_express.registry`),
+# contours subdivisés (voir `dora.admin_express.geocoding`) et simplifiés
+# (voir `dora.admin_express.tiles`)
+for _model in (City, EPCI, Department, Region):
+    models.signals.post_save.connect(
+        _invalidate_admin_division_registry,
+        sender=_model,
+        dispatch_uid=f"{_model.__name__}_invalidate_admin_division_registry_save",
+    )
+    models.signals.post_delete.connect(
+        _invalidate_admin_division_registry,
+        sender=_model,
+        dispatch_uid=f"{_model.__name__}_invalidate_admin_division_registry_delete",
+    )
+    models.signals.post_save.connect(
+        _update_admin_division_parts,
+        sender=_model,
+        dispatch_uid=f"{_model.__name__}_update_admin_division_parts",
+    )
+    models.signals.post_delete.connect(
+        _delete_admin_division_parts,
+        sender=_model,
+        dispatch_uid=f"{_model.__name__}_delete_admin_division_parts",
+    )
+    models.signals.post_save.connect(
+        _update_admin_division_tile_geometries,
+        sender=_model,
+        dispatch_uid=f"{_model.__name__}_update_admin_division_tile_geometries",
+    )
+    models.signals.post_delete.connect(
+        _delete_admin_division_tile_geometries,
+        sender=_model,
+        dispatch_uid=f"{_model.__name__}_delete_admin_division_tile_geometries",
+    )
@@ -0,0 +1,278 @@
+"""Registre compact des divisions administratives (communes, EPCI,
+départements, régions).
+
+Les noms et rattachements des divisions sont lus en permanence : nom de la
+commune à chaque enregistrement d'un service ou d'une structure, libellé de la
+zone de diffusion pour chaque service sérialisé… Plutôt qu'un cache d'objets
+par worker, les divisions sont écrites dans un fichier binaire (codes triés de
+taille fixe, enregistrements de taille fixe et table de chaînes), projeté en
+mémoire (`mmap`) par chaque process : les pages sont partagées par tous les
+workers d'un même conteneur via le cache du système de fichiers.
+
+Le fichier est propre à une version du registre, stockée dans le cache Django
+(Redis) et changée par `import_admin_express` et à chaque modification d'une
+division. Le premier process qui constate un changement de version
+reconstruit le fichier depuis la base, les autres l'attendent puis le
+projettent ; les changements sont constatés au plus tard
+`ADMIN_DIVISION_REGISTRY_CHECK_SECONDS` après.
+"""
+
+import bisect
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import EPCI, AdminDivisionType, City, Department, Region
+
+VERSION_KEY = "admin-division-registry:v1:version"
+
+MAGIC = b"DORAADM1"
+# magic, version, nombre de sections, position de la table de chaînes
+HEADER = struct.Struct("<8s32sII")
+# type de division, nombre de divisions, position des codes et des
+# enregistrements
+SECTION = struct.Struct("<12sIII")
+# position et longueur du nom, département, région, population, position et
+# longueur des codes EPCI (séparés par des `/`)
+RECORD = struct.Struct("<IH3s3siIH")
+CODE_SIZE = 9
+
+KINDS = (
+    AdminDivisionType.CITY,
+    AdminDivisionType.EPCI,
+    AdminDivisionType.DEPARTMENT,
+    AdminDivisionType.REGION,
+)
+
+_lock = threading.Lock()
+# registre chargé et date de la dernière vérification de sa version
+_registry = None
+
+
+class AdminDivisionEntry(NamedTuple):
+    code: str
+    name: str
+    department: str
+    region: str
+    epcis: tuple[str, ...]
+    population: Optional[int]
+
+
+def _encode(value: Optional[str], size: int) -> bytes:
+    return (value or "").encode().ljust(size, b"\0")[:size]
+
+
+def _decode(value: bytes) -> str:
+    return value.rstrip(b"\0").decode()
+
+
+def _get_rows(kind):
+    # (code, nom, département, région, EPCI, population)
+    if kind == AdminDivisionType.CITY:
+        return City.objects.values_list(
+            "code", "name", "department", "region", "epcis", "population"
+        )
+    if kind == AdminDivisionType.EPCI:
+        return (
+            (code, name, "", "", [], None)
+            for code, name in EPCI.objects.values_list("code", "name")
+        )
+    if kind == AdminDivisionType.DEPARTMENT:
+        return (
+            (code, name, code, region, [], None)
+            for code, name, region in Department.objects.values_list(
+                "code", "name", "region"
+            )
+        )
+    return (
+        (code, name, "", code, [], None)
+        for code, name in Region.objects.values_list("code", "name")
+    )
+
+
+def build_registry_file(path: Path, version: str):
+    """Write the registry of every admin division in the database to ``path``."""
+    strings = bytearray()
+    sections = []
+    for kind in KINDS:
+        codes = bytearray()
+        records = bytearray()
+        for code, name, department, region, epcis, population in sorted(
+            _get_rows(kind)
+        ):
+            name = name.encode()
+            epcis = "/".join(epcis or []).encode()
+            records += RECORD.pack(
+                len(strings),
+                len(name),
+                _encode(department, 3),
+                _encode(region, 3),
+                population if population is not None else -1,
+                len(strings) + len(name),
+                len(epcis),
+            )
+            strings += name + epcis
+            codes += _encode(code, CODE_SIZE)
+        sections.append((kind, len(codes) // CODE_SIZE, codes, records))
+
+    offset = HEADER.size + SECTION.size * len(sections)
+    table = bytearray()
+    data = bytearray()
+    for kind, count, codes, records in sections:
+        table += SECTION.pack(
+            _encode(kind, 12),
+            count,
+            offset + len(data),
+            offset + len(data) + len(codes),
+        )
+        data += codes + records
+
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, version.encode(), len(sections), offset + len(data)))
+        f.write(table)
+        f.write(data)
+        f.write(strings)
+    os.replace(tmp_path, path)
+
+
+class _Codes:
+    # séquence triée des codes d'une section, lue directement dans le fichier
+    def __init__(self, buffer, offset, count):
+        self.buffer = buffer
+        self.offset = offset
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        start = self.offset + i * CODE_SIZE
+        return self.buffer[start : start + CODE_SIZE]
+
+
+class AdminDivisionRegistry:
+    """Read-only view of a registry file built by ``build_registry_file``."""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, section_count, self.strings_offset = HEADER.unpack_from(
+            self.buffer
+        )
+        if magic != MAGIC:
+            raise ValueError(f"Registre des divisions invalide : {path}")
+        self.version = _decode(version)
+        self.sections = {}
+        for i in range(section_count):
+            kind, count, codes_offset, records_offset = SECTION.unpack_from(
+                self.buffer, HEADER.size + i * SECTION.size
+            )
+            self.sections[_decode(kind)] = (
+                _Codes(self.buffer, codes_offset, count),
+                records_offset,
+            )
+
+    def _string(self, offset, length):
+        start = self.strings_offset + offset
+        return self.buffer[start : start + length].decode()
+
+    def get(self, kind: str, code: Optional[str]) -> Optional[AdminDivisionEntry]:
+        section = self.sections.get(str(kind))
+        if not code or section is None:
+            return None
+        codes, records_offset = section
+        key = _encode(code, CODE_SIZE)
+        i = bisect.bisect_left(codes, key)
+        if i == len(codes) or codes[i] != key:
+            return None
+        (
+            name_offset,
+            name_length,
+            department,
+            region,
+            population,
+            epcis_offset,
+            epcis_length,
+        ) = RECORD.unpack_from(self.buffer, records_offset + i * RECORD.size)
+        epcis = self._string(epcis_offset, epcis_length)
+        return AdminDivisionEntry(
+            code=code,
+            name=self._string(name_offset, name_length),
+            department=_decode(department),
+            region=_decode(region),
+            epcis=tuple(epcis.split("/")) if epcis else (),
+            population=population if population >= 0 else None,
+        )
+
+    def __len__(self):
+        return sum(len(codes) for codes, _ in self.sections.values())
+
+
+def _get_version() -> str:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _load(version: str) -> AdminDivisionRegistry:
+    directory = Path(settings.ADMIN_DIVISION_REGISTRY_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"admin-divisions-{version}.bin"
+
+    # un seul process par conteneur construit le fichier, et aucun ne le
+    # supprime pendant qu'un autre l'ouvre
+    with open(directory / "build.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not path.exists():
+            build_registry_file(path, version)
+            # les fichiers des versions précédentes restent lisibles par les
+            # process qui les ont déjà projetés
+            for old_path in directory.glob("admin-divisions-*.bin"):
+                if old_path != path:
+                    old_path.unlink(missing_ok=True)
+        return AdminDivisionRegistry(path)
+
+
+def get_admin_division_registry() -> AdminDivisionRegistry:
+    global _registry
+    now = time.monotonic()
+    if _registry is not None:
+        registry, checked_at = _registry
+        if now - checked_at < settings.ADMIN_DIVISION_REGISTRY_CHECK_SECONDS:
+            return registry
+        if cache.get(VERSION_KEY) == registry.version:
+            _registry = (registry, now)
+            return registry
+
+    with _lock:
+        registry = _load(_get_version())
+        _registry = (registry, now)
+        return registry
+
+
+def get_admin_division(kind: str, code: Optional[str]):
+    """Return the ``AdminDivisionEntry`` of the division ``code`` of type ``kind``."""
+    return get_admin_division_registry().get(kind, code)
+
+
+def get_city(code: Optional[str]) -> Optional[AdminDivisionEntry]:
+    return get_admin_division(AdminDivisionType.CITY, code)
+
+
+def invalidate_admin_division_registry():
+    """Signal to every process that the admin divisions changed."""
+    global _registry
+    cache.set(VERSION_KEY, uuid4().hex, timeout=None)
+    _registry = None
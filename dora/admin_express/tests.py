@@ -0,0 +1,336 @@
+import math
+
+import pytest
+from django.contrib.gis.geos import MultiPolygon, Point, Polygon
+from django.core.cache import cache
+from model_bakery import baker
+
+from dora.admin_express import views
+from dora.admin_express.geocoding import find_division, find_divisions
+from dora.admin_express.models import (
+    AdminDivisionType,
+    City,
+    CityPart,
+    CityTileGeometry,
+    disable_admin_division_receivers,
+)
+from dora.admin_express.registry import (
+    AdminDivisionRegistry,
+    build_registry_file,
+    get_admin_division,
+    get_admin_division_registry,
+    get_city,
+)
+from dora.admin_express.tiles import SERVICES_VERSION_KEY
+from dora.admin_express.utils import get_clean_city_name, normalize_string_for_search
+from dora.core.test_utils import make_published_service, make_service
+from dora.services.enums import ServiceStatus
+from dora.services.models import get_diffusion_zone_details_display
+
+
+def make_divisions():
+    baker.make("Region", code="84", name="Auvergne-Rhône-Alpes")
+    baker.make("Department", code="69", name="Rhône", region="84")
+    baker.make("EPCI", code="200046977", name="Métropole de Lyon")
+    baker.make(
+        City,
+        code="69123",
+        name="Lyon",
+        department="69",
+        region="84",
+        epcis=["200046977"],
+        population=522250,
+    )
+
+
+def test_registry_lookups(django_assert_num_queries):
+    make_divisions()
+    get_city("69123")
+
+    with django_assert_num_queries(0):
+        city = get_city("69123")
+        assert city.name == "Lyon"
+        assert city.department == "69"
+        assert city.region == "84"
+        assert city.epcis == ("200046977",)
+        assert city.population == 522250
+
+        department = get_admin_division(AdminDivisionType.DEPARTMENT, "69")
+        assert (department.name, department.region) == ("Rhône", "84")
+        assert get_admin_division("epci", "200046977").name == "Métropole de Lyon"
+        assert get_admin_division("region", "84").name == "Auvergne-Rhône-Alpes"
+
+        assert get_city("69") is None
+        assert get_city("691230") is None
+        assert get_city("") is None
+        assert get_admin_division("country", "69123") is None
+
+
+def test_registry_file(tmp_path):
+    make_divisions()
+    path = tmp_path / "registry.bin"
+
+    build_registry_file(path, "a" * 32)
+    registry = AdminDivisionRegistry(path)
+
+    assert registry.version == "a" * 32
+    assert 4 == len(registry)
+    assert registry.get(AdminDivisionType.REGION, "84").name == "Auvergne-Rhône-Alpes"
+
+
+def test_changes_invalidate_registry():
+    assert get_city("58211") is None
+
+    baker.make(City, code="58211", name="Poil")
+    assert get_city("58211").name == "Poil"
+
+    City.objects.filter(code="58211").delete()
+    assert get_city("58211") is None
+
+
+def test_registry_is_invalidated_on_commit(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        baker.make(City, code="58211", name="Poil")
+    version = get_admin_division_registry().version
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        City.objects.get(code="58211").save()
+    assert get_admin_division_registry().version != version
+    version = get_admin_division_registry().version
+
+    for callback in callbacks:
+        callback()
+    assert get_admin_division_registry().version != version
+
+
+def test_import_does_not_invalidate_registry():
+    version = get_admin_division_registry().version
+
+    with disable_admin_division_receivers():
+        baker.make(City, code="58211", name="Poil")
+
+    assert get_admin_division_registry().version == version
+
+
+def test_city_and_diffusion_zone_names():
+    make_divisions()
+
+    assert get_clean_city_name("69383") == "Lyon"
+    assert get_clean_city_name("") == ""
+    assert (
+        get_diffusion_zone_details_display(AdminDivisionType.CITY, "69123")
+        == "Lyon (69)"
+    )
+    assert (
+        get_diffusion_zone_details_display(AdminDivisionType.EPCI, "200046977")
+        == "Métropole de Lyon"
+    )
+    assert (
+        get_diffusion_zone_details_display(AdminDivisionType.DEPARTMENT, "69")
+        == "Rhône"
+    )
+    assert get_diffusion_zone_details_display(AdminDivisionType.REGION, "99") == ""
+
+
+def make_cities():
+    for code, name, population in [
+        ("69123", "Lyon", 522250),
+        ("69029", "Bron", 42000),
+        ("69259", "Vénissieux", 67000),
+        ("35238", "Rennes", 222000),
+        ("13055", "Marseille", 870000),
+        ("01053", "Bourg-en-Bresse", 41000),
+        ("69000", "Lyons-la-Forêt", 700),
+        ("2A004", "Ajaccio", 71000),
+    ]:
+        baker.make(
+            City,
+            code=code,
+            name=name,
+            normalized_name=f"{normalize_string_for_search(name)} {code[:2]}",
+            population=population,
+        )
+
+
+def search(api_client, **params):
+    response = api_client.get("/admin-division-search/", params)
+    assert response.status_code == 200
+    return [(d["code"], d["name"], d["similarity"]) for d in response.data]
+
+
+@pytest.mark.parametrize(
+    "q", ["lyon", "ly", "L", "venissieux", "bourg en", "rennes 35", "69", "2A", "zzz"]
+)
+def test_autocomplete_index_matches_sql(api_client, monkeypatch, q):
+    make_cities()
+
+    results = search(api_client, type="city", q=q)
+    monkeypatch.setattr(views, "get_autocomplete_index", lambda kind: None)
+    expected = search(api_client, type="city", q=q)
+
+    assert [r[:2] for r in results] == [e[:2] for e in expected]
+    assert [r[2] for r in results] == pytest.approx([e[2] for e in expected])
+
+
+def test_autocomplete_index_is_rebuilt_on_changes(api_client):
+    make_cities()
+    assert [] == search(api_client, type="city", q="poil")
+
+    baker.make(City, code="58211", name="Poil", normalized_name="POIL 58")
+
+    assert ["58211"] == [r[0] for r in search(api_client, type="city", q="poil")]
+
+
+def square(x, y, size=1):
+    return MultiPolygon(
+        Polygon(((x, y), (x, y + size), (x + size, y + size), (x + size, y), (x, y))),
+        srid=4326,
+    )
+
+
+def test_reverse_search(api_client):
+    baker.make(City, code="31555", name="Toulouse", geom=square(1, 43))
+    baker.make("Department", code="31", name="Haute-Garonne", geom=square(0, 42, 3))
+
+    response = api_client.get(
+        "/admin-division-reverse-search/", {"type": "city", "lat": 43.5, "lon": 1.5}
+    )
+    assert response.data == {"code": "31555", "name": "Toulouse"}
+
+    response = api_client.get(
+        "/admin-division-reverse-search/",
+        {"type": "department", "lat": 43.5, "lon": 1.5},
+    )
+    assert response.data == {"code": "31", "name": "Haute-Garonne"}
+
+    response = api_client.get(
+        "/admin-division-reverse-search/", {"type": "city", "lat": 45, "lon": 1.5}
+    )
+    assert response.status_code == 404
+
+
+def test_find_divisions_in_one_query(django_assert_num_queries):
+    baker.make(City, code="31555", geom=square(1, 43))
+    baker.make(City, code="31069", geom=square(2, 43))
+    points = [Point(2.5, 43.5), Point(10, 10), Point(1.5, 43.5)]
+
+    with django_assert_num_queries(1):
+        codes = find_divisions(AdminDivisionType.CITY, points)
+
+    assert codes == ["31069", None, "31555"]
+    assert find_divisions(AdminDivisionType.CITY, []) == []
+
+
+def test_parts_follow_division_changes():
+    city = baker.make(City, code="31555", geom=square(1, 43))
+    assert CityPart.objects.filter(code="31555").exists()
+
+    city.geom = square(5, 43)
+    city.save()
+    assert find_division(AdminDivisionType.CITY, Point(1.5, 43.5)) is None
+    assert find_division(AdminDivisionType.CITY, Point(5.5, 43.5)) == "31555"
+
+    city.delete()
+    assert not CityPart.objects.filter(code="31555").exists()
+
+
+def test_import_does_not_subdivide_divisions():
+    with disable_admin_division_receivers():
+        baker.make(City, code="31555", geom=square(1, 43))
+
+    assert not CityPart.objects.filter(code="31555").exists()
+
+
+@pytest.fixture
+def tiles_cache(settings):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+
+
+def tile_url(layer, z, lon, lat):
+    x = int((lon + 180) / 360 * 2**z)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * 2**z)
+    return f"/tiles/{layer}/{z}/{x}/{y}.mvt"
+
+
+def test_division_tile(api_client, tiles_cache, django_assert_num_queries):
+    baker.make("Department", code="31", name="Haute-Garonne", geom=square(0, 42, 3))
+    url = tile_url("department", 6, 1.5, 43.5)
+
+    response = api_client.get(url)
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/vnd.mapbox-vector-tile"
+    assert "public" in response["Cache-Control"]
+    assert b"Haute-Garonne" in response.content
+
+    with django_assert_num_queries(0):
+        cached = api_client.get(url)
+    assert cached.content == response.content
+    assert cached["ETag"] == response["ETag"]
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
+
+    response = api_client.get(tile_url("department", 6, 10, 10))
+    assert response.status_code == 200
+    assert response.content == b""
+
+
+def test_tiles_follow_division_changes(
+    api_client, tiles_cache, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        city = baker.make(City, code="31555", name="Toulouse", geom=square(1, 43))
+    url = tile_url("city", 10, 1.5, 43.5)
+    response = api_client.get(url)
+    assert b"Toulouse" in response.content
+
+    with django_capture_on_commit_callbacks(execute=True):
+        city.geom = square(5, 43)
+        city.save()
+    updated = api_client.get(url)
+    assert updated["ETag"] != response["ETag"]
+    assert updated.content == b""
+    assert b"Toulouse" in api_client.get(tile_url("city", 10, 5.5, 43.5)).content
+
+    # les communes ne sont pas affichées aux petits zooms
+    assert api_client.get(tile_url("city", 6, 5.5, 43.5)).content == b""
+
+
+def test_import_does_not_simplify_divisions():
+    with disable_admin_division_receivers():
+        baker.make(City, code="31555", geom=square(1, 43))
+
+    assert not CityTileGeometry.objects.filter(code="31555").exists()
+
+
+def test_services_tile(api_client, tiles_cache):
+    published = make_published_service(geom=Point(1.5, 43.5, srid=4326))
+    draft = make_service(status=ServiceStatus.DRAFT, geom=Point(1.5, 43.5, srid=4326))
+    url = tile_url("services", 12, 1.5, 43.5)
+
+    response = api_client.get(url)
+    assert published.slug.encode() in response.content
+    assert draft.slug.encode() not in response.content
+
+    # la version des services n'est relue qu'à l'expiration de la précédente
+    other = make_published_service(geom=Point(1.5001, 43.5001, srid=4326))
+    assert api_client.get(url)["ETag"] == response["ETag"]
+
+    cache.delete(SERVICES_VERSION_KEY)
+    updated = api_client.get(url)
+    assert updated["ETag"] != response["ETag"]
+    assert other.slug.encode() in updated.content
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/tiles/streets/6/32/23.mvt",
+        "/tiles/city/6/64/23.mvt",
+        "/tiles/city/21/0/0.mvt",
+    ],
+)
+def test_invalid_tiles(api_client, url):
+    assert api_client.get(url).status_code == 404
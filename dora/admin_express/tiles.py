@@ -0,0 +1,282 @@
+"""Tuiles vectorielles (Mapbox Vector Tile) des divisions administratives et
+des services publiés.
+
+Les cartes affichent les contours des communes, EPCI, départements et régions,
+ainsi que la position des services publiés, sous forme de tuiles
+`/tiles/{couche}/{z}/{x}/{y}.mvt` générées par PostGIS (`ST_AsMVT`).
+
+Les contours sont simplifiés une fois pour toutes, pour chaque palier de zoom
+de `TILE_GEOMETRY_ZOOMS`, avec une tolérance d'un pixel au zoom le plus élevé
+du palier, et stockés en Web Mercator dans les tables `*TileGeometry`. Comme
+les morceaux de `dora.admin_express.geocoding`, ils sont recalculés à chaque
+enregistrement d'une division (sauf pendant un import), et entièrement par
+`import_admin_express`.
+
+Les tuiles sont mises en cache par couche, coordonnées et version des données :
+la version des contours change après chaque modification des divisions, celle
+des services est le dernier identifiant de leur journal des modifications, relu
+au plus une fois toutes les `TILES_SERVICES_VERSION_SECONDS`.
+"""
+
+from typing import Optional
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Max
+
+from dora.core.models import ChangeLogEntry, ChangeLogObjectType
+from dora.services.enums import ServiceStatus
+
+from .models import (
+    ADMIN_DIVISION_MODELS,
+    EPCI,
+    AdminDivisionType,
+    City,
+    CityTileGeometry,
+    Department,
+    DepartmentTileGeometry,
+    EPCITileGeometry,
+    Region,
+    RegionTileGeometry,
+)
+
+SERVICES_LAYER = "services"
+
+MVT_CONTENT_TYPE = "application/vnd.mapbox-vector-tile"
+
+# résolution des tuiles, et marge autour de chaque tuile (dans la même unité)
+# pour que les contours ne soient pas coupés au bord de la tuile
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+MAX_ZOOM = 20
+
+# largeur du monde en Web Mercator (mètres), et d'une tuile affichée (pixels)
+WORLD_SIZE = 40075016.68557849
+TILE_SIZE = 256
+
+# paliers de zoom des contours simplifiés : le palier d'une tuile est le plus
+# élevé inférieur ou égal à son zoom
+TILE_GEOMETRY_ZOOMS = (0, 4, 8, 12)
+TILE_GEOMETRY_ZOOM_STEP = 4
+
+TILE_GEOMETRY_MODELS = {
+    City: CityTileGeometry,
+    EPCI: EPCITileGeometry,
+    Department: DepartmentTileGeometry,
+    Region: RegionTileGeometry,
+}
+
+# zoom minimal de chaque couche : en deçà, les tuiles sont vides (les
+# communes de toute la France ne sont pas lisibles sur une seule tuile)
+LAYER_MIN_ZOOMS = {
+    AdminDivisionType.REGION: 0,
+    AdminDivisionType.DEPARTMENT: 0,
+    AdminDivisionType.EPCI: 4,
+    AdminDivisionType.CITY: 8,
+    SERVICES_LAYER: 4,
+}
+
+DIVISIONS_VERSION_KEY = "tiles:v1:admin-divisions:version"
+SERVICES_VERSION_KEY = "tiles:v1:services:version"
+
+_INSERT_TILE_GEOMETRIES_SQL = """
+INSERT INTO {tile_geometries} (code, zoom, geom)
+SELECT
+    division.code,
+    zoom.value,
+    ST_SimplifyPreserveTopology(
+        ST_Transform(division.geom::geometry, 3857), zoom.tolerance
+    )
+FROM {divisions} AS division
+CROSS JOIN unnest(%(zooms)s::int[], %(tolerances)s::float8[]) AS zoom (value, tolerance)
+WHERE %(code)s::text IS NULL OR division.code = %(code)s::text
+"""
+
+_DELETE_TILE_GEOMETRIES_SQL = """
+DELETE FROM {tile_geometries}
+WHERE %(code)s::text IS NULL OR code = %(code)s::text
+"""
+
+_DIVISIONS_TILE_SQL = """
+WITH bounds AS (
+    SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS geom
+)
+SELECT ST_AsMVT(tile, %(layer)s, %(extent)s, 'geom')
+FROM (
+    SELECT
+        division.code,
+        division.name,
+        ST_AsMVTGeom(simplified.geom, bounds.geom, %(extent)s, %(buffer)s) AS geom
+    FROM {tile_geometries} AS simplified
+    CROSS JOIN bounds
+    INNER JOIN {divisions} AS division ON division.code = simplified.code
+    WHERE
+        simplified.zoom = %(geometry_zoom)s
+        AND simplified.geom && ST_Expand(bounds.geom, %(margin)s)
+) AS tile
+WHERE tile.geom IS NOT NULL
+"""
+
+# la position des services est une `geography` : l'emprise de la tuile est
+# convertie en WGS 84, où elle reste un rectangle, et comparée en `geography`
+# pour utiliser l'index spatial de la colonne
+_SERVICES_TILE_SQL = """
+WITH bounds AS (
+    SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS geom
+)
+SELECT ST_AsMVT(tile, %(layer)s, %(extent)s, 'geom')
+FROM (
+    SELECT
+        service.slug,
+        service.name,
+        ST_AsMVTGeom(
+            ST_Transform(service.geom::geometry, 3857),
+            bounds.geom,
+            %(extent)s,
+            %(buffer)s
+        ) AS geom
+    FROM services_service AS service
+    CROSS JOIN bounds
+    WHERE
+        service.status = %(published)s
+        AND NOT service.is_model
+        AND service.geom
+            && ST_Transform(ST_Expand(bounds.geom, %(margin)s), 4326)::geography
+) AS tile
+WHERE tile.geom IS NOT NULL
+"""
+
+
+def get_tile_geometry_tolerance(zoom: int) -> float:
+    """Size (in meters) of a pixel at the highest zoom of the ``zoom`` step."""
+    return WORLD_SIZE / (TILE_SIZE * 2 ** (zoom + TILE_GEOMETRY_ZOOM_STEP - 1))
+
+
+def _get_tile_geometry_zoom(z: int) -> int:
+    return max(zoom for zoom in TILE_GEOMETRY_ZOOMS if zoom <= z)
+
+
+def _get_kind(Model) -> AdminDivisionType:
+    return next(kind for kind, M in ADMIN_DIVISION_MODELS.items() if M is Model)
+
+
+def _execute(sql: str, Model, params: dict):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql.format(
+                tile_geometries=TILE_GEOMETRY_MODELS[Model]._meta.db_table,
+                divisions=Model._meta.db_table,
+            ),
+            params,
+        )
+
+
+def _invalidate_divisions_tiles():
+    cache.set(DIVISIONS_VERSION_KEY, uuid4().hex, timeout=None)
+
+
+def update_admin_division_tile_geometries(Model, code: Optional[str] = None):
+    """Recompute the simplified outlines of the division ``code`` (or all divisions)
+    of ``Model``."""
+    # pas de contours pour les paliers où la couche n'est pas affichée
+    min_zoom = _get_tile_geometry_zoom(LAYER_MIN_ZOOMS[_get_kind(Model)])
+    zooms = [zoom for zoom in TILE_GEOMETRY_ZOOMS if zoom >= min_zoom]
+    params = {
+        "code": code,
+        "zooms": zooms,
+        "tolerances": [get_tile_geometry_tolerance(zoom) for zoom in zooms],
+    }
+    with transaction.atomic():
+        _execute(_DELETE_TILE_GEOMETRIES_SQL, Model, params)
+        _execute(_INSERT_TILE_GEOMETRIES_SQL, Model, params)
+        # les tuiles déjà en cache restent valables jusqu'à ce que les nouveaux
+        # contours soient visibles par les autres connexions
+        transaction.on_commit(_invalidate_divisions_tiles)
+
+
+def delete_admin_division_tile_geometries(Model, code: str):
+    with transaction.atomic():
+        _execute(_DELETE_TILE_GEOMETRIES_SQL, Model, {"code": code})
+        transaction.on_commit(_invalidate_divisions_tiles)
+
+
+def rebuild_admin_division_tile_geometries():
+    for Model in TILE_GEOMETRY_MODELS:
+        update_admin_division_tile_geometries(Model)
+
+
+def is_valid_tile(layer: str, z: int, x: int, y: int) -> bool:
+    return (
+        layer in LAYER_MIN_ZOOMS
+        and 0 <= z <= MAX_ZOOM
+        and 0 <= x < 2**z
+        and 0 <= y < 2**z
+    )
+
+
+def get_tile_version(layer: str) -> str:
+    """Return the version of the data of ``layer``, which changes with its content."""
+    if layer == SERVICES_LAYER:
+        # chaque modification d'un service invaliderait toutes les tuiles : la
+        # version n'est relue qu'une fois par période
+        version = cache.get(SERVICES_VERSION_KEY)
+        if version is None:
+            last_change = ChangeLogEntry.objects.filter(
+                object_type=ChangeLogObjectType.SERVICE
+            ).aggregate(last=Max("id"))["last"]
+            version = f"services-{last_change or 0}"
+            cache.set(
+                SERVICES_VERSION_KEY,
+                version,
+                timeout=settings.TILES_SERVICES_VERSION_SECONDS,
+            )
+        return version
+
+    version = cache.get(DIVISIONS_VERSION_KEY)
+    if version is None:
+        cache.add(DIVISIONS_VERSION_KEY, uuid4().hex, timeout=None)
+        version = cache.get(DIVISIONS_VERSION_KEY)
+    return version
+
+
+def _render_tile(layer: str, z: int, x: int, y: int) -> bytes:
+    if z < LAYER_MIN_ZOOMS[layer]:
+        return b""
+
+    margin = WORLD_SIZE / 2**z * TILE_BUFFER / TILE_EXTENT
+    params = {
+        "layer": layer,
+        "z": z,
+        "x": x,
+        "y": y,
+        "extent": TILE_EXTENT,
+        "buffer": TILE_BUFFER,
+        "margin": margin,
+    }
+    if layer == SERVICES_LAYER:
+        sql = _SERVICES_TILE_SQL
+        params["published"] = ServiceStatus.PUBLISHED
+    else:
+        Model = ADMIN_DIVISION_MODELS[layer]
+        sql = _DIVISIONS_TILE_SQL.format(
+            tile_geometries=TILE_GEOMETRY_MODELS[Model]._meta.db_table,
+            divisions=Model._meta.db_table,
+        )
+        params["geometry_zoom"] = _get_tile_geometry_zoom(z)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        (content,) = cursor.fetchone()
+    return bytes(content) if content is not None else b""
+
+
+def get_tile(layer: str, version: str, z: int, x: int, y: int) -> bytes:
+    """Return the tile ``z/x/y`` of ``layer``, for the data ``version``."""
+    key = f"tiles:v1:{layer}:{version}:{z}/{x}/{y}"
+    content = cache.get(key)
+    if content is None:
+        content = _render_tile(layer, z, x, y)
+        cache.set(key, content, timeout=settings.TILES_CACHE_SECONDS)
+    return content
@@ -1,6 +1,6 @@
 from unidecode import unidecode
 
-from dora.admin_express.models import City
+from dora.admin_express.registry import get_city
 
 CODE_INSEE_PARIS = "75056"
 CODE_INSEE_PARIS_ARRDTS = [
@@ -84,7 +84,7 @@ def normalize_string_for_search(str):
 
 def get_clean_city_name(insee_code):
     if insee_code:
-        city = City.objects.get_from_code(arrdt_to_main_insee_code(insee_code))
+        city = get_city(arrdt_to_main_insee_code(insee_code))
         if city:
             return city.name
     return ""
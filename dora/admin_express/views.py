@@ -1,6 +1,11 @@
+from django.conf import settings
 from django.contrib.gis.geos import Point
 from django.contrib.postgres.search import TrigramSimilarity
 from django.db.models import Value
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_GET
 from rest_framework import exceptions, permissions, serializers
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.exceptions import NotFound
@@ -10,7 +15,18 @@ from rest_framework_gis.fields import GeometrySerializerMethodField
 from dora.admin_express.utils import normalize_string_for_search
 from dora.core.utils import TRUTHY_VALUES
 
-from .models import EPCI, AdminDivisionType, City, Department, Region
+from .autocomplete import get_autocomplete_index
+from .geocoding import find_division
+from .models import (
+    ADMIN_DIVISION_MODELS,
+    EPCI,
+    AdminDivisionType,
+    City,
+    Department,
+    Region,
+)
+from .registry import get_admin_division, get_city
+from .tiles import MVT_CONTENT_TYPE, get_tile, get_tile_version, is_valid_tile
 
 
 @api_view()
@@ -54,7 +70,27 @@ def search(request):
             f"Invalid type, expected one of {AdminDivisionType.CITY}, {AdminDivisionType.EPCI}, {AdminDivisionType.DEPARTMENT}, {AdminDivisionType.REGION}"
         )
 
-    if q.isdigit() or q == "2A" or q == "2B":
+    by_code = q.isdigit() or q == "2A" or q == "2B"
+    threshold = 0.1 if len(q) > 3 else 0
+    # l'index ne reproduit `pg_trgm` que pour les caractères ASCII
+    index = get_autocomplete_index(type) if norm_q.isascii() else None
+
+    if index is not None:
+        if by_code:
+            results = index.search_code(q, limit=10)
+        else:
+            results = index.search_name(norm_q, threshold, limit=10)
+        if with_geom:
+            divisions = Model.objects.in_bulk([r.code for r in results])
+            for result in results:
+                if result.code in divisions:
+                    divisions[result.code].similarity = result.similarity
+            results = [divisions[r.code] for r in results if r.code in divisions]
+        return Response(
+            AdminDivisionSerializer(results, many=True, with_geom=with_geom).data
+        )
+
+    if by_code:
         qs = (
             Model.objects.filter(code__startswith=q)
             .annotate(similarity=Value(1))
@@ -65,7 +101,7 @@ def search(request):
             Model.objects.annotate(
                 similarity=TrigramSimilarity("normalized_name", norm_q)
             )
-            .filter(similarity__gt=0.1 if len(q) > 3 else 0)
+            .filter(similarity__gt=threshold)
             .order_by(*sort_fields)[:10]
         )
     if not with_geom:
@@ -88,30 +124,42 @@ def reverse_search(request):
         raise exceptions.ValidationError("type, lat and lon are required")
     point = Point(float(lon), float(lat), srid=4326)
 
-    Model = None
-    if type == AdminDivisionType.CITY:
-        Model = City
-    elif type == AdminDivisionType.EPCI:
-        Model = EPCI
-    elif type == AdminDivisionType.DEPARTMENT:
-        Model = Department
-    elif type == AdminDivisionType.REGION:
-        Model = Region
-    else:
+    if type not in ADMIN_DIVISION_MODELS:
         raise exceptions.ValidationError(
             f"Invalid type, expected one of {AdminDivisionType.CITY}, {AdminDivisionType.EPCI}, {AdminDivisionType.DEPARTMENT}, {AdminDivisionType.REGION}"
         )
 
-    result = Model.objects.filter(geom__covers=point).first()
-    if result is not None:
-        return Response(AdminDivisionSerializer(result).data)
+    division = get_admin_division(type, find_division(type, point))
+    if division is not None:
+        return Response(AdminDivisionSerializer(division).data)
     raise NotFound
 
 
 @api_view()
 @permission_classes([permissions.AllowAny])
 def get_city_label(request, insee_code):
-    city = City.objects.get_from_code(insee_code)
+    city = get_city(insee_code)
     if city:
         return Response(city.name)
     raise NotFound
+
+
+# vue Django plutôt que DRF : les tuiles sont binaires, et les clients
+# cartographiques n'envoient pas toujours d'en-tête `Accept` compatible
+@require_GET
+def tile(request, layer, z, x, y):
+    if not is_valid_tile(layer, z, x, y):
+        raise Http404
+
+    version = get_tile_version(layer)
+    etag = f'"{version}"'
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(
+            get_tile(layer, version, z, x, y),
+            content_type=MVT_CONTENT_TYPE,
+        )
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=settings.TILES_MAX_AGE)
+    return response
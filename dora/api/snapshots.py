@@ -0,0 +1,106 @@
+"""Exports complets de l'API, pré-générés.
+
+La commande `generate_api_snapshots` écrit chaque jeu de données exposé par
+l'API v2 (services, structures) dans un fichier NDJSON compressé (gzip) du
+stockage par défaut, puis met à jour un index (`index.json`) qui donne pour
+chaque jeu de données le fichier courant, son ETag, son nombre de lignes et
+sa date de génération.
+
+Les clients qui téléchargent l'intégralité des données sont redirigés vers ces
+fichiers (`/api/v2/services/snapshot/`…), sans requête sur la base.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import tempfile
+
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOTS_DIR = "api-snapshots"
+INDEX_PATH = f"{SNAPSHOTS_DIR}/index.json"
+INDEX_CACHE_KEY = "api-snapshots:index"
+INDEX_CACHE_TIMEOUT = 60
+
+
+def _read_index() -> dict:
+    if not default_storage.exists(INDEX_PATH):
+        return {}
+    with default_storage.open(INDEX_PATH) as f:
+        return json.load(f)
+
+
+def get_snapshots_index() -> dict:
+    index = cache.get(INDEX_CACHE_KEY)
+    if index is None:
+        index = _read_index()
+        cache.set(INDEX_CACHE_KEY, index, timeout=INDEX_CACHE_TIMEOUT)
+    return index
+
+
+def _save_index(index: dict):
+    if default_storage.exists(INDEX_PATH):
+        default_storage.delete(INDEX_PATH)
+    with tempfile.TemporaryFile() as f:
+        f.write(json.dumps(index, indent=2).encode())
+        f.seek(0)
+        default_storage.save(INDEX_PATH, File(f, name="index.json"))
+    cache.delete(INDEX_CACHE_KEY)
+
+
+def write_snapshot(name: str, queryset, serialize, chunk_size: int = 500) -> dict:
+    """Write the NDJSON export of ``queryset`` and register it in the index.
+
+    ``serialize`` turns an object of ``queryset`` into the data exposed by the
+    API.
+
+    Returns:
+        The index entry of the new snapshot.
+    """
+    generated_at = timezone.now()
+    renderer = JSONRenderer()
+    count = 0
+
+    with tempfile.TemporaryFile() as f:
+        with gzip.GzipFile(fileobj=f, mode="wb", mtime=0) as gz:
+            for obj in queryset.iterator(chunk_size=chunk_size):
+                gz.write(renderer.render(serialize(obj)) + b"\n")
+                count += 1
+
+        f.seek(0)
+        digest = hashlib.md5(usedforsecurity=False)
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+        etag = digest.hexdigest()
+
+        f.seek(0)
+        path = default_storage.save(
+            f"{SNAPSHOTS_DIR}/{name}-{generated_at:%Y%m%d%H%M%S}.ndjson.gz",
+            File(f, name=f"{name}.ndjson.gz"),
+        )
+
+    index = _read_index()
+    previous = index.get(name)
+    index[name] = {
+        "path": path,
+        "etag": etag,
+        "count": count,
+        "generated_at": generated_at.isoformat(),
+        "previous_path": previous["path"] if previous else None,
+    }
+    _save_index(index)
+
+    # l'export précédent est conservé jusqu'au suivant : des clients peuvent
+    # y avoir été redirigés avant la mise à jour de l'index
+    if previous and previous.get("previous_path"):
+        default_storage.delete(previous["previous_path"])
+
+    logger.info("Export %s : %s lignes (%s)", name, count, path)
+    return index[name]
@@ -1,9 +1,20 @@
+import base64
+import gzip
+import json
+from datetime import timedelta
+
 import pytest
 from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.utils import timezone
 from model_bakery import baker
 
 from dora.admin_express.models import City, Department
-from dora.core.test_utils import make_service, make_structure
+from dora.api.snapshots import get_snapshots_index
+from dora.core.models import get_purged_change_log_id
+from dora.core.test_utils import make_published_service, make_service, make_structure
 from dora.services.models import (
     BeneficiaryAccessMode,
     CoachOrientationMode,
@@ -11,6 +22,7 @@ from dora.services.models import (
     Credential,
     LocationKind,
     Requirement,
+    Service,
     ServiceFee,
     ServiceKind,
     ServiceStatus,
@@ -154,6 +166,253 @@ def test_services_api_response_need_di_user(api_client):
     assert 401 == response.status_code
 
 
+def crawl(api_client, url):
+    pages = []
+    while url:
+        response = api_client.get(url)
+        assert 200 == response.status_code
+        assert "count" not in response.data
+        pages.append([s["id"] for s in response.data["results"]])
+        url = response.data["next"]
+    return pages
+
+
+def test_services_api_cursor_pagination(authenticated_user, api_client):
+    services = sorted(str(make_published_service().id) for _ in range(5))
+
+    pages = crawl(api_client, "/api/v2/services/?cursor=&page_size=2")
+
+    assert pages == [services[:2], services[2:4], services[4:]]
+
+
+def test_services_api_cursor_pagination_by_modification_date(
+    authenticated_user, api_client
+):
+    now = timezone.now()
+    services = []
+    for days in (1, 3, 2):
+        service = make_published_service()
+        Service.objects.filter(pk=service.pk).update(
+            modification_date=now - timedelta(days=days)
+        )
+        services.append(service)
+    undated = make_published_service()
+    Service.objects.filter(pk=undated.pk).update(modification_date=None)
+
+    pages = crawl(
+        api_client,
+        "/api/v2/services/?cursor=&cursor_ordering=modification_date&page_size=2",
+    )
+
+    assert pages == [
+        [str(undated.id), str(services[1].id)],
+        [str(services[2].id), str(services[0].id)],
+    ]
+
+    # curseur positionné sur une date de modification nulle
+    pages = crawl(
+        api_client,
+        "/api/v2/services/?cursor=&cursor_ordering=modification_date&page_size=1",
+    )
+    assert pages == [
+        [str(undated.id)],
+        [str(services[1].id)],
+        [str(services[2].id)],
+        [str(services[0].id)],
+    ]
+
+
+def encode_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "invalide",
+        encode_cursor([]),
+        encode_cursor({"o": "pk", "p": 5}),
+        encode_cursor({"o": "pk", "p": ["pas-un-uuid"]}),
+        encode_cursor({"o": "pk", "p": [None]}),
+        encode_cursor({"o": "inconnu", "p": ["1"]}),
+        encode_cursor({"o": ["pk"], "p": ["1"]}),
+        encode_cursor(
+            {
+                "o": "modification_date",
+                "p": ["pas-une-date", "8d3b4d3e-7d7b-4e43-9a5e-7d2f0e6b1a10"],
+            }
+        ),
+    ],
+)
+def test_services_api_invalid_cursor(authenticated_user, api_client, cursor):
+    response = api_client.get("/api/v2/services/", {"cursor": cursor})
+
+    assert 404 == response.status_code
+
+
+@pytest.fixture
+def no_change_feed_delay(settings):
+    settings.CHANGE_FEED_DELAY_SECONDS = 0
+
+
+def test_services_change_feed(authenticated_user, api_client, no_change_feed_delay):
+    since = timezone.now().isoformat()
+    published = make_published_service()
+    unpublished = make_published_service()
+    unpublished.status = ServiceStatus.DRAFT
+    unpublished.save()
+    suspended = make_published_service(
+        suspension_date=timezone.localdate() - timedelta(days=1)
+    )
+
+    response = api_client.get("/api/v2/services/changes/", {"modified_since": since})
+
+    assert 200 == response.status_code
+    assert not response.data["has_more"]
+    changes = {c["id"]: c for c in response.data["results"]}
+    assert changes.keys() == {
+        str(published.id),
+        str(unpublished.id),
+        str(suspended.id),
+    }
+    assert changes[str(published.id)]["action"] == "upsert"
+    assert changes[str(published.id)]["data"]["id"] == str(published.id)
+    assert changes[str(unpublished.id)] == {
+        "action": "delete",
+        "id": str(unpublished.id),
+    }
+    assert changes[str(suspended.id)]["action"] == "delete"
+
+    cursor = response.data["cursor"]
+    response = api_client.get("/api/v2/services/changes/", {"cursor": cursor})
+    assert [] == response.data["results"]
+    assert cursor == response.data["cursor"]
+
+    published.name = "Nouveau nom"
+    published.save()
+    response = api_client.get("/api/v2/services/changes/", {"cursor": cursor})
+    assert [str(published.id)] == [c["id"] for c in response.data["results"]]
+
+
+def test_structures_change_feed_reports_deletions(
+    authenticated_user, api_client, no_change_feed_delay
+):
+    structure = make_structure()
+    response = api_client.get(
+        "/api/v2/structures/changes/", {"cursor": "0", "page_size": 1000}
+    )
+    cursor = response.data["cursor"]
+
+    structure_id = structure.id
+    structure.delete()
+    response = api_client.get("/api/v2/structures/changes/", {"cursor": cursor})
+
+    assert [{"action": "delete", "id": str(structure_id)}] == response.data["results"]
+
+
+def test_change_feed_requires_a_starting_point(authenticated_user, api_client):
+    response = api_client.get("/api/v2/services/changes/")
+
+    assert 400 == response.status_code
+
+
+def test_change_feed_gone_before_retention(
+    authenticated_user, api_client, no_change_feed_delay, settings
+):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    settings.CHANGE_LOG_RETENTION_DAYS = 0
+    cache.clear()
+    make_published_service()
+    response = api_client.get("/api/v2/services/changes/", {"cursor": "0"})
+    cursor = response.data["cursor"]
+
+    # la modification suivante est supprimée avant d'avoir été lue
+    make_published_service()
+    call_command("update_change_log")
+
+    response = api_client.get("/api/v2/services/changes/", {"cursor": cursor})
+    assert 410 == response.status_code
+    response = api_client.get(
+        "/api/v2/services/changes/",
+        {"modified_since": (timezone.now() - timedelta(days=1)).isoformat()},
+    )
+    assert 410 == response.status_code
+
+    response = api_client.get(
+        "/api/v2/services/changes/", {"cursor": str(get_purged_change_log_id())}
+    )
+    assert 200 == response.status_code
+    cache.clear()
+
+
+@pytest.fixture
+def snapshots_storage(settings, tmp_path):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    }
+    settings.MEDIA_ROOT = str(tmp_path)
+    cache.clear()
+    yield default_storage
+    cache.clear()
+
+
+def read_snapshot(storage, path):
+    with storage.open(path) as f:
+        return [json.loads(line) for line in gzip.decompress(f.read()).splitlines()]
+
+
+def test_services_snapshot(authenticated_user, api_client, snapshots_storage):
+    service = make_published_service()
+    make_service(status=ServiceStatus.DRAFT)
+
+    call_command("generate_api_snapshots", dataset=["services"])
+
+    response = api_client.get("/api/v2/services/snapshot/")
+    assert 302 == response.status_code
+    assert "1" == response["X-Snapshot-Count"]
+    entry = get_snapshots_index()["services"]
+    assert response["Location"] == snapshots_storage.url(entry["path"])
+    assert [str(service.id)] == [
+        s["id"] for s in read_snapshot(snapshots_storage, entry["path"])
+    ]
+
+    response = api_client.get(
+        "/api/v2/services/snapshot/", HTTP_IF_NONE_MATCH=response["ETag"]
+    )
+    assert 304 == response.status_code
+
+
+def test_snapshot_keeps_previous_file(
+    authenticated_user, api_client, snapshots_storage
+):
+    call_command("generate_api_snapshots", dataset=["structures"])
+    first = get_snapshots_index()["structures"]["path"]
+    call_command("generate_api_snapshots", dataset=["structures"])
+    second = get_snapshots_index()["structures"]["path"]
+    call_command("generate_api_snapshots", dataset=["structures"])
+
+    assert not snapshots_storage.exists(first)
+    assert snapshots_storage.exists(second)
+
+
+def test_missing_snapshot(authenticated_user, api_client, snapshots_storage):
+    response = api_client.get("/api/v2/structures/snapshot/")
+
+    assert 404 == response.status_code
+
+
+def test_snapshot_need_di_user(api_client, snapshots_storage):
+    response = api_client.get("/api/v2/services/snapshot/")
+
+    assert 401 == response.status_code
+
+
 def test_unpublished_service_is_not_serialized(authenticated_user, api_client):
     service = make_service(status=ServiceStatus.DRAFT)
     response = api_client.get(f"/api/v2/services/{service.id}/")
@@ -1,13 +1,32 @@
+from datetime import timedelta
+
 import django_filters
 from django.conf import settings
+from django.core.files.storage import default_storage
 from django.db.models import Q
+from django.http import HttpResponseRedirect
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
 from djangorestframework_camel_case.render import CamelCaseJSONRenderer
 from drf_spectacular.utils import extend_schema
-from rest_framework import mixins, permissions, viewsets
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, NotFound, ValidationError
 from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 from rest_framework.versioning import NamespaceVersioning
 
-from dora.core.pagination import OptionalPageNumberPagination
+from dora.core.models import (
+    ChangeLogEntry,
+    ChangeLogObjectType,
+    get_purged_change_log_id,
+)
+from dora.core.pagination import (
+    OptionalCursorPagination,
+    OptionalPageNumberPagination,
+)
+from dora.core.streaming import StreamingListMixin
 from dora.core.utils import TRUTHY_VALUES
 from dora.services.models import (
     BeneficiaryAccessMode,
@@ -40,12 +59,13 @@ from .serializers import (
     StructureTypologySerializerV1,
     StructureOpenSerializer,
 )
+from .snapshots import get_snapshots_index
 
 
 class PrettyCamelCaseJSONRenderer(CamelCaseJSONRenderer):
     def render(self, data, media_type=None, renderer_context=None):
         renderer_context = renderer_context or {}
-        renderer_context["indent"] = 4
+        renderer_context.setdefault("indent", 4)
         return super().render(data, media_type, renderer_context)
 
 
@@ -75,16 +95,163 @@ class APIPermission(permissions.BasePermission):
 class PrettyJSONRenderer(JSONRenderer):
     def render(self, data, media_type=None, renderer_context=None):
         renderer_context = renderer_context or {}
-        renderer_context["indent"] = 4
+        renderer_context.setdefault("indent", 4)
         return super().render(data, media_type, renderer_context)
 
 
-class StructureViewSet(viewsets.ReadOnlyModelViewSet):
+class ChangeFeedGone(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = (
+        "Point de départ antérieur à la durée de conservation du journal : "
+        "repartir de l'export complet"
+    )
+    default_code = "gone"
+
+
+class ChangeFeedMixin:
+    # Flux des modifications : `changes/?modified_since=<date ISO>` pour le
+    # premier appel, puis `changes/?cursor=<cursor>` avec le curseur renvoyé
+    # par l'appel précédent, tant que `has_more` est vrai (et ensuite
+    # périodiquement). Chaque objet modifié est renvoyé dans son état actuel
+    # (`upsert`), ou sous forme de suppression (`delete`) s'il n'est plus
+    # exposé par l'API.
+    # Un point de départ plus ancien que la durée de conservation du journal
+    # est refusé (410) : le client doit repartir de l'export complet.
+    change_log_object_type = None
+    change_feed_page_size = 100
+    change_feed_max_page_size = 1000
+
+    def get_change_feed_queryset(self):
+        return self.get_queryset()
+
+    def get_change_feed_params(self, request):
+        cursor = request.query_params.get("cursor")
+        modified_since = request.query_params.get("modified_since")
+        try:
+            page_size = min(
+                max(int(request.query_params["page_size"]), 1),
+                self.change_feed_max_page_size,
+            )
+        except (KeyError, ValueError):
+            page_size = self.change_feed_page_size
+
+        if cursor is not None:
+            if not cursor.isdigit():
+                raise ValidationError({"cursor": "Curseur invalide"})
+            return int(cursor), None, page_size
+        if modified_since is not None:
+            try:
+                modified_since = parse_datetime(modified_since)
+            except ValueError:
+                modified_since = None
+            if modified_since is None:
+                raise ValidationError({"modified_since": "Date invalide"})
+            if timezone.is_naive(modified_since):
+                modified_since = timezone.make_aware(modified_since)
+            return None, modified_since, page_size
+        raise ValidationError("`cursor` ou `modified_since` est requis")
+
+    @action(detail=False, url_path="changes", pagination_class=None)
+    def changes(self, request, *args, **kwargs):
+        cursor, modified_since, page_size = self.get_change_feed_params(request)
+        if cursor is not None:
+            if cursor < get_purged_change_log_id():
+                raise ChangeFeedGone
+        elif modified_since < timezone.now() - timedelta(
+            days=settings.CHANGE_LOG_RETENTION_DAYS
+        ):
+            raise ChangeFeedGone
+
+        entries = ChangeLogEntry.objects.filter(
+            object_type=self.change_log_object_type,
+            date__lt=timezone.now()
+            - timedelta(seconds=settings.CHANGE_FEED_DELAY_SECONDS),
+        )
+        if cursor is not None:
+            entries = entries.filter(id__gt=cursor)
+        else:
+            entries = entries.filter(date__gte=modified_since)
+        entries = list(
+            entries.order_by("id").values_list("id", "object_id")[:page_size]
+        )
+
+        if entries:
+            next_cursor = entries[-1][0]
+        elif cursor is not None:
+            next_cursor = cursor
+        else:
+            next_cursor = (
+                ChangeLogEntry.objects.filter(
+                    object_type=self.change_log_object_type, date__lt=modified_since
+                )
+                .order_by("-id")
+                .values_list("id", flat=True)
+                .first()
+                or 0
+            )
+
+        object_ids = list(dict.fromkeys(object_id for _, object_id in entries))
+        exposed = {
+            obj.pk: obj
+            for obj in self.get_change_feed_queryset().filter(pk__in=object_ids)
+        }
+        results = [
+            {
+                "action": "upsert",
+                "id": str(object_id),
+                "data": self.get_serializer(exposed[object_id]).data,
+            }
+            if object_id in exposed
+            else {"action": "delete", "id": str(object_id)}
+            for object_id in object_ids
+        ]
+        return Response(
+            {
+                "cursor": str(next_cursor),
+                "has_more": len(entries) == page_size,
+                "results": results,
+            }
+        )
+
+
+class SnapshotMixin:
+    # Export complet pré-généré (voir `dora.api.snapshots`) : redirige vers le
+    # dernier fichier NDJSON compressé, sans requête sur la base
+    snapshot_name = None
+
+    @action(detail=False, url_path="snapshot", pagination_class=None)
+    def snapshot(self, request, *args, **kwargs):
+        entry = get_snapshots_index().get(self.snapshot_name)
+        if entry is None:
+            raise NotFound("Aucun export disponible")
+
+        etag = f'"{entry["etag"]}"'
+        headers = {
+            "ETag": etag,
+            "X-Snapshot-Count": str(entry["count"]),
+            "X-Snapshot-Generated-At": entry["generated_at"],
+        }
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response = HttpResponseRedirect(default_storage.url(entry["path"]))
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+
+class StructureViewSet(
+    StreamingListMixin,
+    SnapshotMixin,
+    ChangeFeedMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
+    snapshot_name = "structures"
+    change_log_object_type = ChangeLogObjectType.STRUCTURE
     versioning_class = NamespaceVersioning
     permission_classes = [APIPermission]
     serializer_class = StructureSerializer
     renderer_classes = [PrettyJSONRenderer]
-    pagination_class = OptionalPageNumberPagination
+    pagination_class = OptionalCursorPagination
 
     def get_queryset(self):
         structures = (
@@ -98,7 +265,7 @@ class StructureViewSet(viewsets.ReadOnlyModelViewSet):
         return structures.order_by("pk")
 
 
-class StructureOpenViewSet(viewsets.ReadOnlyModelViewSet):
+class StructureOpenViewSet(StreamingListMixin, viewsets.ReadOnlyModelViewSet):
     versioning_class = NamespaceVersioning
     permission_classes = []
     serializer_class = StructureOpenSerializer
@@ -114,7 +281,14 @@ class StructureOpenViewSet(viewsets.ReadOnlyModelViewSet):
         return structures.order_by("pk")
 
 
-class ServiceViewSet(viewsets.ReadOnlyModelViewSet):
+class ServiceViewSet(
+    StreamingListMixin,
+    SnapshotMixin,
+    ChangeFeedMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
+    snapshot_name = "services"
+    change_log_object_type = ChangeLogObjectType.SERVICE
     versioning_class = NamespaceVersioning
     queryset = (
         Service.objects.published()
@@ -125,7 +299,13 @@ class ServiceViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ServiceSerializer
     permission_classes = [APIPermission]
     renderer_classes = [PrettyJSONRenderer]
-    pagination_class = OptionalPageNumberPagination
+    pagination_class = OptionalCursorPagination
+
+    def get_change_feed_queryset(self):
+        # les services suspendus sont signalés comme supprimés
+        return self.get_queryset().filter(
+            Q(suspension_date=None) | Q(suspension_date__gte=timezone.localdate())
+        )
 
 
 ############
@@ -157,13 +337,13 @@ class StructureFilterV1(django_filters.FilterSet):
 @extend_schema(
     tags=["Structures"],
 )
-class StructureViewSetV1(viewsets.ReadOnlyModelViewSet):
+class StructureViewSetV1(StreamingListMixin, viewsets.ReadOnlyModelViewSet):
     versioning_class = NamespaceVersioning
     serializer_class = StructureSerializerV1
     permission_classes = [permissions.AllowAny]
     renderer_classes = [PrettyCamelCaseJSONRenderer]
     filterset_class = StructureFilterV1
-    pagination_class = OptionalPageNumberPagination
+    pagination_class = OptionalCursorPagination
 
     def get_queryset(self):
         structures = Structure.objects.select_related("typology", "source").all()
@@ -238,7 +418,7 @@ class ServiceFilterV1(django_filters.FilterSet):
 
 
 @extend_schema(tags=["Services"])
-class ServiceViewSetV1(viewsets.ReadOnlyModelViewSet):
+class ServiceViewSetV1(StreamingListMixin, viewsets.ReadOnlyModelViewSet):
     versioning_class = NamespaceVersioning
     queryset = (
         Service.objects.published()
@@ -260,7 +440,7 @@ class ServiceViewSetV1(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.AllowAny]
     renderer_classes = [PrettyCamelCaseJSONRenderer]
     filterset_class = ServiceFilterV1
-    pagination_class = OptionalPageNumberPagination
+    pagination_class = OptionalCursorPagination
 
 
 @extend_schema(tags=["Dictionnaires des services"])
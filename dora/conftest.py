@@ -1,6 +1,11 @@
 import pytest
 from rest_framework.test import APIClient
 
+from dora.admin_express.autocomplete import clear_autocomplete_indexes
+from dora.admin_express.registry import invalidate_admin_division_registry
+from dora.core.enum_registry import clear_enum_registry
+from dora.services.options import invalidate_options
+
 
 @pytest.fixture(autouse=True)
 def setup_test_settings(settings):
@@ -8,6 +13,9 @@ def setup_test_settings(settings):
     # en remplacement de l'ancien test runner
     settings.SIB_ACTIVE = False
     settings.IS_TESTING = True
+    # les tests des listes lisent `response.data` : le rendu en flux est testé
+    # séparément (voir `dora.core.tests.test_streaming`)
+    settings.STREAMING_LIST_RESPONSES = False
     yield
 
 
@@ -18,6 +26,36 @@ def _use_db(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def _clear_enum_registry():
+    # les tables de référence modifiées par un test sont restaurées
+    # en fin de test, le registre doit l'être aussi
+    clear_enum_registry()
+    yield
+    clear_enum_registry()
+
+
+@pytest.fixture(autouse=True)
+def _invalidate_services_options():
+    # idem pour les options des services mises en cache
+    invalidate_options()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _invalidate_admin_division_registry():
+    # et pour le registre des divisions administratives
+    invalidate_admin_division_registry()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _clear_autocomplete_indexes():
+    # ainsi que les index de recherche construits à partir de ce registre
+    clear_autocomplete_indexes()
+    yield
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -22,6 +22,8 @@ def send_mail(
     reply_to=None,
     cc=None,
     attachments=None,
+    # connexion à réutiliser pour un envoi en nombre (voir `get_connection`)
+    connection=None,
 ):
     headers = {
         "X-TM-DOMAIN": settings.EMAIL_DOMAIN,
@@ -48,6 +50,7 @@ def send_mail(
         headers=headers,
         cc=cc,
         reply_to=clean_reply_to(reply_to),
+        connection=connection,
     )
     msg.content_subtype = "html"
     if attachments is not None:
@@ -0,0 +1,107 @@
+"""Registre en mémoire des tables de référence (`EnumModel`).
+
+Les thématiques, types de service, lieux de déroulement, modes d'orientation,
+frais, typologies… sont de petites tables quasi statiques, mais interrogées en
+permanence (recherche, fiches d·i, statistiques, imports, endpoint `options`).
+
+Chaque process charge une table entière au premier accès, puis résout
+valeur ↔ objet ↔ libellé sans requête. Toute modification d'une ligne
+(`post_save` / `post_delete`, voir `dora.core.models`) change la version de la
+table, stockée dans le cache Django (Redis) : les autres workers rechargent la
+table dès qu'ils constatent le changement de version, au plus tard
+`ENUM_REGISTRY_CHECK_SECONDS` après.
+"""
+
+import threading
+import time
+from typing import Iterable, Optional
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY_PREFIX = "enum-registry:v1"
+
+_lock = threading.Lock()
+# table, version et date de la dernière vérification de version, par modèle
+_tables = {}
+
+
+class EnumTable:
+    """All the rows of an ``EnumModel`` table, indexed by value.
+
+    Rows are kept in primary key order; ``ordered_by_label`` returns them in
+    the database collation order of their labels.
+    """
+
+    def __init__(self, objects_by_label: list) -> None:
+        self.objects_by_label = objects_by_label
+        self.objects = sorted(objects_by_label, key=lambda obj: obj.pk)
+        self.by_value = {obj.value: obj for obj in self.objects}
+
+    def __iter__(self):
+        return iter(self.objects)
+
+    def __len__(self):
+        return len(self.objects)
+
+    def all(self) -> list:
+        return list(self.objects)
+
+    def ordered_by_label(self) -> list:
+        return list(self.objects_by_label)
+
+    def get(self, value: str):
+        return self.by_value.get(value)
+
+    def filter(self, values: Iterable[str]) -> list:
+        values = set(values)
+        return [obj for obj in self.objects if obj.value in values]
+
+    def startswith(self, prefix: str) -> list:
+        return [obj for obj in self.objects if obj.value.startswith(prefix)]
+
+    def values(self) -> list[str]:
+        return [obj.value for obj in self.objects]
+
+    def label(self, value: str, default: Optional[str] = None) -> Optional[str]:
+        obj = self.by_value.get(value)
+        return obj.label if obj is not None else default
+
+
+def _version_key(model) -> str:
+    return f"{VERSION_KEY_PREFIX}:{model._meta.label_lower}"
+
+
+def enum_table(model) -> EnumTable:
+    """Return the in-memory table of the ``EnumModel`` subclass ``model``."""
+    key = model._meta.label_lower
+    now = time.monotonic()
+    entry = _tables.get(key)
+
+    if entry is not None:
+        table, version, checked_at = entry
+        if now - checked_at < settings.ENUM_REGISTRY_CHECK_SECONDS:
+            return table
+        current_version = cache.get(_version_key(model))
+        if current_version == version:
+            _tables[key] = (table, version, now)
+            return table
+
+    with _lock:
+        # la version est lue avant les lignes : une modification concurrente
+        # provoquera au pire un rechargement superflu
+        version = cache.get(_version_key(model))
+        table = EnumTable(list(model.objects.order_by("label", "pk")))
+        _tables[key] = (table, version, now)
+        return table
+
+
+def invalidate_enum_table(model):
+    """Signal to every process that the table of ``model`` changed."""
+    cache.set(_version_key(model), uuid4().hex, timeout=None)
+    _tables.pop(model._meta.label_lower, None)
+
+
+def clear_enum_registry():
+    _tables.clear()
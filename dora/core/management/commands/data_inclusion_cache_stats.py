@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from dora.data_inclusion import get_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Affiche les compteurs du cache des appels à data·inclusion"
+
+    def handle(self, *args, **options):
+        for operation, counters in get_cache_stats().items():
+            total = sum(counters.values())
+            served = counters["hit"] + counters["stale"]
+            ratio = f"{served / total:.1%}" if total else "-"
+            details = ", ".join(f"{k}: {v}" for k, v in counters.items())
+            self.stdout.write(
+                f"{operation}: {details} (servis depuis le cache : {ratio})"
+            )
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from dora.api.snapshots import write_snapshot
+from dora.api.views import ServiceViewSet, StructureViewSet
+from dora.users.models import User
+
+
+class Command(BaseCommand):
+    help = "Génère les exports complets des services et structures de l'API v2"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dataset", choices=["services", "structures"], action="append"
+        )
+
+    def handle(self, *args, **options):
+        # mêmes données que celles servies à data·inclusion, seul utilisateur
+        # autorisé sur l'API v2 (coordonnées de contact comprises)
+        request = RequestFactory().get("/")
+        request.user = User(email=settings.DATA_INCLUSION_EMAIL)
+        context = {"request": request}
+
+        datasets = {
+            "services": (ServiceViewSet.queryset, ServiceViewSet.serializer_class),
+            "structures": (
+                StructureViewSet().get_queryset(),
+                StructureViewSet.serializer_class,
+            ),
+        }
+        for name in options["dataset"] or datasets:
+            queryset, serializer_class = datasets[name]
+            entry = write_snapshot(
+                name,
+                queryset.all(),
+                lambda obj: serializer_class(obj, context=context).data,
+            )
+            self.stdout.write(f"{name} : {entry['count']} lignes ({entry['path']})")
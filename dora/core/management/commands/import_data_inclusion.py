@@ -9,6 +9,7 @@ from django.utils.text import Truncator
 from furl import furl
 
 from dora.core import utils
+from dora.core.enum_registry import enum_table
 from dora.core.models import ModerationStatus
 from dora.core.notify import send_moderation_notification
 from dora.services.models import (
@@ -319,9 +320,9 @@ class Command(BaseCommand):
                 )
 
                 service.kinds.set(self._values_to_objects(ServiceKind, s["types"]))
-                service.fee_condition = ServiceFee.objects.filter(
-                    value__in=s["frais"]
-                ).first()
+                service.fee_condition = next(
+                    iter(enum_table(ServiceFee).filter(s["frais"])), None
+                )
                 service.location_kinds.set(
                     self._values_to_objects(LocationKind, s["modes_accueil"])
                 )
@@ -346,5 +347,5 @@ class Command(BaseCommand):
 
     def _values_to_objects(self, Model, values):
         if values:
-            return Model.objects.filter(value__in=values)
+            return enum_table(Model).filter(values)
         return []
@@ -8,8 +8,10 @@ from django.utils import timezone
 from django.utils.text import Truncator
 from furl import furl
 
-from dora.admin_express.models import AdminDivisionType, City
+from dora.admin_express.geocoding import find_divisions
+from dora.admin_express.models import AdminDivisionType
 from dora.core import utils
+from dora.core.enum_registry import enum_table
 from dora.core.models import ModerationStatus
 from dora.core.notify import send_moderation_notification
 from dora.core.utils import code_insee_to_code_dept, normalize_description
@@ -226,6 +228,21 @@ class Command(BaseCommand):
                     f"d'administration"
                 )
             )
+        # communes des services géolocalisés sans code INSEE, résolues en une
+        # seule requête
+        to_locate = [
+            s
+            for s in services
+            if not s["code_insee"] and s["longitude"] and s["latitude"]
+        ]
+        located_city_codes = find_divisions(
+            AdminDivisionType.CITY,
+            [Point(s["longitude"], s["latitude"], srid=4326) for s in to_locate],
+        )
+        self.located_city_codes = {
+            s["id"]: code for s, code in zip(to_locate, located_city_codes)
+        }
+
         num_imported = 0
         for s in services:
             if Service.objects.filter(
@@ -310,9 +327,9 @@ class Command(BaseCommand):
                 )
 
                 service.kinds.set(self._values_to_objects(ServiceKind, s["types"]))
-                service.fee_condition = ServiceFee.objects.filter(
-                    value__in=s["frais"]
-                ).first()
+                service.fee_condition = next(
+                    iter(enum_table(ServiceFee).filter(s["frais"])), None
+                )
                 service.location_kinds.set(
                     self._values_to_objects(LocationKind, s["modes_accueil"])
                 )
@@ -339,7 +356,7 @@ class Command(BaseCommand):
 
     def _values_to_objects(self, Model, values):
         if values:
-            return Model.objects.filter(value__in=values)
+            return enum_table(Model).filter(values)
         return []
 
     def _presave_mednum_services(self, service, label_nationaux):
@@ -355,19 +372,18 @@ class Command(BaseCommand):
             )
 
         if service.geom and not service.city_code:
-            try:
-                city = City.objects.get(geom__covers=service.geom)
-            except City.DoesNotExist:
+            city_code = self.located_city_codes.get(service.data_inclusion_id)
+            if city_code is None:
                 self.stderr.write(self.style.ERROR("Impossible de déterminer la ville"))
             else:
-                if city.code[:2] != service.postal_code[
+                if city_code[:2] != service.postal_code[
                     :2
                 ] and not service.postal_code.startswith("20"):
                     self.stderr.write(
                         self.style.ERROR("Ville inconsistente avec le code postal")
                     )
                 else:
-                    service.city_code = city.code
+                    service.city_code = city_code
 
         if not service.diffusion_zone_type or not service.diffusion_zone_details:
             service.diffusion_zone_type = AdminDivisionType.DEPARTMENT
@@ -13,6 +13,7 @@ from furl import furl
 
 from dora.core import utils
 from dora.core.constants import SIREN_POLE_EMPLOI
+from dora.core.enum_registry import enum_table
 from dora.core.models import ModerationStatus
 from dora.core.notify import send_moderation_notification
 from dora.core.utils import normalize_description
@@ -341,7 +342,7 @@ class Command(BaseCommand):
 
     def _values_to_objects(self, Model, values):
         if values:
-            return Model.objects.filter(value__in=values)
+            return enum_table(Model).filter(values)
         return []
 
     def _str_to_list(self, string):
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from dora.core.models import ChangeLogEntry, ChangeLogObjectType, purge_change_log
+from dora.services.models import Service
+
+
+class Command(BaseCommand):
+    help = (
+        "Ajoute au journal des modifications les services suspendus depuis "
+        "la veille, et supprime les entrées trop anciennes"
+    )
+
+    def handle(self, *args, **options):
+        # un service est suspendu le lendemain de sa date de suspension,
+        # sans être modifié : aucun signal ne l'a inscrit au journal
+        yesterday = timezone.localdate() - timedelta(days=1)
+        suspended_ids = (
+            Service.objects.published()
+            .filter(suspension_date=yesterday)
+            .values_list("pk", flat=True)
+        )
+        ChangeLogEntry.objects.bulk_create(
+            ChangeLogEntry(object_type=ChangeLogObjectType.SERVICE, object_id=pk)
+            for pk in suspended_ids
+        )
+        self.stdout.write(f"{len(suspended_ids)} services suspendus")
+
+        deleted = purge_change_log(
+            timezone.now() - timedelta(days=settings.CHANGE_LOG_RETENTION_DAYS)
+        )
+        self.stdout.write(f"{deleted} entrées supprimées")
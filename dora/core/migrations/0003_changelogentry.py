@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeLogEntry",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "object_type",
+                    models.CharField(
+                        choices=[("service", "Service"), ("structure", "Structure")],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.UUIDField()),
+                ("date", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["object_type", "id"],
+                        name="core_changelog_type_id_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,5 +1,10 @@
 from django.conf import settings
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Max
+from django.db.models.signals import post_delete, post_save
+
+from .enum_registry import invalidate_enum_table
 
 
 class EnumModel(models.Model):
@@ -13,6 +18,19 @@ class EnumModel(models.Model):
         return self.label
 
 
+def _invalidate_enum_table(sender, **kwargs):
+    if issubclass(sender, EnumModel):
+        # une fois la transaction validée : un process qui constaterait la
+        # nouvelle version plus tôt rechargerait les lignes précédentes, et la
+        # garderait jusqu'à la modification suivante
+        transaction.on_commit(lambda: invalidate_enum_table(sender))
+
+
+# `EnumModel` est abstrait : les signaux sont reçus pour tous les modèles
+post_save.connect(_invalidate_enum_table, dispatch_uid="enum_model_post_save")
+post_delete.connect(_invalidate_enum_table, dispatch_uid="enum_model_post_delete")
+
+
 class ModerationStatus(models.TextChoices):
     NEED_INITIAL_MODERATION = (
         "NEED_INITIAL_MODERATION",
@@ -59,3 +77,57 @@ class LogItem(models.Model):
     )
     date = models.DateTimeField(auto_now_add=True)
     message = models.TextField()
+
+
+class ChangeLogObjectType(models.TextChoices):
+    SERVICE = "service", "Service"
+    STRUCTURE = "structure", "Structure"
+
+
+class ChangeLogEntry(models.Model):
+    # Journal des modifications des services et des structures, lu par le flux
+    # de modifications de l'API (`/api/v2/services/changes/`…).
+    # Une entrée indique seulement qu'un objet a changé : l'API renvoie son état
+    # au moment de la lecture, ou sa suppression s'il n'est plus exposé.
+    # Alimenté par les signaux `post_save` / `post_delete` / `m2m_changed`
+    # et par la commande `update_change_log` (suspensions)
+    id = models.BigAutoField(primary_key=True)
+    object_type = models.CharField(max_length=20, choices=ChangeLogObjectType.choices)
+    object_id = models.UUIDField()
+    date = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["object_type", "id"], name="core_changelog_type_id_idx"
+            ),
+        ]
+
+
+def record_change(object_type: ChangeLogObjectType, object_id):
+    ChangeLogEntry.objects.create(object_type=object_type, object_id=object_id)
+
+
+CHANGE_LOG_PURGED_ID_KEY = "change_log:v1:purged_id"
+
+
+def get_purged_change_log_id() -> int:
+    """Return the highest id removed from the change log (0 if none)."""
+    return cache.get(CHANGE_LOG_PURGED_ID_KEY) or 0
+
+
+def purge_change_log(before) -> int:
+    """Delete the change log entries older than ``before``."""
+    entries = ChangeLogEntry.objects.filter(date__lt=before)
+    last_id = entries.aggregate(last=Max("id"))["last"]
+    if last_id is None:
+        return 0
+    # mémorisé avant la suppression : le flux de modifications répond 410 aux
+    # curseurs antérieurs, dont une partie des modifications suivantes est perdue
+    cache.set(
+        CHANGE_LOG_PURGED_ID_KEY,
+        max(last_id, get_purged_change_log_id()),
+        timeout=None,
+    )
+    deleted, _ = entries.filter(id__lte=last_id).delete()
+    return deleted
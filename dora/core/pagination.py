@@ -1,4 +1,14 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class OptionalPageNumberPagination(pagination.PageNumberPagination):
@@ -12,3 +22,180 @@ class OptionalPageNumberPagination(pagination.PageNumberPagination):
         if self.page_size_query_param in request.query_params:
             return super().get_page_size(request)
         return None
+
+
+def _get_cursor_field(model, name):
+    return model._meta.pk if name == "pk" else model._meta.get_field(name)
+
+
+def _encode_cursor_value(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class OptionalCursorPagination(OptionalPageNumberPagination):
+    # En plus des modes de `OptionalPageNumberPagination`, le résultat peut être
+    # parcouru par curseur, sans OFFSET ni COUNT : `?cursor=` pour la première
+    # page, puis l'URL `next` de chaque page, jusqu'à ce qu'elle soit nulle.
+    # `?cursor_ordering=modification_date` parcourt les objets par date de
+    # modification (puis par pk) plutôt que par pk, par exemple pour ne
+    # récupérer que les objets modifiés depuis le dernier parcours.
+    # Le curseur est opaque et fixe l'ordre du parcours.
+    # Les valeurs nulles sont classées en premier, comme dans les index
+    # `(modification_date NULLS FIRST, id)` des services et des structures :
+    # chaque page est lue dans l'index, sans trier toute la table.
+
+    cursor_query_param = "cursor"
+    cursor_ordering_query_param = "cursor_ordering"
+    cursor_orderings = {
+        "pk": ["pk"],
+        "modification_date": ["modification_date", "pk"],
+    }
+    cursor_page_size = 100
+    cursor_max_page_size = 1000
+    invalid_cursor_message = "Curseur invalide"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        ordering, position = self.decode_cursor(request)
+        columns = self.cursor_orderings[ordering]
+
+        fields = [_get_cursor_field(queryset.model, name) for name in columns]
+        queryset = queryset.order_by(
+            *(
+                F(name).asc(nulls_first=True) if field.null else name
+                for name, field in zip(columns, fields)
+            )
+        )
+        if position is not None:
+            position = self.parse_position(fields, position)
+            queryset = queryset.filter(self.get_position_filter(columns, position))
+
+        page_size = self.get_cursor_page_size(request)
+        results = list(queryset[: page_size + 1])
+        self.has_next = len(results) > page_size
+        results = results[:page_size]
+
+        self.next_cursor = None
+        if self.has_next:
+            last = results[-1]
+            self.next_cursor = self.encode_cursor(
+                ordering, [getattr(last, name) for name in columns]
+            )
+        return results
+
+    def get_cursor_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.cursor_page_size
+        return min(max(page_size, 1), self.cursor_max_page_size)
+
+    def parse_position(self, fields, position):
+        # valeurs du curseur converties selon le type des colonnes (une valeur
+        # nulle n'est admise que pour une colonne qui peut l'être)
+        values = []
+        try:
+            for field, value in zip(fields, position):
+                if value is None and not field.null:
+                    raise ValidationError("Valeur nulle")
+                values.append(field.to_python(value))
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_position_filter(self, columns, position):
+        # (a, b) > (x, y) <=> a > x OR (a = x AND b > y),
+        # les valeurs nulles étant placées avant toutes les autres
+        condition = Q()
+        for i, name in enumerate(columns):
+            equal = Q()
+            for previous_name, value in zip(columns[:i], position[:i]):
+                equal &= (
+                    Q(**{f"{previous_name}__isnull": True})
+                    if value is None
+                    else Q(**{previous_name: value})
+                )
+            greater = (
+                Q(**{f"{name}__isnull": False})
+                if position[i] is None
+                else Q(**{f"{name}__gt": position[i]})
+            )
+            condition |= equal & greater
+        return condition
+
+    def encode_cursor(self, ordering, values):
+        payload = {
+            "o": ordering,
+            "p": [_encode_cursor_value(value) for value in values],
+        }
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            ordering = request.query_params.get(self.cursor_ordering_query_param, "pk")
+            if ordering not in self.cursor_orderings:
+                raise NotFound(self.invalid_cursor_message)
+            return ordering, None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            ordering, position = payload["o"], payload["p"]
+            if not isinstance(position, list) or len(position) != len(
+                self.cursor_orderings[ordering]
+            ):
+                raise ValueError("Position invalide")
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        return ordering, position
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+        )
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["next"]["description"] = (
+            "Avec `?cursor=`, URL de la page suivante (parcours par curseur, "
+            "sans `count` ni `previous`)"
+        )
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": (
+                    "Parcours par curseur : vide pour la première page, "
+                    "puis la valeur fournie dans l'URL `next`"
+                ),
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.cursor_ordering_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Ordre du parcours par curseur",
+                "schema": {"type": "string", "enum": list(self.cursor_orderings)},
+            },
+        ]
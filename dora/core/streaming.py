@@ -0,0 +1,59 @@
+"""Listes non paginées renvoyées en flux.
+
+Sans `page_size`, `OptionalPageNumberPagination` renvoie l'intégralité du
+queryset. Plutôt que de charger et sérialiser toute la liste en mémoire avant
+de la rendre, `StreamingListMixin` la parcourt par lots (`iterator()`, avec
+préchargement des relations lot par lot) et émet le tableau JSON au fur et à
+mesure : la mémoire consommée ne dépend plus de la taille de la table.
+
+Le JSON est compact, sauf si le client demande une indentation
+(`Accept: application/json; indent=4`).
+"""
+
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+
+class StreamingListMixin:
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        if not self.can_stream_list(request):
+            serializer = self.get_serializer(queryset, many=True)
+            return Response(serializer.data)
+
+        renderer = request.accepted_renderer
+        return StreamingHttpResponse(
+            self.stream_list(queryset, renderer, request.accepted_media_type),
+            content_type=renderer.media_type,
+        )
+
+    def can_stream_list(self, request):
+        return settings.STREAMING_LIST_RESPONSES and isinstance(
+            getattr(request, "accepted_renderer", None), JSONRenderer
+        )
+
+    def stream_list(self, queryset, renderer, media_type):
+        indent = renderer.get_indent(media_type, {})
+        separator = b",\n" if indent else b","
+        renderer_context = {**self.get_renderer_context(), "indent": indent}
+
+        objects = queryset.iterator(chunk_size=settings.STREAMING_LIST_CHUNK_SIZE)
+        yield b"["
+        first = True
+        while chunk := list(islice(objects, settings.STREAMING_LIST_CHUNK_SIZE)):
+            for data in self.get_serializer(chunk, many=True).data:
+                if not first:
+                    yield separator
+                first = False
+                yield renderer.render(data, media_type, renderer_context)
+        yield b"]"
@@ -0,0 +1,82 @@
+import pytest
+from django.core.cache import cache
+
+from dora.core.enum_registry import _version_key, enum_table
+from dora.services.models import ServiceCategory, ServiceSubCategory
+
+
+@pytest.fixture(autouse=True)
+def local_cache(settings):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    settings.ENUM_REGISTRY_CHECK_SECONDS = 60
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_lookups_do_not_query_the_database(django_assert_num_queries):
+    with django_assert_num_queries(1):
+        categories = enum_table(ServiceCategory)
+
+    with django_assert_num_queries(0):
+        category = enum_table(ServiceCategory).get("numerique")
+        assert category.label == enum_table(ServiceCategory).label("numerique")
+        assert enum_table(ServiceCategory).filter(["numerique", "inconnue"]) == [
+            category
+        ]
+        assert enum_table(ServiceCategory).get("inconnue") is None
+
+    assert categories.all() == list(ServiceCategory.objects.order_by("pk"))
+    assert categories.ordered_by_label() == list(
+        ServiceCategory.objects.order_by("label")
+    )
+
+
+def test_startswith():
+    subcategories = enum_table(ServiceSubCategory).startswith("numerique--")
+    assert subcategories
+    assert set(subcategories) == set(
+        ServiceSubCategory.objects.filter(value__startswith="numerique--")
+    )
+
+
+def test_saving_a_row_invalidates_the_table(django_capture_on_commit_callbacks):
+    assert enum_table(ServiceCategory).get("nouvelle") is None
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ServiceCategory.objects.create(value="nouvelle", label="Nouvelle")
+    assert enum_table(ServiceCategory).label("nouvelle") == "Nouvelle"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ServiceCategory.objects.filter(value="nouvelle").first().delete()
+    assert enum_table(ServiceCategory).get("nouvelle") is None
+
+
+def test_table_is_invalidated_on_commit(django_capture_on_commit_callbacks):
+    version = cache.get(_version_key(ServiceCategory))
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        ServiceCategory.objects.create(value="nouvelle", label="Nouvelle")
+        # tant que la transaction n'est pas validée, la version ne change pas
+        assert cache.get(_version_key(ServiceCategory)) == version
+
+    for callback in callbacks:
+        callback()
+    assert cache.get(_version_key(ServiceCategory)) != version
+
+
+def test_tables_are_reloaded_when_their_version_changes(
+    settings, django_assert_num_queries
+):
+    settings.ENUM_REGISTRY_CHECK_SECONDS = 0
+    enum_table(ServiceCategory)
+
+    with django_assert_num_queries(0):
+        enum_table(ServiceCategory)
+
+    # modification par un autre process
+    cache.set(_version_key(ServiceCategory), "autre-version")
+    with django_assert_num_queries(1):
+        enum_table(ServiceCategory)
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+from model_bakery import baker
+from rest_framework.utils.encoders import JSONEncoder
+
+from dora.core.test_utils import make_published_service, make_structure
+
+
+@pytest.fixture
+def streaming(settings):
+    settings.STREAMING_LIST_RESPONSES = True
+    settings.STREAMING_LIST_CHUNK_SIZE = 2
+
+
+@pytest.fixture
+def di_client(api_client, settings):
+    user = baker.make("users.User", is_valid=True, email=settings.DATA_INCLUSION_EMAIL)
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+def streamed_content(response):
+    assert response.streaming
+    return b"".join(response.streaming_content)
+
+
+def test_unpaginated_list_is_streamed(di_client, settings, streaming):
+    for _ in range(5):
+        make_published_service()
+
+    settings.STREAMING_LIST_RESPONSES = False
+    expected = di_client.get("/api/v2/services/").data
+    settings.STREAMING_LIST_RESPONSES = True
+    response = di_client.get("/api/v2/services/")
+
+    assert 200 == response.status_code
+    assert response["Content-Type"] == "application/json"
+    content = streamed_content(response)
+    assert b"\n" not in content
+    assert json.loads(content) == json.loads(json.dumps(expected, cls=JSONEncoder))
+
+
+def test_empty_list_is_streamed(di_client, streaming):
+    response = di_client.get("/api/v2/structures/")
+
+    assert [] == json.loads(streamed_content(response))
+
+
+def test_streamed_list_can_be_indented(di_client, streaming):
+    make_published_service()
+    make_published_service()
+
+    response = di_client.get(
+        "/api/v2/services/", HTTP_ACCEPT="application/json; indent=2"
+    )
+
+    content = streamed_content(response)
+    assert b'\n  "id"' in content
+    assert 2 == len(json.loads(content))
+
+
+def test_streamed_list_is_camelized(api_client, streaming):
+    structure = make_structure()
+    api_client.force_authenticate(
+        user=baker.make("users.User", is_valid=True, is_staff=True)
+    )
+
+    response = api_client.get("/structures-admin/")
+
+    [data] = json.loads(streamed_content(response))
+    assert data["slug"] == structure.slug
+    assert "moderationStatus" in data
+
+
+def test_paginated_list_is_not_streamed(di_client, streaming):
+    make_published_service()
+
+    response = di_client.get("/api/v2/services/", {"page_size": 10})
+
+    assert not response.streaming
+    assert 1 == response.data["count"]
@@ -1,9 +1,19 @@
-from dora.data_inclusion.client import DataInclusionClient, di_client_factory
+from dora.data_inclusion.cache import CachedDataInclusionClient, get_cache_stats
+from dora.data_inclusion.client import (
+    DataInclusionClient,
+    di_client_factory,
+    get_shared_di_client,
+    retrieve_services,
+)
 from dora.data_inclusion.mappings import map_search_result, map_service
 
 __all__ = [
+    "CachedDataInclusionClient",
     "di_client_factory",
     "DataInclusionClient",
+    "get_cache_stats",
+    "get_shared_di_client",
     "map_search_result",
     "map_service",
+    "retrieve_services",
 ]
@@ -0,0 +1,193 @@
+"""Cache des appels à l'API data·inclusion.
+
+Les services d·i ne changent que quelques fois par jour : les résultats de
+``search_services`` et ``retrieve_service`` sont conservés dans le cache Django
+(Redis), sous une clé calculée à partir des paramètres normalisés de l'appel.
+
+Une entrée est fraîche pendant ``DATA_INCLUSION_CACHE_TTL_SECONDS``. Elle reste
+ensuite servie pendant ``DATA_INCLUSION_CACHE_STALE_TTL_SECONDS``, le temps
+qu'un thread la rafraîchisse en arrière-plan (*stale-while-revalidate*).
+Les services introuvables (404) sont eux aussi mis en cache, pendant
+``DATA_INCLUSION_CACHE_NEGATIVE_TTL_SECONDS``. Les erreurs et les délais dépassés
+ne le sont jamais.
+
+Les compteurs de hits / misses sont lisibles via ``get_cache_stats`` (et la
+commande ``data_inclusion_cache_stats``).
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import requests
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "di-cache:v1"
+CACHED_OPERATIONS = ("search_services", "retrieve_service")
+CACHE_OUTCOMES = ("hit", "stale", "miss")
+
+# délai au-delà duquel un rafraîchissement en cours est considéré comme perdu
+REFRESH_LOCK_SECONDS = 60
+
+_NOT_FOUND = "not-found"
+
+
+@functools.cache
+def _get_refresh_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="di-cache-refresh")
+
+
+def _stats_key(operation: str, outcome: str) -> str:
+    return f"{CACHE_KEY_PREFIX}:stats:{operation}:{outcome}"
+
+
+def _incr_stat(operation: str, outcome: str):
+    key = _stats_key(operation, outcome)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # la clé a expiré ou été supprimée entre-temps
+        pass
+
+
+def get_cache_stats() -> dict[str, dict[str, int]]:
+    keys = {
+        (operation, outcome): _stats_key(operation, outcome)
+        for operation in CACHED_OPERATIONS
+        for outcome in CACHE_OUTCOMES
+    }
+    values = cache.get_many(keys.values())
+    return {
+        operation: {
+            outcome: values.get(keys[(operation, outcome)], 0)
+            for outcome in CACHE_OUTCOMES
+        }
+        for operation in CACHED_OPERATIONS
+    }
+
+
+def _normalize(value):
+    if isinstance(value, (list, tuple, set)):
+        return sorted({str(v) for v in value})
+    if isinstance(value, float):
+        # ~1 m : des coordonnées quasi identiques partagent la même entrée
+        return round(value, 5)
+    return value
+
+
+class CachedDataInclusionClient:
+    """Caching wrapper around a ``DataInclusionClient``.
+
+    It exposes the same interface: ``search_services`` and ``retrieve_service``
+    are served from the cache, every other attribute is delegated to the
+    wrapped client.
+    """
+
+    def __init__(
+        self,
+        client,
+        ttl_seconds: int,
+        stale_ttl_seconds: int = 0,
+        negative_ttl_seconds: int = 0,
+    ) -> None:
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.stale_ttl_seconds = stale_ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _key(self, operation: str, params: dict) -> str:
+        normalized = {k: _normalize(v) for k, v in params.items() if v is not None}
+        digest = hashlib.md5(
+            json.dumps(normalized, sort_keys=True).encode(), usedforsecurity=False
+        ).hexdigest()
+        return f"{CACHE_KEY_PREFIX}:{operation}:{digest}"
+
+    def _store(self, key: str, value, ttl_seconds: int):
+        cache.set(
+            key,
+            (value, time.time() + ttl_seconds),
+            timeout=ttl_seconds + self.stale_ttl_seconds,
+        )
+
+    def _fetch_search_services(self, key: str, params: dict) -> Optional[list[dict]]:
+        results = self.client.search_services(**params)
+        # `None` : erreur ou délai dépassé, à ne pas mettre en cache
+        if results is not None:
+            self._store(key, results, self.ttl_seconds)
+        return results
+
+    def _fetch_retrieve_service(self, key: str, params: dict) -> Optional[dict]:
+        try:
+            service = self.client.retrieve_service(**params)
+        except requests.HTTPError as err:
+            if err.response is None or err.response.status_code != 404:
+                raise
+            if self.negative_ttl_seconds:
+                self._store(key, _NOT_FOUND, self.negative_ttl_seconds)
+            return None
+        if service is not None:
+            self._store(key, service, self.ttl_seconds)
+        return service
+
+    def _refresh(self, operation: str, key: str, params: dict):
+        try:
+            getattr(self, f"_fetch_{operation}")(key, params)
+        except Exception:
+            logger.exception("Échec du rafraîchissement du cache d·i (%s)", operation)
+        finally:
+            cache.delete(f"{key}:refresh")
+
+    def _get(self, operation: str, params: dict):
+        key = self._key(operation, params)
+        entry = cache.get(key)
+
+        if entry is None:
+            _incr_stat(operation, "miss")
+            return getattr(self, f"_fetch_{operation}")(key, params)
+
+        value, fresh_until = entry
+        if time.time() < fresh_until:
+            _incr_stat(operation, "hit")
+        else:
+            _incr_stat(operation, "stale")
+            # un seul rafraîchissement à la fois, tous workers confondus
+            if cache.add(f"{key}:refresh", True, timeout=REFRESH_LOCK_SECONDS):
+                _get_refresh_executor().submit(self._refresh, operation, key, params)
+
+        return None if value == _NOT_FOUND else value
+
+    def search_services(
+        self,
+        sources: Optional[list[str]] = None,
+        code_insee: Optional[str] = None,
+        thematiques: Optional[list[str]] = None,
+        types: Optional[list[str]] = None,
+        frais: Optional[list[str]] = None,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+    ) -> Optional[list[dict]]:
+        return self._get(
+            "search_services",
+            {
+                "sources": sources,
+                "code_insee": code_insee,
+                "thematiques": thematiques,
+                "types": types,
+                "frais": frais,
+                "lat": lat,
+                "lon": lon,
+            },
+        )
+
+    def retrieve_service(self, source: str, id: str) -> Optional[dict]:
+        return self._get("retrieve_service", {"source": source, "id": id})
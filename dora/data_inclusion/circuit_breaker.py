@@ -0,0 +1,90 @@
+"""Disjoncteur des appels à l'API data·inclusion.
+
+Après ``failure_threshold`` échecs consécutifs (erreur de connexion, délai
+dépassé ou erreur 5xx), le disjoncteur s'ouvre : les appels suivants échouent
+immédiatement avec ``CircuitOpenError``, sans solliciter d·i. Passé
+``recovery_seconds``, il laisse passer une requête de test (état semi-ouvert) :
+si elle réussit, il se referme, sinon il se rouvre pour la même durée.
+
+L'état est propre à chaque processus.
+"""
+
+import enum
+import logging
+import threading
+import time
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of calling d·i while the circuit is open.
+
+    It subclasses ``requests.ConnectionError``, so callers already falling back
+    to DORA-only results on connection errors handle it the same way.
+    """
+
+
+class CircuitState(enum.Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, recovery_seconds: float = 30):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._state
+
+    def before_request(self):
+        """Raise ``CircuitOpenError`` if the request must not be sent."""
+        with self._lock:
+            if self._state == CircuitState.CLOSED:
+                return
+            if (
+                self._state == CircuitState.OPEN
+                and time.monotonic() - self._opened_at >= self.recovery_seconds
+            ):
+                self._state = CircuitState.HALF_OPEN
+                self._probing = False
+            if self._state == CircuitState.HALF_OPEN and not self._probing:
+                # une seule requête de test à la fois
+                self._probing = True
+                return
+        raise CircuitOpenError("Disjoncteur data·inclusion ouvert")
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CircuitState.CLOSED:
+                logger.info("Disjoncteur data·inclusion refermé")
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if (
+                self._state == CircuitState.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                if self._state != CircuitState.OPEN:
+                    logger.warning(
+                        "Disjoncteur data·inclusion ouvert après %s échec(s)",
+                        self._failures,
+                    )
+                self._state = CircuitState.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
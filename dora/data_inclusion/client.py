@@ -1,5 +1,9 @@
 import functools
 import logging
+import math
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from typing import Optional
 
@@ -7,6 +11,9 @@ import furl
 import requests
 from django.conf import settings
 
+from dora.data_inclusion.cache import CachedDataInclusionClient
+from dora.data_inclusion.circuit_breaker import CircuitBreaker, CircuitOpenError
+
 logger = logging.getLogger(__name__)
 
 
@@ -14,18 +21,81 @@ def log_and_raise(resp: requests.Response, *args, **kwargs):
     try:
         resp.raise_for_status()
     except requests.HTTPError as err:
-        logger.error(resp.json())
+        try:
+            logger.error(resp.json())
+        except requests.JSONDecodeError:
+            # ex. : page HTML d'un proxy en cas de 502
+            logger.error(resp.text)
         raise err
 
 
+@functools.cache
+def _get_circuit_breaker() -> CircuitBreaker:
+    # partagé par tous les clients du processus
+    return CircuitBreaker(
+        failure_threshold=settings.DATA_INCLUSION_CIRCUIT_FAILURE_THRESHOLD,
+        recovery_seconds=settings.DATA_INCLUSION_CIRCUIT_RECOVERY_SECONDS,
+    )
+
+
 def di_client_factory():
-    return DataInclusionClient(
+    client = DataInclusionClient(
         base_url=settings.DATA_INCLUSION_URL,
         token=settings.DATA_INCLUSION_STREAM_API_KEY,
         timeout_seconds=settings.DATA_INCLUSION_TIMEOUT_SECONDS,
+        page_size=settings.DATA_INCLUSION_PAGE_SIZE,
+        max_concurrent_pages=settings.DATA_INCLUSION_MAX_CONCURRENT_PAGES,
+        search_budget_seconds=settings.DATA_INCLUSION_SEARCH_DEADLINE_SECONDS,
+        circuit_breaker=_get_circuit_breaker(),
+    )
+    if settings.DATA_INCLUSION_CACHE_ENABLED:
+        client = CachedDataInclusionClient(
+            client,
+            ttl_seconds=settings.DATA_INCLUSION_CACHE_TTL_SECONDS,
+            stale_ttl_seconds=settings.DATA_INCLUSION_CACHE_STALE_TTL_SECONDS,
+            negative_ttl_seconds=settings.DATA_INCLUSION_CACHE_NEGATIVE_TTL_SECONDS,
+        )
+    return client
+
+
+@functools.cache
+def get_shared_di_client():
+    # Client partagé par tout le processus, pour réutiliser les connexions
+    # de sa session HTTP
+    return di_client_factory()
+
+
+@functools.cache
+def _get_lookup_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=settings.DATA_INCLUSION_MAX_CONCURRENT_LOOKUPS,
+        thread_name_prefix="di-lookups",
     )
 
 
+def retrieve_services(di_client, di_ids: list[str]) -> dict[str, Optional[dict]]:
+    """Retrieve several d·i services concurrently.
+
+    ``di_ids`` are ``<source>--<id>`` identifiers, as stored in bookmarks.
+
+    Returns:
+        The services by identifier; ``None`` for services that are not found,
+        or could not be retrieved.
+    """
+
+    def retrieve(di_id):
+        source, _, id = di_id.partition("--")
+        try:
+            return di_client.retrieve_service(source=source, id=id)
+        except requests.RequestException:
+            return None
+
+    di_ids = list(dict.fromkeys(di_ids))
+    if len(di_ids) <= 1:
+        return {di_id: retrieve(di_id) for di_id in di_ids}
+    return dict(zip(di_ids, _get_lookup_executor().map(retrieve, di_ids)))
+
+
 # TODO: use tenacity ?
 
 
@@ -34,6 +104,8 @@ def log_conn_error(func):
     def _func(*args, **kwargs):
         try:
             return func(*args, **kwargs)
+        except CircuitOpenError:
+            raise
         except requests.ConnectionError as err:
             logger.error(err)
             raise err
@@ -43,7 +115,14 @@ def log_conn_error(func):
 
 class DataInclusionClient:
     def __init__(
-        self, base_url: str, token: str, timeout_seconds: Optional[int] = None
+        self,
+        base_url: str,
+        token: str,
+        timeout_seconds: Optional[int] = None,
+        page_size: Optional[int] = None,
+        max_concurrent_pages: int = 4,
+        search_budget_seconds: Optional[float] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
     ) -> None:
         self.base_url = furl.furl(base_url)
         self.session = requests.Session()
@@ -54,53 +133,126 @@ class DataInclusionClient:
             if timeout_seconds is not None
             else timedelta(seconds=2)
         )
+        self.page_size = page_size
+        self.max_concurrent_pages = max_concurrent_pages
+        self.search_budget_seconds = search_budget_seconds
+        self.circuit_breaker = circuit_breaker
+
+    def _request_timeout(self, deadline: Optional[float] = None) -> float:
+        timeout = self.timeout_timedelta.total_seconds()
+        if deadline is None:
+            return timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.ReadTimeout("Budget de temps data·inclusion épuisé")
+        return min(timeout, remaining)
+
+    def _get(self, url: furl.furl, timeout: Optional[float] = None):
+        if timeout is None:
+            timeout = self._request_timeout()
+        if self.circuit_breaker is None:
+            return self.session.get(url, timeout=timeout)
+
+        self.circuit_breaker.before_request()
+        try:
+            response = self.session.get(url, timeout=timeout)
+        except requests.HTTPError as err:
+            if err.response is not None and err.response.status_code >= 500:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+            raise
+        except Exception:
+            # erreurs de connexion, délais dépassés, mais aussi réponses
+            # tronquées, redirections en boucle… : toute issue doit être
+            # enregistrée, sinon une requête de test resterait en cours
+            self.circuit_breaker.record_failure()
+            raise
+        self.circuit_breaker.record_success()
+        return response
+
+    def _get_page(
+        self, url: furl.furl, page: int, deadline: Optional[float] = None
+    ) -> dict:
+        page_url = url.copy().add({"page": page})
+        if self.page_size is not None:
+            page_url.add({"size": self.page_size})
+        return self._get(page_url, timeout=self._request_timeout(deadline)).json()
 
-    def _get(self, url: furl.furl):
-        return self.session.get(url, timeout=self.timeout_timedelta.total_seconds())
+    @staticmethod
+    def _get_page_count(response_data: dict) -> Optional[int]:
+        if response_data.get("pages") is not None:
+            return response_data["pages"]
+        total, size = response_data.get("total"), response_data.get("size")
+        if total is not None and size:
+            return math.ceil(total / size)
+        return None
 
-    def _get_pages(self, url: furl.furl):
-        page = 1
-        data = []
+    def _iter_pages(
+        self, url: furl.furl, budget_seconds: Optional[float] = None
+    ) -> Iterator[dict]:
+        """Yield the items of every page of a paginated endpoint.
 
-        while True:
-            next_url = url.copy().add({"page": page})
-            response = self._get(next_url)
-            response_data = response.json()
-            data += response_data["items"]
+        Once the first page tells how many pages there are, the following ones
+        are fetched concurrently (and yielded in order). Otherwise, pages are
+        fetched one after the other, until a page is smaller than the page size.
+        In both cases, no request is made past the last non-empty page.
 
-            if len(response_data["items"]) > 0:
+        If ``budget_seconds`` is given, requests are cut short so that all the
+        pages are fetched within this time, or ``requests.ReadTimeout`` is raised.
+        """
+        deadline = (
+            time.monotonic() + budget_seconds if budget_seconds is not None else None
+        )
+        first_page = self._get_page(url, 1, deadline)
+        yield from first_page["items"]
+
+        page_count = self._get_page_count(first_page)
+        if page_count is None:
+            page_size = self.page_size or len(first_page["items"])
+            page, items = 1, first_page["items"]
+            while items and len(items) >= page_size:
                 page += 1
-            else:
-                return data
+                items = self._get_page(url, page, deadline)["items"]
+                yield from items
+            return
 
-    @log_conn_error
-    def list_services(self, source: Optional[str] = None) -> Optional[list[dict]]:
+        if page_count <= 1:
+            return
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_concurrent_pages, page_count - 1),
+            thread_name_prefix="di-pages",
+        )
+        try:
+            yield from (
+                item
+                for response_data in executor.map(
+                    functools.partial(self._get_page, url, deadline=deadline),
+                    range(2, page_count + 1),
+                )
+                for item in response_data["items"]
+            )
+        finally:
+            # si l'appelant s'arrête en cours de route, les pages restantes
+            # ne sont pas récupérées
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_pages(
+        self, url: furl.furl, budget_seconds: Optional[float] = None
+    ) -> list[dict]:
+        return list(self._iter_pages(url, budget_seconds))
+
+    def _list_services_url(self, source: Optional[str] = None) -> furl.furl:
         url = self.base_url.copy()
         url = url / "services"
 
         if source is not None:
             url.args["source"] = source
 
-        try:
-            return self._get_pages(url)
-        except requests.HTTPError:
-            return None
+        return url
 
-    @log_conn_error
-    def retrieve_service(self, source: str, id: str) -> Optional[dict]:
-        url = self.base_url.copy()
-        url = url / "services" / source / id
-        response = self._get(url)
-
-        try:
-            return response.json()
-        except requests.HTTPError:
-            return None
-        except requests.ReadTimeout:
-            return None
-
-    @log_conn_error
-    def search_services(
+    def _search_services_url(
         self,
         sources: Optional[list[str]] = None,
         code_insee: Optional[str] = None,
@@ -109,7 +261,7 @@ class DataInclusionClient:
         frais: Optional[list[str]] = None,
         lat: Optional[float] = None,
         lon: Optional[float] = None,
-    ) -> Optional[list[dict]]:
+    ) -> furl.furl:
         url = self.base_url.copy()
         url = url / "search/services"
 
@@ -133,9 +285,65 @@ class DataInclusionClient:
         if lon is not None:
             url.args["lon"] = lon
 
+        return url
+
+    @log_conn_error
+    def list_services(self, source: Optional[str] = None) -> Optional[list[dict]]:
         try:
-            return self._get_pages(url)
+            return self._get_pages(self._list_services_url(source))
+        except requests.HTTPError:
+            return None
+
+    def iter_services(self, source: Optional[str] = None) -> Iterator[dict]:
+        """Stream the services listed by ``list_services``.
+
+        Unlike ``list_services``, upstream errors are raised while iterating.
+        """
+        return self._iter_pages(self._list_services_url(source))
+
+    @log_conn_error
+    def retrieve_service(self, source: str, id: str) -> Optional[dict]:
+        url = self.base_url.copy()
+        url = url / "services" / source / id
+        response = self._get(url)
+
+        try:
+            return response.json()
+        except requests.HTTPError:
+            return None
+        except requests.ReadTimeout:
+            return None
+
+    @log_conn_error
+    def search_services(
+        self,
+        sources: Optional[list[str]] = None,
+        code_insee: Optional[str] = None,
+        thematiques: Optional[list[str]] = None,
+        types: Optional[list[str]] = None,
+        frais: Optional[list[str]] = None,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+    ) -> Optional[list[dict]]:
+        url = self._search_services_url(
+            sources=sources,
+            code_insee=code_insee,
+            thematiques=thematiques,
+            types=types,
+            frais=frais,
+            lat=lat,
+            lon=lon,
+        )
+        try:
+            return self._get_pages(url, budget_seconds=self.search_budget_seconds)
         except requests.HTTPError:
             return None
         except requests.ReadTimeout:
             return None
+
+    def iter_search_services(self, **kwargs) -> Iterator[dict]:
+        """Stream the search results returned by ``search_services``.
+
+        It takes the same arguments as ``search_services``. Unlike ``search_services``, upstream errors are raised while iterating.
+        """
+        return self._iter_pages(self._search_services_url(**kwargs))
@@ -3,6 +3,7 @@ from django.conf import settings
 from django.utils import dateparse, timezone
 
 from dora.admin_express.models import AdminDivisionType
+from dora.core.enum_registry import enum_table
 from dora.core.utils import code_insee_to_code_dept
 from dora.services.enums import ServiceStatus
 from dora.services.models import (
@@ -93,22 +94,18 @@ def map_service(service_data: dict) -> dict:
     categories = None
     subcategories = None
     if service_data["thematiques"] is not None:
-        categories = ServiceCategory.objects.filter(
-            value__in=service_data["thematiques"]
-        )
-        subcategories = ServiceSubCategory.objects.filter(
-            value__in=service_data["thematiques"]
+        categories = enum_table(ServiceCategory).filter(service_data["thematiques"])
+        subcategories = enum_table(ServiceSubCategory).filter(
+            service_data["thematiques"]
         )
 
     location_kinds = None
     if service_data["modes_accueil"] is not None:
-        location_kinds = LocationKind.objects.filter(
-            value__in=service_data["modes_accueil"]
-        )
+        location_kinds = enum_table(LocationKind).filter(service_data["modes_accueil"])
 
     kinds = None
     if service_data["types"] is not None:
-        kinds = ServiceKind.objects.filter(value__in=service_data["types"])
+        kinds = enum_table(ServiceKind).filter(service_data["types"])
 
     zone_diffusion_type = DI_TO_DORA_DIFFUSION_ZONE_TYPE_MAPPING.get(
         service_data["zone_diffusion_type"], None
@@ -153,8 +150,8 @@ def map_service(service_data: dict) -> dict:
             mapping.get(mode, mode)
             for mode in service_data["modes_orientation_beneficiaire"]
         ]
-        beneficiaries_access_modes = BeneficiaryAccessMode.objects.filter(
-            value__in=mapped_modes
+        beneficiaries_access_modes = enum_table(BeneficiaryAccessMode).filter(
+            mapped_modes
         )
 
     coach_orientation_modes = None
@@ -169,9 +166,7 @@ def map_service(service_data: dict) -> dict:
             mapping.get(mode, mode)
             for mode in service_data["modes_orientation_accompagnateur"]
         ]
-        coach_orientation_modes = CoachOrientationMode.objects.filter(
-            value__in=mapped_modes
-        )
+        coach_orientation_modes = enum_table(CoachOrientationMode).filter(mapped_modes)
 
     profils = None
     if service_data["profils"] is not None:
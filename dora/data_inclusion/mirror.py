@@ -0,0 +1,132 @@
+"""Copie locale des services data·inclusion.
+
+La commande ``sync_data_inclusion_services`` recopie les services des sources
+``DATA_INCLUSION_STREAM_SOURCES`` dans la table ``DataInclusionService``, avec
+les mêmes colonnes de recherche que ``ServiceSearchDocument`` (thématiques,
+types, lieux de déroulement, géolocalisation, zone de diffusion). Quand
+``DATA_INCLUSION_SEARCH_MIRROR`` est activé, la recherche interroge cette table
+dans la même requête SQL que les services DORA, plutôt que l'API d·i.
+
+La synchronisation est incrémentale : seuls les services nouveaux ou modifiés
+(d'après l'empreinte de leurs données) sont écrits, et les services qui ne sont
+plus listés par d·i sont supprimés, une fois la liste complète récupérée.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import date
+from itertools import islice
+from typing import Optional
+
+from django.contrib.gis.geos import Point
+
+from dora.data_inclusion.mappings import DI_TO_DORA_DIFFUSION_ZONE_TYPE_MAPPING
+from dora.services.models import DataInclusionService
+
+logger = logging.getLogger(__name__)
+
+_UPDATED_FIELDS = [
+    "source",
+    "categories",
+    "subcategories",
+    "kinds",
+    "location_kinds",
+    "fees",
+    "geom",
+    "diffusion_zone_type",
+    "diffusion_zone_details",
+    "suspension_date",
+    "data",
+    "checksum",
+]
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _checksum(service_data: dict) -> str:
+    return hashlib.md5(
+        json.dumps(service_data, sort_keys=True).encode(), usedforsecurity=False
+    ).hexdigest()
+
+
+def make_mirrored_service(service_data: dict) -> DataInclusionService:
+    thematiques = service_data.get("thematiques") or []
+    longitude, latitude = service_data.get("longitude"), service_data.get("latitude")
+    return DataInclusionService(
+        slug=f"{service_data['source']}--{service_data['id']}",
+        source=service_data["source"],
+        # les thématiques d·i sont des catégories ou des sous-catégories DORA
+        categories=sorted({t.split("--")[0] for t in thematiques}),
+        subcategories=sorted(t for t in thematiques if "--" in t),
+        kinds=sorted(service_data.get("types") or []),
+        location_kinds=sorted(service_data.get("modes_accueil") or []),
+        fees=sorted(service_data.get("frais") or []),
+        geom=(
+            Point(longitude, latitude, srid=4326)
+            if longitude is not None and latitude is not None
+            else None
+        ),
+        diffusion_zone_type=DI_TO_DORA_DIFFUSION_ZONE_TYPE_MAPPING.get(
+            service_data.get("zone_diffusion_type"), ""
+        ),
+        diffusion_zone_details=service_data.get("zone_diffusion_code") or "",
+        suspension_date=(
+            date.fromisoformat(service_data["date_suspension"])
+            if service_data.get("date_suspension")
+            else None
+        ),
+        data=service_data,
+        checksum=_checksum(service_data),
+    )
+
+
+def sync_data_inclusion_services(
+    di_client, sources: Optional[list[str]] = None, batch_size: int = 500
+) -> dict[str, int]:
+    """Synchronize the local copy of the services of the given d·i ``sources``.
+
+    All sources are synchronized when ``sources`` is ``None``.
+
+    Returns:
+        The number of created, updated, unchanged and deleted services.
+    """
+    counts = {"created": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+
+    for source in sources if sources is not None else [None]:
+        mirrored = DataInclusionService.objects.all()
+        if source is not None:
+            mirrored = mirrored.filter(source=source)
+        checksums = dict(mirrored.values_list("slug", "checksum"))
+        seen = set()
+
+        for batch in _batches(di_client.iter_services(source=source), batch_size):
+            to_create, to_update = [], []
+            for service_data in batch:
+                service = make_mirrored_service(service_data)
+                if service.slug in seen:
+                    continue
+                seen.add(service.slug)
+                if service.slug not in checksums:
+                    to_create.append(service)
+                elif checksums[service.slug] != service.checksum:
+                    to_update.append(service)
+                else:
+                    counts["unchanged"] += 1
+            DataInclusionService.objects.bulk_create(to_create)
+            DataInclusionService.objects.bulk_update(to_update, _UPDATED_FIELDS)
+            counts["created"] += len(to_create)
+            counts["updated"] += len(to_update)
+
+        # la liste est complète (une erreur d·i interrompt l'itération) :
+        # les services qui n'y figurent plus ont été supprimés
+        deleted, _ = mirrored.filter(slug__in=list(checksums.keys() - seen)).delete()
+        counts["deleted"] += deleted
+
+        logger.info("Services d·i synchronisés (source : %s) : %s", source, counts)
+
+    return counts
@@ -1,3 +1,4 @@
+from collections.abc import Iterator
 from typing import Optional
 from uuid import uuid4
 
@@ -75,6 +76,9 @@ class FakeDataInclusionClient:
     def list_services(self, source: Optional[str] = None) -> Optional[list[dict]]:
         raise NotImplementedError()
 
+    def iter_services(self, source: Optional[str] = None) -> Iterator[dict]:
+        return (s for s in self.services if source is None or s["source"] == source)
+
     def retrieve_service(self, source: str, id: str) -> Optional[dict]:
         return next(
             (s for s in self.services if s["source"] == source and s["id"] == id), None
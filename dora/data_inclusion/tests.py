@@ -1,9 +1,20 @@
+import time
 import unittest
+from unittest import mock
 
+import requests
 from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
 from rest_framework.test import APITestCase
 
 from dora import data_inclusion
+from dora.data_inclusion.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+)
+from dora.data_inclusion.test_utils import FakeDataInclusionClient, make_di_service_data
 
 
 class DataInclusionIntegrationTestCase(APITestCase):
@@ -41,3 +52,215 @@ class DataInclusionIntegrationTestCase(APITestCase):
             source="dora",
             id=services[0]["id"],
         )
+
+
+class FakePagesClient(data_inclusion.DataInclusionClient):
+    """Serves `items` through `_get`, like the paginated d·i endpoints."""
+
+    def __init__(self, items, page_size, with_total=True):
+        super().__init__(base_url="https://di.test/api/v0", token="token")
+        self.items = items
+        self.page_size = page_size
+        self.with_total = with_total
+        self.requested_pages = []
+
+    def _get(self, url, timeout=None):
+        page = int(url.args["page"])
+        size = int(url.args["size"])
+        self.requested_pages.append(page)
+        response_data = {"items": self.items[(page - 1) * size : page * size]}
+        if self.with_total:
+            response_data.update({"total": len(self.items), "size": size})
+        return mock.Mock(json=mock.Mock(return_value=response_data))
+
+
+class DataInclusionPagesTestCase(APITestCase):
+    def test_fetch_all_pages_when_total_is_known(self):
+        client = FakePagesClient(items=list(range(25)), page_size=10)
+
+        self.assertEqual(client.list_services(), list(range(25)))
+        self.assertEqual(sorted(client.requested_pages), [1, 2, 3])
+
+    def test_stop_on_last_page_when_total_is_unknown(self):
+        client = FakePagesClient(items=list(range(25)), page_size=10, with_total=False)
+
+        self.assertEqual(client.list_services(), list(range(25)))
+        # pas de requête supplémentaire pour une page vide
+        self.assertEqual(client.requested_pages, [1, 2, 3])
+
+    def test_single_page(self):
+        client = FakePagesClient(items=list(range(5)), page_size=10)
+
+        self.assertEqual(client.list_services(), list(range(5)))
+        self.assertEqual(client.requested_pages, [1])
+
+    def test_iter_services(self):
+        client = FakePagesClient(items=list(range(25)), page_size=10)
+
+        services = client.iter_services()
+        self.assertEqual(next(services), 0)
+        self.assertEqual(client.requested_pages, [1])
+
+
+class NotFoundClient(FakeDataInclusionClient):
+    def retrieve_service(self, source, id):
+        response = requests.Response()
+        response.status_code = 404
+        raise requests.HTTPError(response=response)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class CachedDataInclusionClientTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.service = make_di_service_data()
+        self.client_ = FakeDataInclusionClient(services=[self.service])
+        self.client_.search_services = mock.Mock(wraps=self.client_.search_services)
+        self.cached_client = data_inclusion.CachedDataInclusionClient(
+            self.client_, ttl_seconds=60, stale_ttl_seconds=60, negative_ttl_seconds=60
+        )
+
+    def test_search_is_cached_on_normalized_params(self):
+        results = self.cached_client.search_services(
+            code_insee="12345", thematiques=["a", "b"]
+        )
+        self.assertEqual(
+            self.cached_client.search_services(
+                thematiques=["b", "a", "a"], code_insee="12345"
+            ),
+            results,
+        )
+        self.assertEqual(self.client_.search_services.call_count, 1)
+
+        self.cached_client.search_services(code_insee="54321", thematiques=["a", "b"])
+        self.assertEqual(self.client_.search_services.call_count, 2)
+
+        stats = data_inclusion.get_cache_stats()["search_services"]
+        self.assertEqual(stats, {"hit": 1, "stale": 0, "miss": 2})
+
+    def test_errors_are_not_cached(self):
+        self.client_.search_services = mock.Mock(return_value=None)
+
+        self.assertIsNone(self.cached_client.search_services(code_insee="12345"))
+        self.assertIsNone(self.cached_client.search_services(code_insee="12345"))
+        self.assertEqual(self.client_.search_services.call_count, 2)
+
+    def test_stale_entry_is_served_and_refreshed(self):
+        # entrées périmées dès leur écriture, mais servies pendant 60 secondes
+        self.cached_client.ttl_seconds = 0
+        self.cached_client.search_services(code_insee="12345")
+
+        with mock.patch(
+            "dora.data_inclusion.cache._get_refresh_executor"
+        ) as get_executor:
+            self.assertIsNotNone(self.cached_client.search_services(code_insee="12345"))
+            self.cached_client.search_services(code_insee="12345")
+
+        # un seul rafraîchissement programmé pour les deux lectures périmées
+        get_executor.return_value.submit.assert_called_once()
+        stats = data_inclusion.get_cache_stats()["search_services"]
+        self.assertEqual(stats, {"hit": 0, "stale": 2, "miss": 1})
+
+    def test_not_found_is_cached(self):
+        client = NotFoundClient()
+        client.retrieve_service = mock.Mock(wraps=client.retrieve_service)
+        cached_client = data_inclusion.CachedDataInclusionClient(
+            client, ttl_seconds=60, negative_ttl_seconds=60
+        )
+
+        self.assertIsNone(cached_client.retrieve_service(source="dora", id="1"))
+        self.assertIsNone(cached_client.retrieve_service(source="dora", id="1"))
+        self.assertEqual(client.retrieve_service.call_count, 1)
+
+
+class CircuitBreakerTestCase(APITestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=2, recovery_seconds=30)
+        self.client_ = data_inclusion.DataInclusionClient(
+            base_url="https://di.test/api/v0",
+            token="token",
+            circuit_breaker=self.breaker,
+        )
+        self.client_.session.get = mock.Mock(
+            side_effect=requests.ReadTimeout("timeout")
+        )
+
+    def test_circuit_opens_after_repeated_failures(self):
+        for _ in range(2):
+            self.assertIsNone(self.client_.search_services(code_insee="12345"))
+        self.assertEqual(self.breaker.state, CircuitState.OPEN)
+
+        with self.assertRaises(CircuitOpenError):
+            self.client_.search_services(code_insee="12345")
+        # d·i n'est plus sollicité
+        self.assertEqual(self.client_.session.get.call_count, 2)
+
+    def test_circuit_half_opens_with_a_single_probe(self):
+        for _ in range(2):
+            self.client_.search_services(code_insee="12345")
+
+        with mock.patch(
+            "dora.data_inclusion.circuit_breaker.time.monotonic",
+            return_value=time.monotonic() + 60,
+        ):
+            self.breaker.before_request()
+            self.assertEqual(self.breaker.state, CircuitState.HALF_OPEN)
+            # la requête de test est en cours : les autres sont refusées
+            with self.assertRaises(CircuitOpenError):
+                self.breaker.before_request()
+
+            self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitState.CLOSED)
+
+    def test_failed_probe_reopens_circuit(self):
+        for _ in range(2):
+            self.client_.search_services(code_insee="12345")
+
+        with mock.patch(
+            "dora.data_inclusion.circuit_breaker.time.monotonic",
+            return_value=time.monotonic() + 60,
+        ):
+            self.client_.search_services(code_insee="12345")
+            self.assertEqual(self.breaker.state, CircuitState.OPEN)
+        self.assertEqual(self.client_.session.get.call_count, 3)
+
+    def test_unexpected_probe_error_reopens_circuit(self):
+        for _ in range(2):
+            self.client_.search_services(code_insee="12345")
+        self.client_.session.get.side_effect = requests.exceptions.ChunkedEncodingError
+
+        later = time.monotonic() + 60
+        with mock.patch(
+            "dora.data_inclusion.circuit_breaker.time.monotonic", return_value=later
+        ):
+            with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+                self.client_.retrieve_service(source="dora", id="1")
+            self.assertEqual(self.breaker.state, CircuitState.OPEN)
+
+        # la requête de test n'est pas restée en cours : une nouvelle est
+        # autorisée après le délai de récupération
+        with mock.patch(
+            "dora.data_inclusion.circuit_breaker.time.monotonic",
+            return_value=later + 60,
+        ):
+            self.breaker.before_request()
+            self.assertEqual(self.breaker.state, CircuitState.HALF_OPEN)
+
+    def test_not_found_is_not_a_failure(self):
+        response = requests.Response()
+        response.status_code = 404
+        self.client_.session.get.side_effect = requests.HTTPError(response=response)
+
+        for _ in range(3):
+            with self.assertRaises(requests.HTTPError):
+                self.client_.retrieve_service(source="dora", id="1")
+        self.assertEqual(self.breaker.state, CircuitState.CLOSED)
+
+    def test_search_time_budget(self):
+        client = FakePagesClient(items=list(range(25)), page_size=10)
+        client.search_budget_seconds = 0
+
+        self.assertIsNone(client.search_services(code_insee="12345"))
+        self.assertEqual(client.requested_pages, [])
@@ -0,0 +1,133 @@
+"""Couverture géographique des services publiés.
+
+La table ``ServiceCoverage`` associe chaque division administrative (commune,
+EPCI, département, région) aux services publiés dont la zone de diffusion la
+recouvre ou l'intersecte. Les parents et enfants de la zone de diffusion sont
+résolus une fois pour toutes à l'écriture, ce qui permet de filtrer les services
+d'une commune, d'un département ou d'une région avec une simple jointure indexée.
+
+Les services diffusés sur la France entière n'ont qu'une seule ligne
+(``country``, ``""``), incluse dans toutes les recherches.
+"""
+
+from django.db import connection, transaction
+
+from dora.admin_express.models import AdminDivisionType
+from dora.services.enums import ServiceStatus
+
+_COVERAGE_SQL = """
+WITH published AS (
+    SELECT
+        id,
+        diffusion_zone_type    AS zone_type,
+        diffusion_zone_details AS zone_code
+    FROM services_service
+    WHERE
+        status = %(published)s
+        AND NOT is_model
+        AND (%(service_id)s::uuid IS NULL OR id = %(service_id)s::uuid)
+)
+INSERT INTO services_servicecoverage (
+    service_id, admin_division_type, admin_division_code
+)
+-- la zone de diffusion elle-même
+SELECT id, zone_type, zone_code
+FROM published
+WHERE zone_type IN (%(city)s, %(epci)s, %(department)s, %(region)s)
+UNION
+SELECT id, zone_type, ''
+FROM published
+WHERE zone_type = %(country)s
+-- commune : ses EPCI, son département et sa région
+UNION
+SELECT p.id, %(epci)s, unnest(c.epcis)
+FROM published AS p
+INNER JOIN admin_express_city AS c ON p.zone_type = %(city)s AND p.zone_code = c.code
+UNION
+SELECT p.id, %(department)s, c.department
+FROM published AS p
+INNER JOIN admin_express_city AS c ON p.zone_type = %(city)s AND p.zone_code = c.code
+UNION
+SELECT p.id, %(region)s, c.region
+FROM published AS p
+INNER JOIN admin_express_city AS c ON p.zone_type = %(city)s AND p.zone_code = c.code
+-- EPCI : ses communes, ses départements et ses régions
+UNION
+SELECT p.id, %(city)s, c.code
+FROM published AS p
+INNER JOIN admin_express_city AS c
+    ON p.zone_type = %(epci)s AND p.zone_code = any(c.epcis)
+UNION
+SELECT p.id, %(department)s, unnest(e.departments)
+FROM published AS p
+INNER JOIN admin_express_epci AS e ON p.zone_type = %(epci)s AND p.zone_code = e.code
+UNION
+SELECT p.id, %(region)s, unnest(e.regions)
+FROM published AS p
+INNER JOIN admin_express_epci AS e ON p.zone_type = %(epci)s AND p.zone_code = e.code
+-- département : ses communes, ses EPCI et sa région
+UNION
+SELECT p.id, %(city)s, c.code
+FROM published AS p
+INNER JOIN admin_express_city AS c
+    ON p.zone_type = %(department)s AND p.zone_code = c.department
+UNION
+SELECT p.id, %(epci)s, e.code
+FROM published AS p
+INNER JOIN admin_express_epci AS e
+    ON p.zone_type = %(department)s AND p.zone_code = any(e.departments)
+UNION
+SELECT p.id, %(region)s, d.region
+FROM published AS p
+INNER JOIN admin_express_department AS d
+    ON p.zone_type = %(department)s AND p.zone_code = d.code
+-- région : ses communes, ses EPCI et ses départements
+UNION
+SELECT p.id, %(city)s, c.code
+FROM published AS p
+INNER JOIN admin_express_city AS c
+    ON p.zone_type = %(region)s AND p.zone_code = c.region
+UNION
+SELECT p.id, %(epci)s, e.code
+FROM published AS p
+INNER JOIN admin_express_epci AS e
+    ON p.zone_type = %(region)s AND p.zone_code = any(e.regions)
+UNION
+SELECT p.id, %(department)s, d.code
+FROM published AS p
+INNER JOIN admin_express_department AS d
+    ON p.zone_type = %(region)s AND p.zone_code = d.region
+"""
+
+
+def _coverage_params(service_id):
+    return {
+        "published": ServiceStatus.PUBLISHED.value,
+        "service_id": str(service_id) if service_id is not None else None,
+        "city": AdminDivisionType.CITY.value,
+        "epci": AdminDivisionType.EPCI.value,
+        "department": AdminDivisionType.DEPARTMENT.value,
+        "region": AdminDivisionType.REGION.value,
+        "country": AdminDivisionType.COUNTRY.value,
+    }
+
+
+def update_service_coverage(service_id):
+    """Recalcule la couverture d'un seul service (vide s'il n'est pas publié)."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM services_servicecoverage WHERE service_id = %s",
+            [str(service_id)],
+        )
+        cursor.execute(_COVERAGE_SQL, _coverage_params(service_id))
+
+
+def rebuild_services_coverage():
+    """Recalcule la couverture de tous les services publiés.
+
+    À lancer après chaque import Admin Express, les rattachements entre
+    communes, EPCI, départements et régions pouvant avoir changé.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("DELETE FROM services_servicecoverage")
+        cursor.execute(_COVERAGE_SQL, _coverage_params(None))
@@ -5,8 +5,10 @@ from django.conf import settings
 from django.contrib.gis.db.models.functions import Distance
 from django.core.mail import EmailMessage
 from django.core.management.base import BaseCommand
+from django.db.models import Subquery
 
 from dora.admin_express.models import City
+from dora.admin_express.registry import get_city
 from dora.admin_express.utils import arrdt_to_main_insee_code
 from dora.services.models import Service
 
@@ -70,16 +72,21 @@ class Command(BaseCommand):
                 f"Code postal et code insee non cohérents: postal_code: {s.postal_code}; city_code: {s.city_code}",
             )
         else:
-            city = City.objects.get_from_code(arrdt_to_main_insee_code(s.city_code))
+            city = get_city(arrdt_to_main_insee_code(s.city_code))
             if not city:
                 self.display_error(
                     "geo", s, f"code insee incorrect: city_code: {s.city_code}"
                 )
 
-            elif not city.geom.contains(s.geom):
+            else:
+                # La vérification porte sur le contour de la commune (le point
+                # représentatif ne suffit pas ici) : on calcule la distance côté
+                # base, sans rapatrier le multipolygone ; elle est nulle si le
+                # service est situé dans la commune
+                city_geom = City.objects.filter(code=city.code).values("geom")[:1]
                 s = (
                     Service.objects.filter(pk=s.pk)
-                    .annotate(distance=Distance("geom", city.geom))
+                    .annotate(distance=Distance("geom", Subquery(city_geom)))
                     .first()
                 )
                 if s.distance.km > 1:
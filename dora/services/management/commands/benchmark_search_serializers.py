@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from dora.services.models import Service
+from dora.services.serializers import SearchResultSerializer, serialize_search_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare la sérialisation des résultats de recherche par "
+        "`SearchResultSerializer` et par `serialize_search_results`"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        pks = list(
+            Service.objects.published()
+            .order_by("pk")
+            .values_list("pk", flat=True)[: options["count"]]
+        )
+        distances = {pk: None for pk in pks}
+        self.stdout.write(f"{len(pks)} services, {options['repeat']} passes")
+
+        def legacy():
+            services = (
+                Service.objects.filter(pk__in=pks)
+                .select_related("structure")
+                .prefetch_related("kinds", "categories", "subcategories")
+            )
+            results = {}
+            for service in services:
+                service.distance = None
+                results[service.pk] = SearchResultSerializer(service).data
+            return results
+
+        def lean():
+            return serialize_search_results(
+                Service.objects.filter(pk__in=pks), distances
+            )
+
+        timings = {}
+        for name, serialize in (("legacy", legacy), ("lean", lean)):
+            best = None
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                results = serialize()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = (best, results)
+            self.stdout.write(f"{name}: {best * 1000:.1f} ms")
+
+        renderer = JSONRenderer()
+        legacy_results, lean_results = timings["legacy"][1], timings["lean"][1]
+        mismatches = [
+            pk
+            for pk in pks
+            if renderer.render(legacy_results[pk]) != renderer.render(lean_results[pk])
+        ]
+        if mismatches:
+            self.stdout.write(
+                self.style.ERROR(f"{len(mismatches)} résultats différents")
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"x{timings['legacy'][0] / timings['lean'][0]:.1f} plus rapide"
+            )
+        )
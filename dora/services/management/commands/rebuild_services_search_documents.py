@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from dora.services.search_document import rebuild_services_search_documents
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les documents de recherche des services publiés"
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.NOTICE("Reconstruction des documents de recherche")
+        )
+        rebuild_services_search_documents()
+        self.stdout.write(self.style.SUCCESS("Done"))
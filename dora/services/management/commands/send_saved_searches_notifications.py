@@ -1,7 +1,9 @@
 from datetime import timedelta
 
 from django.conf import settings
+from django.core.mail import get_connection
 from django.core.management.base import BaseCommand
+from django.db.models import Q
 from django.template.loader import render_to_string
 from django.utils import timezone
 from mjml import mjml2html
@@ -9,23 +11,23 @@ from mjml import mjml2html
 from dora.core.emails import send_mail
 
 from ...models import SavedSearch, SavedSearchFrequency
+from ...saved_searches import get_new_services_by_saved_search
 
 
 def get_saved_search_notifications_to_send():
-    # Notifications toutes les deux semaines
-    two_weeks_notifications = SavedSearch.objects.filter(
-        frequency=SavedSearchFrequency.TWO_WEEKS,
-        last_notification_date__lte=timezone.now() - timedelta(days=14),
-    )
-
-    # Notifications mensuelles
-    monthly_notifications = SavedSearch.objects.filter(
-        frequency=SavedSearchFrequency.MONTHLY,
-        last_notification_date__lte=timezone.now() - timedelta(days=30),
+    return SavedSearch.objects.filter(
+        # Notifications toutes les deux semaines
+        Q(
+            frequency=SavedSearchFrequency.TWO_WEEKS,
+            last_notification_date__lte=timezone.now() - timedelta(days=14),
+        )
+        # Notifications mensuelles
+        | Q(
+            frequency=SavedSearchFrequency.MONTHLY,
+            last_notification_date__lte=timezone.now() - timedelta(days=30),
+        )
     )
 
-    return two_weeks_notifications.union(monthly_notifications)
-
 
 def compute_search_label(saved_search):
     text = f"Services d’insertion à proximité de {saved_search.city_label}"
@@ -33,16 +35,16 @@ def compute_search_label(saved_search):
     if saved_search.category:
         text += f', pour la thématique "{saved_search.category.label}"'
 
-    if saved_search.subcategories.exists():
-        labels = saved_search.subcategories.values_list("label", flat=True)
+    if subcategories := saved_search.subcategories.all():
+        labels = [subcategory.label for subcategory in subcategories]
         text += f", pour le(s) besoin(s) : {', '.join(labels)}"
 
-    if saved_search.kinds.exists():
-        labels = saved_search.kinds.values_list("label", flat=True)
+    if kinds := saved_search.kinds.all():
+        labels = [kind.label for kind in kinds]
         text += f", pour le(s) type(s) de service : {', '.join(labels)}"
 
-    if saved_search.fees.exists():
-        labels = saved_search.fees.values_list("label", flat=True)
+    if fees := saved_search.fees.all():
+        labels = [fee.label for fee in fees]
         text += f", avec comme frais à charge : {', '.join(labels)}"
 
     return text
@@ -55,37 +57,44 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         self.stdout.write("Vérification des notifications de recherches sauvegardées")
-        saved_searches = get_saved_search_notifications_to_send()
+        saved_searches = (
+            get_saved_search_notifications_to_send()
+            .select_related("user", "category")
+            .prefetch_related("subcategories", "kinds", "fees")
+        )
         tracking_params = (
             "mtm_campaign=MailsTransactionnels&mtm_kwd=AlertesNouveauxServices"
         )
         num_emails_sent = 0
-        for saved_search in saved_searches:
-            # On garde les contenus qui ont été publiés depuis la dernière notification
-            new_services = saved_search.get_recent_services(
-                saved_search.last_notification_date
-            )
-
-            if new_services:
-                # Envoi de l'email
-                context = {
-                    "search_label": compute_search_label(saved_search),
-                    "updated_services": new_services,
-                    "alert_link": f"{settings.FRONTEND_URL}/mes-alertes/{saved_search.id}",
-                    "tracking_params": tracking_params,
-                }
-
-                num_emails_sent += 1
-                send_mail(
-                    "Il y a de nouveaux services correspondant à votre alerte",
-                    saved_search.user.email,
-                    mjml2html(
-                        render_to_string("saved-search-notification.mjml", context)
-                    ),
-                    tags=["saved-search-notification"],
+        # Une seule connexion au serveur d'envoi pour tous les courriels
+        with get_connection() as connection:
+            for saved_search, new_services in get_new_services_by_saved_search(
+                saved_searches
+            ):
+                if new_services:
+                    # Envoi de l'email
+                    context = {
+                        "search_label": compute_search_label(saved_search),
+                        "updated_services": new_services,
+                        "alert_link": f"{settings.FRONTEND_URL}/mes-alertes/{saved_search.id}",
+                        "tracking_params": tracking_params,
+                    }
+
+                    send_mail(
+                        "Il y a de nouveaux services correspondant à votre alerte",
+                        saved_search.user.email,
+                        mjml2html(
+                            render_to_string("saved-search-notification.mjml", context)
+                        ),
+                        tags=["saved-search-notification"],
+                        connection=connection,
+                    )
+                    num_emails_sent += 1
+
+                # Mise à jour de la date de dernière notification, aussitôt
+                # l'envoi effectué : si la commande est interrompue, une nouvelle
+                # exécution ne renverra pas les notifications déjà envoyées
+                SavedSearch.objects.filter(pk=saved_search.pk).update(
+                    last_notification_date=timezone.localdate()
                 )
-
-            # Mise à jour de la date de dernière notification
-            saved_search.last_notification_date = timezone.now()
-            saved_search.save()
         self.stdout.write(f"{num_emails_sent} courriels envoyés")
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dora.data_inclusion import di_client_factory
+from dora.data_inclusion.mirror import sync_data_inclusion_services
+
+
+class Command(BaseCommand):
+    help = (
+        "Synchronise la copie locale des services data·inclusion "
+        "des sources `DATA_INCLUSION_STREAM_SOURCES`"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            action="append",
+            dest="sources",
+            help="Source à synchroniser (toutes les sources configurées par défaut)",
+        )
+
+    def handle(self, *args, **options):
+        # la copie locale n'est lue par la recherche que si le miroir est activé
+        if not settings.DATA_INCLUSION_SEARCH_MIRROR:
+            self.stdout.write(
+                self.style.NOTICE(
+                    "`DATA_INCLUSION_SEARCH_MIRROR` n'est pas activé : "
+                    "pas de synchronisation"
+                )
+            )
+            return
+        sources = options["sources"] or settings.DATA_INCLUSION_STREAM_SOURCES
+        counts = sync_data_inclusion_services(di_client_factory(), sources=sources)
+        self.stdout.write(
+            self.style.SUCCESS(
+                "{created} créés, {updated} mis à jour, {unchanged} inchangés, "
+                "{deleted} supprimés".format(**counts)
+            )
+        )
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from ...models import SavedSearch
+from ...saved_searches import get_new_services_by_saved_search
+
+
+class Command(BaseCommand):
+    help = (
+        "Met à jour le nombre de nouveaux services des recherches sauvegardées "
+        "dont le compteur a été invalidé ou date de la veille"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true", help="Recalcule tous les compteurs"
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        saved_searches = SavedSearch.objects.prefetch_related(
+            "subcategories", "kinds", "fees"
+        ).select_related("category")
+        if not options["all"]:
+            # les services sortent de la fenêtre des nouveautés au fil des jours
+            saved_searches = saved_searches.filter(
+                Q(new_services_count_date=None)
+                | Q(new_services_count_date__date__lt=timezone.localdate())
+            )
+
+        cutoff_date = (
+            now - timedelta(days=settings.RECENT_SERVICES_CUTOFF_DAYS)
+        ).date()
+        num_updated = 0
+        for saved_search, new_services in get_new_services_by_saved_search(
+            saved_searches, cutoff_date
+        ):
+            SavedSearch.objects.filter(pk=saved_search.pk).update(
+                new_services_count=len(new_services), new_services_count_date=now
+            )
+            num_updated += 1
+        self.stdout.write(f"{num_updated} compteurs mis à jour")
@@ -0,0 +1,164 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# copie de la requête de `dora.services.coverage` au moment de la migration :
+# les évolutions ultérieures du code ne doivent pas changer cette migration
+COVERAGE_SQL = """
+WITH published AS (
+    SELECT
+        id,
+        diffusion_zone_type    AS zone_type,
+        diffusion_zone_details AS zone_code
+    FROM services_service
+    WHERE
+        status = %(published)s
+        AND NOT is_model
+)
+INSERT INTO services_servicecoverage (
+    service_id, admin_division_type, admin_division_code
+)
+-- la zone de diffusion elle-même
+SELECT id, zone_type, zone_code
+FROM published
+WHERE zone_type IN (%(city)s, %(epci)s, %(department)s, %(region)s)
+UNION
+SELECT id, zone_type, ''
+FROM published
+WHERE zone_type = %(country)s
+-- commune : ses EPCI, son département et sa région
+UNION
+SELECT p.id, %(epci)s, unnest(c.epcis)
+FROM published AS p
+INNER JOIN admin_express_city AS c ON p.zone_type = %(city)s AND p.zone_code = c.code
+UNION
+SELECT p.id, %(department)s, c.department
+FROM published AS p
+INNER JOIN admin_express_city AS c ON p.zone_type = %(city)s AND p.zone_code = c.code
+UNION
+SELECT p.id, %(region)s, c.region
+FROM published AS p
+INNER JOIN admin_express_city AS c ON p.zone_type = %(city)s AND p.zone_code = c.code
+-- EPCI : ses communes, ses départements et ses régions
+UNION
+SELECT p.id, %(city)s, c.code
+FROM published AS p
+INNER JOIN admin_express_city AS c
+    ON p.zone_type = %(epci)s AND p.zone_code = any(c.epcis)
+UNION
+SELECT p.id, %(department)s, unnest(e.departments)
+FROM published AS p
+INNER JOIN admin_express_epci AS e ON p.zone_type = %(epci)s AND p.zone_code = e.code
+UNION
+SELECT p.id, %(region)s, unnest(e.regions)
+FROM published AS p
+INNER JOIN admin_express_epci AS e ON p.zone_type = %(epci)s AND p.zone_code = e.code
+-- département : ses communes, ses EPCI et sa région
+UNION
+SELECT p.id, %(city)s, c.code
+FROM published AS p
+INNER JOIN admin_express_city AS c
+    ON p.zone_type = %(department)s AND p.zone_code = c.department
+UNION
+SELECT p.id, %(epci)s, e.code
+FROM published AS p
+INNER JOIN admin_express_epci AS e
+    ON p.zone_type = %(department)s AND p.zone_code = any(e.departments)
+UNION
+SELECT p.id, %(region)s, d.region
+FROM published AS p
+INNER JOIN admin_express_department AS d
+    ON p.zone_type = %(department)s AND p.zone_code = d.code
+-- région : ses communes, ses EPCI et ses départements
+UNION
+SELECT p.id, %(city)s, c.code
+FROM published AS p
+INNER JOIN admin_express_city AS c
+    ON p.zone_type = %(region)s AND p.zone_code = c.region
+UNION
+SELECT p.id, %(epci)s, e.code
+FROM published AS p
+INNER JOIN admin_express_epci AS e
+    ON p.zone_type = %(region)s AND p.zone_code = any(e.regions)
+UNION
+SELECT p.id, %(department)s, d.code
+FROM published AS p
+INNER JOIN admin_express_department AS d
+    ON p.zone_type = %(region)s AND p.zone_code = d.region
+"""
+
+COVERAGE_PARAMS = {
+    "published": "PUBLISHED",
+    "city": "city",
+    "epci": "epci",
+    "department": "department",
+    "region": "region",
+    "country": "country",
+}
+
+
+def init_services_coverage(apps, schema_editor):
+    schema_editor.execute(COVERAGE_SQL, COVERAGE_PARAMS)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("admin_express", "0007_city_epcis_epci_departments_epci_regions"),
+        ("services", "0100_alter_service_recurrence_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ServiceCoverage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "admin_division_type",
+                    models.CharField(
+                        choices=[
+                            ("city", "Commune"),
+                            ("epci", "Intercommunalité (EPCI)"),
+                            ("department", "Département"),
+                            ("region", "Région"),
+                            ("country", "France entière"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "admin_division_code",
+                    models.CharField(blank=True, max_length=9),
+                ),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="coverage",
+                        to="services.service",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Couverture géographique de service",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="servicecoverage",
+            constraint=models.UniqueConstraint(
+                fields=("admin_division_type", "admin_division_code", "service"),
+                name="services_unique_service_coverage",
+            ),
+        ),
+        migrations.RunPython(
+            init_services_coverage, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,169 @@
+# Generated by Django 4.2.7 on 2026-10-17 10:41
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+# copie de la requête de `dora.services.search_document` au moment de la
+# migration : les évolutions ultérieures du code ne doivent pas changer cette
+# migration
+DOCUMENT_SQL = """
+INSERT INTO services_servicesearchdocument (
+    service_id,
+    categories,
+    subcategories,
+    kinds,
+    location_kinds,
+    fee_condition,
+    geom,
+    diffusion_zone_type,
+    diffusion_zone_details,
+    suspension_date
+)
+SELECT
+    s.id,
+    ARRAY(
+        SELECT c.value
+        FROM services_service_categories AS sc
+        INNER JOIN services_servicecategory AS c ON c.id = sc.servicecategory_id
+        WHERE sc.service_id = s.id
+        ORDER BY c.value
+    ),
+    ARRAY(
+        SELECT c.value
+        FROM services_service_subcategories AS sc
+        INNER JOIN services_servicesubcategory AS c ON c.id = sc.servicesubcategory_id
+        WHERE sc.service_id = s.id
+        ORDER BY c.value
+    ),
+    ARRAY(
+        SELECT k.value
+        FROM services_service_kinds AS sk
+        INNER JOIN services_servicekind AS k ON k.id = sk.servicekind_id
+        WHERE sk.service_id = s.id
+        ORDER BY k.value
+    ),
+    ARRAY(
+        SELECT l.value
+        FROM services_service_location_kinds AS sl
+        INNER JOIN services_locationkind AS l ON l.id = sl.locationkind_id
+        WHERE sl.service_id = s.id
+        ORDER BY l.value
+    ),
+    coalesce(f.value, ''),
+    s.geom,
+    s.diffusion_zone_type,
+    s.diffusion_zone_details,
+    s.suspension_date
+FROM services_service AS s
+LEFT JOIN services_servicefee AS f ON f.id = s.fee_condition_id
+WHERE
+    s.status = %(published)s
+    AND NOT s.is_model
+    AND (s.suspension_date IS NULL OR s.suspension_date >= current_date)
+"""
+
+
+def init_services_search_documents(apps, schema_editor):
+    schema_editor.execute(DOCUMENT_SQL, {"published": "PUBLISHED"})
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("services", "0101_servicecoverage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ServiceSearchDocument",
+            fields=[
+                (
+                    "service",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_document",
+                        serialize=False,
+                        to="services.service",
+                    ),
+                ),
+                (
+                    "categories",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=255),
+                        default=list,
+                        size=None,
+                    ),
+                ),
+                (
+                    "subcategories",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=255),
+                        default=list,
+                        size=None,
+                    ),
+                ),
+                (
+                    "kinds",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=255),
+                        default=list,
+                        size=None,
+                    ),
+                ),
+                (
+                    "location_kinds",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=255),
+                        default=list,
+                        size=None,
+                    ),
+                ),
+                ("fee_condition", models.CharField(blank=True, max_length=255)),
+                (
+                    "geom",
+                    django.contrib.gis.db.models.fields.PointField(
+                        blank=True, geography=True, null=True, srid=4326
+                    ),
+                ),
+                (
+                    "diffusion_zone_type",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("city", "Commune"),
+                            ("epci", "Intercommunalité (EPCI)"),
+                            ("department", "Département"),
+                            ("region", "Région"),
+                            ("country", "France entière"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("diffusion_zone_details", models.CharField(blank=True, max_length=9)),
+                ("suspension_date", models.DateField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Document de recherche de service",
+                "indexes": [
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["categories"], name="search_doc_categories_idx"
+                    ),
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["subcategories"], name="search_doc_subcategories_idx"
+                    ),
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["kinds"], name="search_doc_kinds_idx"
+                    ),
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["location_kinds"], name="search_doc_location_kinds_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(
+            init_services_search_documents, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 4.2.7 on 2026-10-17 14:12
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("services", "0102_servicesearchdocument"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataInclusionService",
+            fields=[
+                (
+                    "slug",
+                    models.CharField(max_length=255, primary_key=True, serialize=False),
+                ),
+                ("source", models.CharField(db_index=True, max_length=255)),
+                (
+                    "categories",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=255),
+                        default=list,
+                        size=None,
+                    ),
+                ),
+                (
+                    "subcategories",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=255),
+                        default=list,
+                        size=None,
+                    ),
+                ),
+                (
+                    "kinds",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=255),
+                        default=list,
+                        size=None,
+                    ),
+                ),
+                (
+                    "location_kinds",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=255),
+                        default=list,
+                        size=None,
+                    ),
+                ),
+                (
+                    "fees",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=255),
+                        default=list,
+                        size=None,
+                    ),
+                ),
+                (
+                    "geom",
+                    django.contrib.gis.db.models.fields.PointField(
+                        blank=True, geography=True, null=True, srid=4326
+                    ),
+                ),
+                (
+                    "diffusion_zone_type",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("city", "Commune"),
+                            ("epci", "Intercommunalité (EPCI)"),
+                            ("department", "Département"),
+                            ("region", "Région"),
+                            ("country", "France entière"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("diffusion_zone_details", models.CharField(blank=True, max_length=9)),
+                ("suspension_date", models.DateField(blank=True, null=True)),
+                ("data", models.JSONField()),
+                ("checksum", models.CharField(max_length=32)),
+            ],
+            options={
+                "verbose_name": "Service data·inclusion",
+                "indexes": [
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["categories"], name="di_service_categories_idx"
+                    ),
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["subcategories"], name="di_service_subcategories_idx"
+                    ),
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["kinds"], name="di_service_kinds_idx"
+                    ),
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["location_kinds"], name="di_service_location_kinds_idx"
+                    ),
+                    models.Index(
+                        fields=["diffusion_zone_type", "diffusion_zone_details"],
+                        name="di_service_diffusion_zone_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
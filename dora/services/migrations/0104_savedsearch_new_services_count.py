@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("services", "0103_datainclusionservice"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="savedsearch",
+            name="new_services_count",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="savedsearch",
+            name="new_services_count_date",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,22 +1,40 @@
 import logging
 import uuid
 from datetime import datetime, timedelta
+from typing import Optional
 
 from django.conf import settings
 from django.contrib.gis.db import models
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.core.cache import cache
-from django.db.models import CharField, Q
+from django.db import transaction
+from django.db.models import CharField, F, Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.utils import timezone
 from django.utils.crypto import get_random_string
 from django.utils.text import slugify
 
-from dora.admin_express.models import EPCI, AdminDivisionType, City, Department, Region
+from dora.admin_express.models import AdminDivisionType
+from dora.admin_express.registry import get_admin_division
 from dora.admin_express.utils import get_clean_city_name
-from dora.core.models import EnumModel, LogItem, ModerationMixin
-from dora.structures.models import Structure
-
+from dora.core.models import (
+    ChangeLogObjectType,
+    EnumModel,
+    LogItem,
+    ModerationMixin,
+    record_change,
+)
+from dora.structures.models import Structure, StructureMember, get_user_memberships
+
+from .coverage import update_service_coverage
 from .enums import ServiceStatus, ServiceUpdateStatus
+from .options import invalidate_options, invalidate_user_options_scope
+from .search_document import (
+    SEARCH_DOCUMENT_M2M_FIELDS,
+    rebuild_services_search_documents,
+    update_service_search_document,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -181,20 +199,10 @@ def get_diffusion_zone_details_display(
     if diffusion_zone_type == AdminDivisionType.COUNTRY:
         return "France entière"
 
-    if diffusion_zone_type == AdminDivisionType.CITY:
-        city = City.objects.get_from_code(diffusion_zone_details)
-        # TODO: we'll probably want to log and correct a missing code
-        return f"{city.name} ({city.department})" if city else ""
-
-    item = None
-
-    if diffusion_zone_type == AdminDivisionType.EPCI:
-        item = EPCI.objects.get_from_code(diffusion_zone_details)
-    elif diffusion_zone_type == AdminDivisionType.DEPARTMENT:
-        item = Department.objects.get_from_code(diffusion_zone_details)
-    elif diffusion_zone_type == AdminDivisionType.REGION:
-        item = Region.objects.get_from_code(diffusion_zone_details)
+    item = get_admin_division(diffusion_zone_type, diffusion_zone_details)
     # TODO: we'll probably want to log and correct a missing code
+    if item and diffusion_zone_type == AdminDivisionType.CITY:
+        return f"{item.name} ({item.department})"
     return item.name if item else ""
 
 
@@ -211,6 +219,10 @@ def get_update_status(status: ServiceStatus, modification_date: datetime):
     return ServiceUpdateStatus.NOT_NEEDED
 
 
+# Champs dont dépend la couverture géographique d'un service (voir `ServiceCoverage`)
+SERVICE_COVERAGE_FIELDS = ("status", "diffusion_zone_type", "diffusion_zone_details")
+
+
 class Service(ModerationMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     slug = models.SlugField(max_length=100, blank=True, null=True, unique=True)
@@ -423,6 +435,15 @@ class Service(ModerationMixin, models.Model):
     objects = ServiceManager()
 
     class Meta:
+        indexes = [
+            # parcours de l'API par date de modification (voir
+            # `dora.core.pagination.OptionalCursorPagination`)
+            models.Index(
+                F("modification_date").asc(nulls_first=True),
+                F("id"),
+                name="service_modif_date_id_idx",
+            ),
+        ]
         constraints = [
             models.CheckConstraint(
                 name="%(app_label)s_%(class)s_status_not_empty_except_models",
@@ -453,27 +474,56 @@ class Service(ModerationMixin, models.Model):
         except ServiceStatusHistoryItem.DoesNotExist:
             return None
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # les champs différés valent `None` : la couverture sera recalculée
+        instance._coverage_key = tuple(
+            instance.__dict__.get(f) for f in SERVICE_COVERAGE_FIELDS
+        )
+        return instance
+
     def save(self, user=None, *args, **kwargs):
         if not self.slug:
             self.slug = make_unique_slug(self, self.structure.slug, self.name)
         self.city = get_clean_city_name(self.city_code)
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+
+        is_recent = self.is_recently_published()
+        # communes couvertes avant la modification : un service récent dépublié
+        # ou archivé n'a plus de couverture, mais a pu être compté
+        previous_city_codes = set()
+        coverage_key = tuple(getattr(self, f) for f in SERVICE_COVERAGE_FIELDS)
+        if coverage_key != getattr(self, "_coverage_key", None):
+            if is_recent:
+                previous_city_codes = get_service_coverage_city_codes(self.pk)
+            update_service_coverage(self.pk)
+            self._coverage_key = coverage_key
+        update_service_search_document(self.pk)
+
+        if is_recent:
+            invalidate_saved_searches_new_services_counts(self.pk, previous_city_codes)
+
+        return result
+
+    def is_recently_published(self):
+        # publié depuis assez peu de temps pour compter parmi les nouveaux
+        # services des recherches sauvegardées
+        return bool(
+            self.publication_date
+            and self.publication_date
+            >= timezone.now() - timedelta(days=settings.RECENT_SERVICES_CUTOFF_DAYS)
+        )
 
     def can_read(self, user):
-        return self.status == ServiceStatus.PUBLISHED or (
-            user.is_authenticated
-            and (
-                user.is_staff
-                or self.structure.is_manager(user)
-                or self.structure.is_member(user)
-            )
-        )
+        return self.status == ServiceStatus.PUBLISHED or self.can_write(user)
 
     def can_write(self, user):
+        # la structure n'est chargée que pour les gestionnaires non membres
         return user.is_authenticated and (
             user.is_staff
+            or get_user_memberships(user).is_member(self.structure_id)
             or self.structure.is_manager(user)
-            or self.structure.is_member(user)
         )
 
     def get_frontend_url(self):
@@ -597,6 +647,260 @@ class ServiceModificationHistoryItem(models.Model):
         verbose_name = "Historique de modification de service"
 
 
+class ServiceCoverage(models.Model):
+    # Divisions administratives couvertes par la zone de diffusion d'un service publié.
+    # Maintenu par `Service.save` et reconstruit à chaque import Admin Express
+    # (voir `dora.services.coverage`)
+    service = models.ForeignKey(
+        Service, on_delete=models.CASCADE, related_name="coverage"
+    )
+    admin_division_type = models.CharField(
+        max_length=10, choices=AdminDivisionType.choices
+    )
+    admin_division_code = models.CharField(max_length=9, blank=True)
+
+    class Meta:
+        verbose_name = "Couverture géographique de service"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["admin_division_type", "admin_division_code", "service"],
+                name="%(app_label)s_unique_service_coverage",
+            )
+        ]
+
+
+class ServiceSearchDocument(models.Model):
+    # Version dénormalisée d'un service publié et non suspendu, interrogée par la
+    # recherche sans jointure sur les tables M2M.
+    # Maintenu par `Service.save` et le signal `m2m_changed`, et reconstruit
+    # chaque nuit (voir `dora.services.search_document`)
+    service = models.OneToOneField(
+        Service,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+    )
+    categories = ArrayField(models.CharField(max_length=255), default=list)
+    subcategories = ArrayField(models.CharField(max_length=255), default=list)
+    kinds = ArrayField(models.CharField(max_length=255), default=list)
+    location_kinds = ArrayField(models.CharField(max_length=255), default=list)
+    fee_condition = models.CharField(max_length=255, blank=True)
+    geom = models.PointField(
+        srid=4326, geography=True, spatial_index=True, null=True, blank=True
+    )
+    diffusion_zone_type = models.CharField(
+        max_length=10, choices=AdminDivisionType.choices, blank=True
+    )
+    diffusion_zone_details = models.CharField(max_length=9, blank=True)
+    suspension_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Document de recherche de service"
+        indexes = [
+            GinIndex(name="search_doc_categories_idx", fields=("categories",)),
+            GinIndex(name="search_doc_subcategories_idx", fields=("subcategories",)),
+            GinIndex(name="search_doc_kinds_idx", fields=("kinds",)),
+            GinIndex(name="search_doc_location_kinds_idx", fields=("location_kinds",)),
+        ]
+
+
+def _update_search_documents_on_m2m_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        update_service_search_document(instance.pk)
+    elif pk_set is not None:
+        # ex: `category.service_set.add(...)`
+        for service_pk in pk_set:
+            update_service_search_document(service_pk)
+    else:
+        # ex: `category.service_set.clear()` : les services concernés ne sont
+        # plus connus à ce stade
+        rebuild_services_search_documents()
+
+
+for _field in SEARCH_DOCUMENT_M2M_FIELDS:
+    m2m_changed.connect(
+        _update_search_documents_on_m2m_change,
+        sender=getattr(Service, _field).through,
+        dispatch_uid=f"service_search_document_{_field}",
+    )
+
+
+def _record_service_change(sender, instance, **kwargs):
+    if not instance.is_model:
+        record_change(ChangeLogObjectType.SERVICE, instance.pk)
+
+
+def _invalidate_saved_searches_new_services_counts(sender, instance, **kwargs):
+    # avant la suppression, tant que la couverture du service existe
+    if instance.is_recently_published():
+        invalidate_saved_searches_new_services_counts(instance.pk)
+
+
+def _record_service_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        _record_service_change(Service, instance)
+    elif pk_set:
+        for service in Service.objects.filter(pk__in=pk_set):
+            _record_service_change(Service, service)
+
+
+# flux de modifications de l'API (voir `dora.core.models.ChangeLogEntry`)
+post_save.connect(
+    _record_service_change, sender=Service, dispatch_uid="service_change_log_save"
+)
+post_delete.connect(
+    _record_service_change, sender=Service, dispatch_uid="service_change_log_delete"
+)
+pre_delete.connect(
+    _invalidate_saved_searches_new_services_counts,
+    sender=Service,
+    dispatch_uid="service_saved_searches_new_services_counts_delete",
+)
+for _field in Service._meta.many_to_many:
+    m2m_changed.connect(
+        _record_service_m2m_change,
+        sender=_field.remote_field.through,
+        dispatch_uid=f"service_change_log_{_field.name}",
+    )
+
+
+def _invalidate_options(sender, **kwargs):
+    if (
+        issubclass(sender, (EnumModel, CustomizableChoice))
+        # `dora.stats.models` dépend de ce module
+        or sender._meta.label == "stats.DeploymentState"
+    ):
+        # une fois la transaction validée, pour qu'un autre process ne mette pas
+        # en cache les anciennes valeurs sous la nouvelle version
+        transaction.on_commit(invalidate_options)
+
+
+def _invalidate_member_options_scope(sender, instance, **kwargs):
+    invalidate_user_options_scope(instance.user_id)
+
+
+def _invalidate_members_options_scopes(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    # rattachements via `Structure.members.add(…)` : pas de signal `post_save`
+    if reverse:
+        user_ids = [instance.pk]
+    elif action == "pre_clear":
+        user_ids = list(instance.members.values_list("pk", flat=True))
+    else:
+        user_ids = pk_set or []
+    if action in ("post_add", "post_remove", "pre_clear"):
+        for user_id in user_ids:
+            invalidate_user_options_scope(user_id)
+
+
+def _invalidate_user_options_scope(sender, instance, update_fields=None, **kwargs):
+    # les connexions ne mettent à jour que `last_login`
+    if update_fields is None or {"is_staff", "is_manager", "department"} & set(
+        update_fields
+    ):
+        invalidate_user_options_scope(instance.pk)
+
+
+# options des services (voir `dora.services.options`)
+post_save.connect(_invalidate_options, dispatch_uid="services_options_save")
+post_delete.connect(_invalidate_options, dispatch_uid="services_options_delete")
+post_save.connect(
+    _invalidate_member_options_scope,
+    sender=StructureMember,
+    dispatch_uid="services_options_member_save",
+)
+post_delete.connect(
+    _invalidate_member_options_scope,
+    sender=StructureMember,
+    dispatch_uid="services_options_member_delete",
+)
+m2m_changed.connect(
+    _invalidate_members_options_scopes,
+    sender=Structure.members.through,
+    dispatch_uid="services_options_members",
+)
+post_save.connect(
+    _invalidate_user_options_scope,
+    sender=settings.AUTH_USER_MODEL,
+    dispatch_uid="services_options_user",
+)
+
+
+class DataInclusionService(models.Model):
+    # Copie locale d'un service data·inclusion, avec les mêmes colonnes que
+    # `ServiceSearchDocument`, interrogée par la recherche à la place de l'API
+    # d·i quand `DATA_INCLUSION_SEARCH_MIRROR` est activé.
+    # Synchronisée par la commande `sync_data_inclusion_services`
+    # (voir `dora.data_inclusion.mirror`)
+    slug = models.CharField(max_length=255, primary_key=True)  # `<source>--<id>`
+    source = models.CharField(max_length=255, db_index=True)
+    categories = ArrayField(models.CharField(max_length=255), default=list)
+    subcategories = ArrayField(models.CharField(max_length=255), default=list)
+    kinds = ArrayField(models.CharField(max_length=255), default=list)
+    location_kinds = ArrayField(models.CharField(max_length=255), default=list)
+    fees = ArrayField(models.CharField(max_length=255), default=list)
+    geom = models.PointField(
+        srid=4326, geography=True, spatial_index=True, null=True, blank=True
+    )
+    diffusion_zone_type = models.CharField(
+        max_length=10, choices=AdminDivisionType.choices, blank=True
+    )
+    diffusion_zone_details = models.CharField(max_length=9, blank=True)
+    suspension_date = models.DateField(null=True, blank=True)
+    # service tel que renvoyé par l'API d·i, et son empreinte
+    data = models.JSONField()
+    checksum = models.CharField(max_length=32)
+
+    class Meta:
+        verbose_name = "Service data·inclusion"
+        indexes = [
+            GinIndex(name="di_service_categories_idx", fields=("categories",)),
+            GinIndex(name="di_service_subcategories_idx", fields=("subcategories",)),
+            GinIndex(name="di_service_kinds_idx", fields=("kinds",)),
+            GinIndex(name="di_service_location_kinds_idx", fields=("location_kinds",)),
+            models.Index(
+                name="di_service_diffusion_zone_idx",
+                fields=("diffusion_zone_type", "diffusion_zone_details"),
+            ),
+        ]
+
+
+def get_service_coverage_city_codes(service_id) -> Optional[set[str]]:
+    # Communes couvertes par un service publié (`None` s'il est diffusé sur la
+    # France entière, ensemble vide s'il n'est pas publié)
+    city_codes = set()
+    for division_type, code in ServiceCoverage.objects.filter(
+        service_id=service_id,
+        admin_division_type__in=(AdminDivisionType.CITY, AdminDivisionType.COUNTRY),
+    ).values_list("admin_division_type", "admin_division_code"):
+        if division_type == AdminDivisionType.COUNTRY:
+            return None
+        city_codes.add(code)
+    return city_codes
+
+
+def invalidate_saved_searches_new_services_counts(
+    service_id, previous_city_codes: Optional[set[str]] = frozenset()
+):
+    # Les recherches sauvegardées dans une commune couverte par le service, avant
+    # (`previous_city_codes`) ou après sa modification, ou toutes s'il est ou
+    # était diffusé sur la France entière, seront recalculées
+    city_codes = get_service_coverage_city_codes(service_id)
+    saved_searches = SavedSearch.objects.exclude(new_services_count_date=None)
+    if city_codes is not None and previous_city_codes is not None:
+        saved_searches = saved_searches.filter(
+            city_code__in=city_codes | previous_city_codes
+        )
+    saved_searches.update(new_services_count_date=None)
+
+
 class Bookmark(models.Model):
     user = models.ForeignKey("users.User", on_delete=models.CASCADE)
     service = models.ForeignKey("Service", on_delete=models.CASCADE, null=True)
@@ -646,53 +950,62 @@ class SavedSearch(models.Model):
         verbose_name="Fréquence",
     )
     last_notification_date = models.DateField(default=datetime.now)
+    # Nombre de services publiés depuis `RECENT_SERVICES_CUTOFF_DAYS` jours,
+    # calculé par la commande `update_saved_searches_new_services_counts`.
+    # `new_services_count_date` est remise à zéro quand un service
+    # correspondant est publié ou modifié, pour que le compteur soit recalculé
+    new_services_count = models.PositiveIntegerField(null=True, blank=True)
+    new_services_count_date = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         verbose_name = "Recherche sauvegardé"
         verbose_name_plural = "Recherches sauvegardées"
 
-    def get_recent_services(self, cutoff_date):
+    @staticmethod
+    def get_di_client():
         from dora import data_inclusion
 
-        di_client = (
+        return (
             data_inclusion.di_client_factory()
             if not settings.IS_TESTING
             and settings.INCLUDES_DI_SERVICES_IN_SAVED_SEARCH_NOTIFICATIONS
             else None
         )
 
-        category = None
-        if self.category:
-            category = self.category
-
-        subcategories = None
-        if self.subcategories.exists():
-            subcategories = self.subcategories.values_list("value", flat=True)
-
-        kinds = None
-        if self.kinds.exists():
-            kinds = self.kinds.values_list("value", flat=True)
-
-        fees = None
-        if self.fees.exists():
-            fees = self.fees.values_list("value", flat=True)
-
-        # Récupération des résultats de la recherche
-        from .search import search_services
-
-        results = search_services(
-            None,
-            self.city_code,
-            [category.value] if category and not subcategories else None,
-            subcategories,
-            kinds,
-            fees,
-            di_client,
-        )
+    def get_search_params(self) -> dict:
+        # Paramètres de `search_services` correspondant à la recherche
+        # (s'appuie sur les M2M préchargées, le cas échéant)
+        subcategories = sorted(s.value for s in self.subcategories.all())
+        kinds = sorted(k.value for k in self.kinds.all())
+        fees = sorted(f.value for f in self.fees.all())
+        return {
+            "city_code": self.city_code,
+            "categories": [self.category.value]
+            if self.category and not subcategories
+            else None,
+            "subcategories": subcategories or None,
+            "kinds": kinds or None,
+            "fees": fees or None,
+        }
+
+    def get_recent_services(self, cutoff_date, results=None):
+        # `results` : résultats de la recherche publiés après une date antérieure
+        # ou égale à `cutoff_date`, s'ils ont déjà été calculés
+        if results is None:
+            from .search import search_services
+
+            results = search_services(
+                None,
+                di_client=self.get_di_client(),
+                published_after=cutoff_date,
+                **self.get_search_params(),
+            )
 
         # On garde les contenus qui ont été publiés depuis la dernière notification
+        # (les résultats d·i n'ont pas de date de publication)
         return [
             r
             for r in results
-            if datetime.fromisoformat(r["publication_date"]).date() > cutoff_date
+            if r.get("publication_date")
+            and datetime.fromisoformat(r["publication_date"]).date() > cutoff_date
         ]
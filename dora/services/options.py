@@ -0,0 +1,90 @@
+"""Cache de l'endpoint `options` des services.
+
+La réponse comporte :
+- une partie commune à tous les utilisateurs (tables de référence, types de
+  zone de diffusion, départements en cours de déploiement), calculée une fois
+  par version ;
+- les choix personnalisables (`CustomizableChoice`) visibles par l'utilisateur,
+  qui ne dépendent que de son « périmètre » : ses structures et, s'il est
+  gestionnaire, son département. Ils sont mis en cache par périmètre.
+
+La version est changée à chaque modification d'une table de référence, d'un
+choix personnalisable ou de l'état de déploiement (voir `dora.services.models`).
+Le périmètre d'un utilisateur est lui-même mis en cache, et supprimé quand ses
+rattachements ou son profil changent : l'ETag d'une réponse peut ainsi être
+calculé, et une requête `If-None-Match` traitée, sans requête SQL.
+"""
+
+import hashlib
+from uuid import uuid4
+
+from django.core.cache import cache
+
+CACHE_KEY_PREFIX = "services-options:v1"
+VERSION_KEY = f"{CACHE_KEY_PREFIX}:version"
+
+# borne la durée de vie des entrées devenues inutiles après un changement
+# de version ou de périmètre
+OPTIONS_CACHE_TIMEOUT = 24 * 60 * 60
+
+STAFF_SCOPE = "staff"
+ANONYMOUS_SCOPE = "anonymous"
+
+
+def _scope_key(user_id) -> str:
+    return f"{CACHE_KEY_PREFIX}:scope:{user_id}"
+
+
+def invalidate_options():
+    cache.set(VERSION_KEY, uuid4().hex, timeout=None)
+
+
+def invalidate_user_options_scope(user_id):
+    cache.delete(_scope_key(user_id))
+
+
+def get_options_version() -> str:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_user_scope(user) -> str:
+    if not user.is_authenticated:
+        return ANONYMOUS_SCOPE
+    if user.is_staff:
+        return STAFF_SCOPE
+
+    key = _scope_key(user.pk)
+    scope = cache.get(key)
+    if scope is None:
+        structure_ids = sorted(
+            str(pk) for pk in user.membership.values_list("structure_id", flat=True)
+        )
+        department = user.department if user.is_manager and user.department else ""
+        scope = hashlib.md5(
+            f"{','.join(structure_ids)}|{department}".encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        cache.set(key, scope, timeout=OPTIONS_CACHE_TIMEOUT)
+    return scope
+
+
+def get_options_etag(version: str, scope: str) -> str:
+    return f'"{hashlib.md5(f"{version}:{scope}".encode(), usedforsecurity=False).hexdigest()}"'
+
+
+def get_cached_global_options(version: str, compute) -> dict:
+    return cache.get_or_set(
+        f"{CACHE_KEY_PREFIX}:global:{version}", compute, timeout=OPTIONS_CACHE_TIMEOUT
+    )
+
+
+def get_cached_custom_choices(version: str, scope: str, compute) -> dict:
+    return cache.get_or_set(
+        f"{CACHE_KEY_PREFIX}:choices:{version}:{scope}",
+        compute,
+        timeout=OPTIONS_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,50 @@
+"""Évaluation en lot des recherches sauvegardées.
+
+Les recherches sauvegardées ayant les mêmes paramètres (commune, thématique,
+besoins, types de service, frais) sont regroupées, et chaque recherche distincte
+n'est exécutée qu'une fois. Utilisé pour l'envoi des notifications et pour le
+calcul des compteurs de nouveaux services.
+"""
+
+from collections import defaultdict
+from datetime import date
+from typing import Optional
+
+from .search import search_services
+
+
+def get_new_services_by_saved_search(
+    saved_searches, cutoff_date: Optional[date] = None
+):
+    """Yield each saved search with the services published after a cutoff date.
+
+    The cutoff date is ``cutoff_date`` if given, the last notification date of
+    each saved search otherwise. Each distinct search is run once, restricted in
+    SQL to the services published after the oldest cutoff date of its group.
+    """
+    groups = defaultdict(list)
+    for saved_search in saved_searches:
+        params = saved_search.get_search_params()
+        key = tuple(
+            (name, tuple(value) if isinstance(value, list) else value)
+            for name, value in params.items()
+        )
+        groups[key].append((saved_search, params))
+
+    # pas de client d·i : les services d·i n'ont pas de date de publication,
+    # `search_services` ne les cherche pas quand `published_after` est donné
+    for group in groups.values():
+        cutoff_dates = [
+            cutoff_date or saved_search.last_notification_date
+            for saved_search, _ in group
+        ]
+        results = search_services(
+            None, published_after=min(cutoff_dates), **group[0][1]
+        )
+        for (saved_search, _), saved_search_cutoff_date in zip(group, cutoff_dates):
+            yield (
+                saved_search,
+                saved_search.get_recent_services(
+                    saved_search_cutoff_date, results=results
+                ),
+            )
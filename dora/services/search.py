@@ -1,83 +1,364 @@
-import random
+import functools
+import hashlib
+import heapq
+import logging
+import time
+import uuid
+from collections.abc import Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import date
+from itertools import islice
 from typing import Optional
 
 import requests
 from _operator import itemgetter
 from django.conf import settings
-from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.db.models.functions import Distance, GeometryDistance
 from django.contrib.gis.geos import Point
 from django.contrib.gis.measure import D
-from django.db.models import IntegerField, Q, Value
+from django.db.models import CharField, F, Q, Value
+from django.db.models.functions import MD5, Cast, Collate, Concat
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
 import dora.services.models as models
 from dora import data_inclusion
-from dora.admin_express.models import City
+from dora.admin_express.models import AdminDivisionType, City
 from dora.admin_express.utils import arrdt_to_main_insee_code
+from dora.core.enum_registry import enum_table
 
-from .serializers import SearchResultSerializer
+from .serializers import serialize_search_results
 from .utils import filter_services_by_city_code
 
+logger = logging.getLogger(__name__)
+
+# Rayon de recherche par défaut, et rayon maximum accepté, en km
 MAX_DISTANCE = 50
+MAX_RADIUS = 200
+
+
+@functools.cache
+def _get_di_executor() -> ThreadPoolExecutor:
+    # Pool partagé par toutes les requêtes du worker ; les threads ne sont
+    # démarrés qu'au premier appel (donc après le fork de gunicorn)
+    return ThreadPoolExecutor(
+        max_workers=settings.DATA_INCLUSION_SEARCH_MAX_WORKERS,
+        thread_name_prefix="di-search",
+    )
 
 
-def _filter_and_annotate_dora_services(services, location):
-    # 1) services ayant un lieu de déroulement, à moins de MAX_DISTANCE km
-    services_on_site = (
-        services.filter(location_kinds__value="en-presentiel")
-        .annotate(distance=Distance("geom", location))
-        .filter(distance__lte=D(km=MAX_DISTANCE))
+def _wait_for_di_results(di_future: Future, started_at: float) -> list:
+    deadline = settings.DATA_INCLUSION_SEARCH_DEADLINE_SECONDS
+    timeout = (
+        max(0.0, deadline - (time.monotonic() - started_at))
+        if deadline is not None
+        else None
     )
-    # 2) services sans lieu de déroulement
-    services_remote = (
-        services.filter(
-            Q(location_kinds__value="a-distance")
-            | ~Q(location_kinds__value="en-presentiel")
+    try:
+        return di_future.result(timeout=timeout)
+    except FutureTimeoutError:
+        di_future.cancel()
+        logger.warning(
+            "Recherche data·inclusion abandonnée après %ss, seuls les résultats DORA sont renvoyés",
+            deadline,
         )
-        .exclude(id__in=services_on_site)
-        .distinct()
-        .annotate(distance=Value(None, output_field=IntegerField()))
+        return []
+
+
+def _daily_rank(slug: str, seed: str) -> str:
+    # Rang pseudo-aléatoire, stable sur la journée, départageant les résultats ;
+    # doit rester identique à `_daily_rank_expression`
+    return hashlib.md5(f"{slug}{seed}".encode(), usedforsecurity=False).hexdigest()
+
+
+def _daily_rank_expression(seed: str, slug_field: str = "service__slug"):
+    # Équivalent SQL de `_daily_rank`, comparé octet par octet
+    return Collate(MD5(Concat(slug_field, Value(seed))), "C")
+
+
+def _on_site_filter(location, radius):
+    return Q(
+        location_kinds__contains=["en-presentiel"],
+        geom__dwithin=(location, D(km=radius)),
     )
-    return list(services_on_site) + list(services_remote)
 
 
-def _sort_services(services):
-    on_site_services = []
-    remote_services = []
+def _remote_filter():
+    return Q(location_kinds__contains=["a-distance"]) | ~Q(
+        location_kinds__contains=["en-presentiel"]
+    )
+
+
+def _filter_and_annotate_dora_services(
+    documents, location, seed, radius=MAX_DISTANCE, nearest=None
+):
+    rank = _daily_rank_expression(seed)
+    on_site = _on_site_filter(location, radius)
+    # 1) services ayant un lieu de déroulement, à moins de `radius` km.
+    # `dwithin` (ST_DWithin) et le tri par `GeometryDistance` (opérateur KNN `<->`)
+    # peuvent tous deux s'appuyer sur l'index spatial de `geom`, contrairement
+    # à un filtre sur la distance calculée
+    documents_on_site = (
+        documents.filter(on_site)
+        .annotate(distance=Distance("geom", location), rank=rank)
+        .order_by(GeometryDistance("geom", location), "rank")
+        .values_list("pk", "distance", "rank")
+    )
+    if nearest is not None:
+        # Mode « N plus proches » : seuls les N services sur site les plus
+        # proches sont remontés (les services à distance ne sont pas limités)
+        documents_on_site = documents_on_site[:nearest]
+    # 2) services sans lieu de déroulement (ou dont le lieu est hors du rayon)
+    documents_remote = (
+        documents.filter(_remote_filter())
+        .exclude(on_site)
+        .annotate(rank=rank)
+        .order_by("rank")
+        .values_list("pk", "rank")
+    )
+    return documents_on_site, documents_remote
+
+
+def _filter_and_annotate_federated_services(
+    documents, di_documents, location, seed, radius=MAX_DISTANCE, nearest=None
+):
+    # Même découpage que `_filter_and_annotate_dora_services`, appliqué à l'union
+    # des documents DORA et des services d·i de la copie locale : chaque ligne
+    # est identifiée par sa clé (texte) et son origine
+    on_site = _on_site_filter(location, radius)
+    branches = [
+        (
+            documents,
+            Cast("pk", output_field=CharField()),
+            "dora",
+            _daily_rank_expression(seed),
+        ),
+        (di_documents, F("slug"), "di", _daily_rank_expression(seed, "slug")),
+    ]
+    on_site_branches, remote_branches = [], []
+    for branch_documents, key, origin, rank in branches:
+        annotated = branch_documents.annotate(
+            key=key, origin=Value(origin, output_field=CharField()), rank=rank
+        )
+        on_site_branches.append(
+            annotated.filter(on_site)
+            .annotate(distance=Distance("geom", location))
+            .order_by()
+            .values_list("key", "origin", "distance", "rank")
+        )
+        remote_branches.append(
+            annotated.filter(_remote_filter())
+            .exclude(on_site)
+            .order_by()
+            .values_list("key", "origin", "rank")
+        )
+
+    documents_on_site = (
+        on_site_branches[0]
+        .union(*on_site_branches[1:], all=True)
+        .order_by("distance", "rank")
+    )
+    if nearest is not None:
+        documents_on_site = documents_on_site[:nearest]
+    documents_remote = (
+        remote_branches[0].union(*remote_branches[1:], all=True).order_by("rank")
+    )
+    return documents_on_site, documents_remote
+
+
+class _DoraResults:
+    """Ordered, not yet evaluated, dora search results.
+
+    Only the number of results is fetched upfront; the results themselves are
+    serialized on demand by `SearchResults`.
+    """
+
+    def __init__(self, documents_on_site, documents_remote):
+        self.documents_on_site = documents_on_site
+        self.documents_remote = documents_remote
+        self.on_site_count = documents_on_site.count()
+        self.remote_count = documents_remote.count()
+
+    def on_site_keys(self, n):
+        # (pk, distance en km, rang), par distance croissante puis par rang
+        return (
+            (pk, distance.km, rank) for pk, distance, rank in self.documents_on_site[:n]
+        )
+
+    def remote_keys(self, n):
+        # (pk, rang), par rang
+        return iter(self.documents_remote[:n])
+
+    def serialize(self, distances):
+        # `distances` : {pk: distance en km (ou `None`)} des services à sérialiser
+        return serialize_search_results(
+            models.Service.objects.filter(pk__in=distances.keys()), distances
+        )
 
-    for s in services:
-        if (
-            "en-presentiel" in s["location_kinds"]
-            and s["distance"] is not None
-            and s["distance"] <= MAX_DISTANCE
-        ):
-            on_site_services.append(s)
-        elif "a-distance" in s["location_kinds"] or s["location_kinds"] == []:
-            remote_services.append(s)
-    random.seed(date.today().isoformat())
-    random.shuffle(on_site_services)
-    on_site_services = sorted(on_site_services, key=itemgetter("distance"))
-    on_site_services = iter(on_site_services)
-
-    random.shuffle(remote_services)
-    remote_services = iter(remote_services)
-
-    results = []
-    no_more_on_site = False
-    no_more_remote = False
-    while not no_more_on_site or not no_more_remote:
-        try:
-            results.append(next(on_site_services))
-            results.append(next(on_site_services))
-        except StopIteration:
-            no_more_on_site = True
-        try:
-            results.append(next(remote_services))
-        except StopIteration:
-            no_more_remote = True
-    return results
+
+class _FederatedResults(_DoraResults):
+    """Ordered dora and mirrored data·inclusion search results.
+
+    Keys of dora services are their primary key, keys of mirrored d·i
+    services are ``("di", slug)`` tuples.
+    """
+
+    @staticmethod
+    def _pk(key, origin):
+        return uuid.UUID(key) if origin == "dora" else ("di", key)
+
+    def on_site_keys(self, n):
+        return (
+            (self._pk(key, origin), distance.km, rank)
+            for key, origin, distance, rank in self.documents_on_site[:n]
+        )
+
+    def remote_keys(self, n):
+        return (
+            (self._pk(key, origin), rank)
+            for key, origin, rank in self.documents_remote[:n]
+        )
+
+    def serialize(self, distances):
+        results = super().serialize(
+            {pk: d for pk, d in distances.items() if not isinstance(pk, tuple)}
+        )
+        di_distances = {
+            pk[1]: distance
+            for pk, distance in distances.items()
+            if isinstance(pk, tuple)
+        }
+        for slug, service_data in models.DataInclusionService.objects.filter(
+            slug__in=di_distances.keys()
+        ).values_list("slug", "data"):
+            results[("di", slug)] = data_inclusion.map_search_result(
+                {"distance": di_distances[slug], "service": service_data}
+            )
+        return results
+
+
+def _interleave(on_site_count, remote_count):
+    # Deux services sur site pour un service à distance, jusqu'à épuisement
+    # des deux listes : renvoie `True` pour chaque position occupée par un
+    # service sur site, `False` pour un service à distance
+    while on_site_count or remote_count:
+        taken = min(2, on_site_count)
+        yield from [True] * taken
+        on_site_count -= taken
+        if remote_count:
+            yield False
+            remote_count -= 1
+
+
+class SearchResults(Sequence):
+    """Search results from all repositories, in their display order.
+
+    Services with an on-site location within the search radius are sorted by
+    distance, remote services come in a pseudo-random order that changes every
+    day, and both lists are interleaved (two on-site services for each remote
+    one). Ties are broken by a daily rank, computed the same way in SQL and in
+    Python, so that the order is deterministic for a given day.
+
+    Slicing only serializes the requested dora results: page N of a paginated
+    search fetches the keys of the dora services displayed up to page N, but
+    only serializes those of page N.
+    """
+
+    def __init__(
+        self,
+        dora_results: _DoraResults,
+        di_results: list[dict],
+        seed: str,
+        radius: float = MAX_DISTANCE,
+        nearest: Optional[int] = None,
+    ):
+        self.dora_results = dora_results
+
+        di_on_site = []
+        di_remote = []
+        for result in di_results:
+            if (
+                "en-presentiel" in result["location_kinds"]
+                and result["distance"] is not None
+                and result["distance"] <= radius
+            ):
+                di_on_site.append(
+                    (result, result["distance"], _daily_rank(result["slug"], seed))
+                )
+            elif (
+                "a-distance" in result["location_kinds"] or not result["location_kinds"]
+            ):
+                di_remote.append((result, _daily_rank(result["slug"], seed)))
+        self.di_on_site = sorted(di_on_site, key=itemgetter(1, 2))
+        self.di_remote = sorted(di_remote, key=itemgetter(1))
+
+        self.on_site_count = dora_results.on_site_count + len(self.di_on_site)
+        if nearest is not None:
+            self.on_site_count = min(self.on_site_count, nearest)
+        self.remote_count = dora_results.remote_count + len(self.di_remote)
+
+    def __len__(self):
+        return self.on_site_count + self.remote_count
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index : index + 1 if index != -1 else None][0]
+
+        start, stop, step = index.indices(len(self))
+        if start >= stop:
+            return []
+
+        positions = list(
+            islice(_interleave(self.on_site_count, self.remote_count), stop)
+        )
+        on_site_needed = positions.count(True)
+        remote_needed = len(positions) - on_site_needed
+
+        # Fusion des clés des résultats dora (déjà triées en base) avec celles
+        # des résultats d·i ; une clé dora est `(pk, distance)`, une clé d·i le
+        # résultat lui-même
+        on_site = islice(
+            heapq.merge(
+                (
+                    ((pk, distance), distance, rank)
+                    for pk, distance, rank in self.dora_results.on_site_keys(
+                        on_site_needed
+                    )
+                ),
+                self.di_on_site,
+                key=itemgetter(1, 2),
+            ),
+            on_site_needed,
+        )
+        remote = islice(
+            heapq.merge(
+                (
+                    ((pk, None), rank)
+                    for pk, rank in self.dora_results.remote_keys(remote_needed)
+                ),
+                self.di_remote,
+                key=itemgetter(1),
+            ),
+            remote_needed,
+        )
+        # (`None` si un service a été supprimé depuis le décompte)
+        keys = [
+            next(on_site if is_on_site else remote, (None,))[0]
+            for is_on_site in positions
+        ][start:stop:step]
+
+        serialized = self.dora_results.serialize(
+            dict(key for key in keys if isinstance(key, tuple))
+        )
+        return [
+            serialized[key[0]] if isinstance(key, tuple) else key
+            for key in keys
+            if key is not None and (not isinstance(key, tuple) or key[0] in serialized)
+        ]
 
 
 def _get_di_results(
@@ -89,6 +370,7 @@ def _get_di_results(
     fees: Optional[list[str]] = None,
     lat: Optional[float] = None,
     lon: Optional[float] = None,
+    radius: float = MAX_DISTANCE,
 ) -> list:
     """Search data.inclusion services.
 
@@ -98,6 +380,7 @@ def _get_di_results(
     environment variable.
 
     The other arguments match the input parameters from the classical search.
+    On-site results farther than ``radius`` km are dropped.
 
     This function essentially:
 
@@ -165,9 +448,8 @@ def _get_di_results(
         data_inclusion.map_search_result(result) for result in raw_di_results
     ]
 
-    # FIXME: exclu les services uniquement en présentiel à plus de MAX_DISTANCE
+    # exclut les services uniquement en présentiel à plus de `radius` km
     # du lieu de recherche (ainsi que ceux qui ne retournent pas d'information de distance).
-    # À terme il faudra passer par un rayon configurable
     mapped_di_results = [
         result
         for result in mapped_di_results
@@ -175,7 +457,7 @@ def _get_di_results(
             (
                 "a-distance" not in result["location_kinds"]
                 and result.get("distance") is not None
-                and result["distance"] <= MAX_DISTANCE
+                and result["distance"] <= radius
             )
             or "a-distance" in result["location_kinds"]
         )
@@ -193,28 +475,82 @@ def _get_dora_results(
     fees: Optional[list[str]] = None,
     lat: Optional[float] = None,
     lon: Optional[float] = None,
+    radius: float = MAX_DISTANCE,
+    nearest: Optional[int] = None,
+    seed: Optional[str] = None,
+    with_di_mirror: bool = False,
+    published_after: Optional[date] = None,
 ):
-    services = (
-        models.Service.objects.published()
-        .select_related(
-            "structure",
+    if seed is None:
+        seed = date.today().isoformat()
+
+    # Les filtres portent sur les documents de recherche (une ligne par service
+    # publié et non suspendu), sans jointure sur les tables M2M
+    documents = models.ServiceSearchDocument.objects.all()
+
+    if kinds:
+        documents = documents.filter(kinds__overlap=list(kinds))
+
+    if fees:
+        documents = documents.filter(fee_condition__in=fees)
+
+    if published_after is not None:
+        documents = documents.filter(
+            service__publication_date__date__gt=published_after
         )
-        .prefetch_related(
-            "kinds",
-            "categories",
-            "subcategories",
+
+    search_filter = _search_filter(categories, subcategories)
+    documents = documents.filter(search_filter)
+
+    geofiltered_documents = filter_services_by_city_code(documents, city_code)
+
+    city_code = arrdt_to_main_insee_code(city_code)
+    city = get_object_or_404(City.objects.defer("geom"), pk=city_code)
+
+    # Exclude suspended services
+    # (les documents des services suspendus ne sont purgés qu'une fois par jour)
+    documents_to_display = geofiltered_documents.filter(
+        Q(suspension_date=None) | Q(suspension_date__gte=timezone.now())
+    )
+
+    # À défaut de coordonnées, les distances sont calculées depuis le point
+    # représentatif de la commune plutôt que depuis son contour complet
+    if lat is not None and lon is not None:
+        location = Point(lon, lat, srid=4326)
+    else:
+        location = city.center or city.geom
+
+    if with_di_mirror:
+        documents_on_site, documents_remote = _filter_and_annotate_federated_services(
+            documents_to_display,
+            _get_di_mirror_documents(city, search_filter, kinds=kinds, fees=fees),
+            location,
+            seed,
+            radius=radius,
+            nearest=nearest,
         )
+        return _FederatedResults(documents_on_site, documents_remote)
+
+    documents_on_site, documents_remote = _filter_and_annotate_dora_services(
+        documents_to_display,
+        location,
+        seed,
+        radius=radius,
+        nearest=nearest,
     )
 
-    if kinds:
-        services = services.filter(kinds__value__in=kinds)
+    return _DoraResults(documents_on_site, documents_remote)
 
-    if fees:
-        services = services.filter(fee_condition__value__in=fees)
 
+def _search_filter(
+    categories: Optional[list[str]] = None,
+    subcategories: Optional[list[str]] = None,
+) -> Q:
+    # Filtre sur les thématiques, commun aux documents DORA et aux services d·i
+    # de la copie locale
     categories_filter = Q()
     if categories:
-        categories_filter = Q(categories__value__in=categories)
+        categories_filter = Q(categories__overlap=categories)
 
     subcategories_filter = Q()
     if subcategories:
@@ -223,36 +559,67 @@ def _get_dora_results(
             if subcat == "autre":
                 # Quand on cherche une sous-catégorie de type 'Autre', on veut
                 # aussi remonter les services sans sous-catégorie
-                all_sister_subcats = models.ServiceSubCategory.objects.filter(
-                    value__startswith=f"{cat}--"
-                )
-                subcategories_filter |= Q(subcategories__value=subcategory) | (
-                    Q(categories__value=cat) & ~Q(subcategories__in=all_sister_subcats)
+                all_sister_subcats = [
+                    c.value
+                    for c in enum_table(models.ServiceSubCategory).startswith(
+                        f"{cat}--"
+                    )
+                ]
+                subcategories_filter |= Q(subcategories__contains=[subcategory]) | (
+                    Q(categories__contains=[cat])
+                    & ~Q(subcategories__overlap=all_sister_subcats)
                 )
             else:
-                subcategories_filter |= Q(subcategories__value=subcategory)
+                subcategories_filter |= Q(subcategories__contains=[subcategory])
 
-    services = services.filter(categories_filter | subcategories_filter).distinct()
+    return categories_filter | subcategories_filter
 
-    geofiltered_services = filter_services_by_city_code(services, city_code)
 
-    city_code = arrdt_to_main_insee_code(city_code)
-    city = get_object_or_404(City, pk=city_code)
-
-    # Exclude suspended services
-    services_to_display = geofiltered_services.filter(
-        Q(suspension_date=None) | Q(suspension_date__gte=timezone.now())
-    ).distinct()
+def _get_di_mirror_documents(
+    city: City,
+    search_filter: Q,
+    kinds: Optional[list[str]] = None,
+    fees: Optional[list[str]] = None,
+):
+    # Services d·i de la copie locale, filtrés comme le fait l'API d·i
+    # (sources, zone de diffusion couvrant la commune, suspension)
+    services = models.DataInclusionService.objects.filter(search_filter)
+    if settings.DATA_INCLUSION_STREAM_SOURCES is not None:
+        services = services.filter(source__in=settings.DATA_INCLUSION_STREAM_SOURCES)
+    if kinds:
+        services = services.filter(kinds__overlap=list(kinds))
+    if fees:
+        services = services.filter(fees__overlap=list(fees))
 
-    results = _filter_and_annotate_dora_services(
-        services_to_display,
-        city.geom if not lat or not lon else Point(float(lon), float(lat), srid=4326),
+    services = services.filter(
+        Q(diffusion_zone_type__in=["", AdminDivisionType.COUNTRY])
+        | Q(
+            diffusion_zone_type=AdminDivisionType.CITY, diffusion_zone_details=city.code
+        )
+        | Q(
+            diffusion_zone_type=AdminDivisionType.EPCI,
+            diffusion_zone_details__in=city.epcis,
+        )
+        | Q(
+            diffusion_zone_type=AdminDivisionType.DEPARTMENT,
+            diffusion_zone_details=city.department,
+        )
+        | Q(
+            diffusion_zone_type=AdminDivisionType.REGION,
+            diffusion_zone_details=city.region,
+        )
     )
 
-    return SearchResultSerializer(results, many=True, context={"request": request}).data
+    return services.filter(
+        Q(suspension_date=None) | Q(suspension_date__gt=timezone.now().date())
+    ).exclude(
+        # mêmes exclusions que pour les résultats de l'API d·i
+        geom=None,
+        location_kinds__contains=["en-presentiel"],
+    )
 
 
-def search_services(
+def get_search_results(
     request,
     city_code: str,
     categories: Optional[list[str]] = None,
@@ -262,7 +629,10 @@ def search_services(
     di_client: Optional[data_inclusion.DataInclusionClient] = None,
     lat: Optional[float] = None,
     lon: Optional[float] = None,
-) -> list[dict]:
+    radius: Optional[float] = None,
+    nearest: Optional[int] = None,
+    published_after: Optional[date] = None,
+) -> SearchResults:
     """Search services from all available repositories.
 
     It always includes results from dora own databases.
@@ -270,11 +640,40 @@ def search_services(
     If the ``di_client`` parameter is defined, results from data.inclusion will be
     added using the client dependency.
 
+    When ``DATA_INCLUSION_SEARCH_CONCURRENT`` is enabled, the data.inclusion
+    round-trip runs in a worker thread while dora own results are counted on the
+    current thread. The data.inclusion phase is then bounded by
+    ``DATA_INCLUSION_SEARCH_DEADLINE_SECONDS``: past this deadline, only dora
+    results are returned.
+
+    When ``DATA_INCLUSION_SEARCH_MIRROR`` is enabled, data.inclusion services are
+    searched in their local copy instead (see ``dora.data_inclusion.mirror``),
+    in the same SQL queries as dora services: the client is not called.
+
+    On-site services are searched within ``radius`` km of the search location
+    (``MAX_DISTANCE`` by default). When ``nearest`` is set, only the ``nearest``
+    closest on-site services are kept; remote services are not affected.
+
+    When ``published_after`` is set, only dora services published after this
+    date are returned: data.inclusion services have no publication date, so
+    data.inclusion is not searched.
+
     Returns:
-        A list of search results by SearchResultSerializer.
+        The ordered search results, as a lazy sequence: dora services are only
+        serialized when the sequence is sliced (or iterated over).
     """
-    di_results = (
-        _get_di_results(
+    if radius is None:
+        radius = MAX_DISTANCE
+    if published_after is not None:
+        # les services d·i n'ont pas de date de publication : ils seraient écartés
+        di_client = None
+    # graine de l'ordre pseudo-aléatoire des résultats, qui change chaque jour
+    seed = date.today().isoformat()
+
+    with_di_mirror = di_client is not None and settings.DATA_INCLUSION_SEARCH_MIRROR
+    di_search = (
+        functools.partial(
+            _get_di_results,
             di_client=di_client,
             categories=categories,
             subcategories=subcategories,
@@ -283,11 +682,20 @@ def search_services(
             fees=fees,
             lat=lat,
             lon=lon,
+            radius=radius,
         )
-        if di_client is not None
-        else []
+        if di_client is not None and not with_di_mirror
+        else None
     )
 
+    # La requête d·i ne touche pas à la base de données : elle peut être déportée
+    # dans un thread, contrairement à la recherche DORA qui doit rester sur la
+    # connexion (et la transaction) du thread courant.
+    di_future = None
+    di_started_at = time.monotonic()
+    if di_search is not None and settings.DATA_INCLUSION_SEARCH_CONCURRENT:
+        di_future = _get_di_executor().submit(di_search)
+
     dora_results = _get_dora_results(
         request=request,
         categories=categories,
@@ -297,7 +705,55 @@ def search_services(
         fees=fees,
         lat=lat,
         lon=lon,
+        radius=radius,
+        nearest=nearest,
+        seed=seed,
+        with_di_mirror=with_di_mirror,
+        published_after=published_after,
     )
 
-    all_results = [*dora_results, *di_results]
-    return _sort_services(all_results)
+    if di_future is not None:
+        di_results = _wait_for_di_results(di_future, di_started_at)
+    elif di_search is not None:
+        di_results = di_search()
+    else:
+        di_results = []
+
+    return SearchResults(dora_results, di_results, seed, radius=radius, nearest=nearest)
+
+
+def search_services(
+    request,
+    city_code: str,
+    categories: Optional[list[str]] = None,
+    subcategories: Optional[list[str]] = None,
+    kinds: Optional[list[str]] = None,
+    fees: Optional[list[str]] = None,
+    di_client: Optional[data_inclusion.DataInclusionClient] = None,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    radius: Optional[float] = None,
+    nearest: Optional[int] = None,
+    published_after: Optional[date] = None,
+) -> list[dict]:
+    """Search services from all available repositories.
+
+    See ``get_search_results``.
+
+    Returns:
+        The whole list of search results by SearchResultSerializer.
+    """
+    return get_search_results(
+        request,
+        city_code,
+        categories=categories,
+        subcategories=subcategories,
+        kinds=kinds,
+        fees=fees,
+        di_client=di_client,
+        lat=lat,
+        lon=lon,
+        radius=radius,
+        nearest=nearest,
+        published_after=published_after,
+    )[:]
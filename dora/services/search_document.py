@@ -0,0 +1,102 @@
+"""Documents de recherche des services publiés.
+
+La table ``ServiceSearchDocument`` contient une ligne par service publié et non
+suspendu, avec les valeurs de ses catégories, sous-catégories, types et lieux de
+déroulement sous forme de tableaux (indexés en GIN), sa géolocalisation, ses
+frais et sa zone de diffusion. La recherche peut ainsi filtrer les services sur
+une seule table, avec des prédicats de recouvrement de tableaux, sans passer par
+les tables M2M ni avoir besoin de ``DISTINCT``.
+
+Les documents sont tenus à jour par ``Service.save`` et par les signaux
+``m2m_changed`` (voir ``dora.services.models``), et reconstruits chaque nuit par
+la commande ``rebuild_services_search_documents``, qui écarte aussi les services
+dont la date de suspension est passée.
+"""
+
+from django.db import connection, transaction
+
+from dora.services.enums import ServiceStatus
+
+# Champs M2M recopiés dans les documents, dont il faut suivre les modifications
+SEARCH_DOCUMENT_M2M_FIELDS = ("categories", "subcategories", "kinds", "location_kinds")
+
+_DOCUMENT_SQL = """
+INSERT INTO services_servicesearchdocument (
+    service_id,
+    categories,
+    subcategories,
+    kinds,
+    location_kinds,
+    fee_condition,
+    geom,
+    diffusion_zone_type,
+    diffusion_zone_details,
+    suspension_date
+)
+SELECT
+    s.id,
+    ARRAY(
+        SELECT c.value
+        FROM services_service_categories AS sc
+        INNER JOIN services_servicecategory AS c ON c.id = sc.servicecategory_id
+        WHERE sc.service_id = s.id
+        ORDER BY c.value
+    ),
+    ARRAY(
+        SELECT c.value
+        FROM services_service_subcategories AS sc
+        INNER JOIN services_servicesubcategory AS c ON c.id = sc.servicesubcategory_id
+        WHERE sc.service_id = s.id
+        ORDER BY c.value
+    ),
+    ARRAY(
+        SELECT k.value
+        FROM services_service_kinds AS sk
+        INNER JOIN services_servicekind AS k ON k.id = sk.servicekind_id
+        WHERE sk.service_id = s.id
+        ORDER BY k.value
+    ),
+    ARRAY(
+        SELECT l.value
+        FROM services_service_location_kinds AS sl
+        INNER JOIN services_locationkind AS l ON l.id = sl.locationkind_id
+        WHERE sl.service_id = s.id
+        ORDER BY l.value
+    ),
+    coalesce(f.value, ''),
+    s.geom,
+    s.diffusion_zone_type,
+    s.diffusion_zone_details,
+    s.suspension_date
+FROM services_service AS s
+LEFT JOIN services_servicefee AS f ON f.id = s.fee_condition_id
+WHERE
+    s.status = %(published)s
+    AND NOT s.is_model
+    AND (s.suspension_date IS NULL OR s.suspension_date >= current_date)
+    AND (%(service_id)s::uuid IS NULL OR s.id = %(service_id)s::uuid)
+"""
+
+
+def _document_params(service_id):
+    return {
+        "published": ServiceStatus.PUBLISHED.value,
+        "service_id": str(service_id) if service_id is not None else None,
+    }
+
+
+def update_service_search_document(service_id):
+    """Recalcule le document de recherche d'un service (supprimé s'il n'est plus publié)."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM services_servicesearchdocument WHERE service_id = %s",
+            [str(service_id)],
+        )
+        cursor.execute(_DOCUMENT_SQL, _document_params(service_id))
+
+
+def rebuild_services_search_documents():
+    """Recalcule les documents de recherche de tous les services publiés."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("DELETE FROM services_servicesearchdocument")
+        cursor.execute(_DOCUMENT_SQL, _document_params(None))
@@ -1,15 +1,15 @@
 import logging
 from datetime import timedelta
 
-import requests
 from django.conf import settings
+from django.contrib.postgres.expressions import ArraySubquery
 from django.core.exceptions import ValidationError
 from django.core.files.storage import default_storage
+from django.db.models import OuterRef
 from django.utils.timezone import now
 from rest_framework import exceptions, serializers
 from rest_framework.relations import PrimaryKeyRelatedField
 
-from dora import data_inclusion
 from dora.core.utils import code_insee_to_code_dept
 from dora.services.enums import ServiceStatus
 from dora.structures.models import Structure, StructureMember
@@ -679,11 +679,21 @@ class SavedSearchSerializer(serializers.ModelSerializer):
         ]
 
     def get_new_services_count(self, obj):
-        return len(
-            obj.get_recent_services(
-                (now() - timedelta(days=settings.RECENT_SERVICES_CUTOFF_DAYS)).date()
+        # Compteur pré-calculé (voir `update_saved_searches_new_services_counts`) ;
+        # il n'est calculé ici que pour une recherche qui vient d'être créée ou modifiée
+        if obj.new_services_count is None:
+            obj.new_services_count = len(
+                obj.get_recent_services(
+                    (
+                        now() - timedelta(days=settings.RECENT_SERVICES_CUTOFF_DAYS)
+                    ).date()
+                )
             )
-        )
+            SavedSearch.objects.filter(pk=obj.pk).update(
+                new_services_count=obj.new_services_count,
+                new_services_count_date=now(),
+            )
+        return obj.new_services_count
 
 
 class BookmarkListSerializer(serializers.ModelSerializer):
@@ -730,19 +740,8 @@ class BookmarkSerializer(BookmarkListSerializer):
                 "source": obj.service.source,
             }
         else:
-            source_di, di_service_id = obj.di_id.split("--")
-            di_client = (
-                data_inclusion.di_client_factory() if not settings.IS_TESTING else None
-            )
-
-            try:
-                di_service = (
-                    di_client.retrieve_service(source=source_di, id=di_service_id)
-                    if di_client is not None
-                    else None
-                )
-            except requests.ConnectionError:
-                return {}
+            # fiches d·i récupérées en amont, en parallèle (voir `BookmarkViewSet.list`)
+            di_service = self.context.get("di_services", {}).get(obj.di_id)
             if di_service is None:
                 return {}
             return {
@@ -786,3 +785,95 @@ class SearchResultSerializer(ServiceListSerializer):
     def get_coordinates(self, obj):
         if obj.geom:
             return (obj.geom.x, obj.geom.y)
+
+
+# Champs de `SearchResultSerializer`, lus directement en base par
+# `serialize_search_results`
+_SEARCH_RESULT_VALUES = [
+    "pk",
+    "address1",
+    "address2",
+    "city",
+    "diffusion_zone_type",
+    "geom",
+    "modification_date",
+    "name",
+    "postal_code",
+    "publication_date",
+    "short_desc",
+    "slug",
+    "status",
+    "structure__address1",
+    "structure__address2",
+    "structure__city",
+    "structure__department",
+    "structure__name",
+    "structure__postal_code",
+    "structure__short_desc",
+    "structure__siret",
+    "structure__slug",
+    "structure__url",
+]
+
+_datetime_field = serializers.DateTimeField()
+
+
+def _to_datetime_representation(value):
+    return _datetime_field.to_representation(value) if value is not None else None
+
+
+def serialize_search_results(services, distances):
+    """Fast path equivalent of ``SearchResultSerializer(services, many=True).data``.
+
+    Results are built straight from a ``values()`` projection of ``services``
+    (a ``Service`` queryset), with location kinds aggregated in an array column,
+    instead of instantiating and serializing every model.
+
+    ``distances`` maps the primary key of each service to its distance from the
+    search location, in km (or ``None``).
+
+    Returns:
+        A dict of search results, keyed by service primary key.
+    """
+    location_kinds = (
+        Service.location_kinds.through.objects.filter(service=OuterRef("pk"))
+        .order_by("pk")
+        .values("locationkind__value")
+    )
+    rows = services.values(*_SEARCH_RESULT_VALUES).annotate(
+        location_kinds_values=ArraySubquery(location_kinds)
+    )
+    results = {}
+    for row in rows:
+        distance = distances[row["pk"]]
+        geom = row["geom"]
+        results[row["pk"]] = {
+            "address1": row["address1"],
+            "address2": row["address2"],
+            "city": row["city"],
+            "coordinates": (geom.x, geom.y) if geom else None,
+            "diffusion_zone_type": row["diffusion_zone_type"],
+            "distance": distance,
+            "location_kinds": row["location_kinds_values"],
+            "modification_date": _to_datetime_representation(row["modification_date"]),
+            "name": row["name"],
+            "postal_code": row["postal_code"],
+            "publication_date": _to_datetime_representation(row["publication_date"]),
+            "short_desc": row["short_desc"],
+            "slug": row["slug"],
+            "status": row["status"],
+            "structure_info": {
+                "address1": row["structure__address1"],
+                "address2": row["structure__address2"],
+                "city": row["structure__city"],
+                "department": row["structure__department"],
+                "name": row["structure__name"],
+                "postal_code": row["structure__postal_code"],
+                "short_desc": row["structure__short_desc"],
+                "siret": row["structure__siret"],
+                "slug": row["structure__slug"],
+                "url": row["structure__url"],
+            },
+            "structure": row["structure__slug"],
+        }
+    return results
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from unittest import mock
 
 from django.utils.timezone import now
 from model_bakery import baker
@@ -10,9 +11,11 @@ from dora.core.test_utils import (
     make_structure,
     make_user,
 )
+from dora.data_inclusion.test_utils import FakeDataInclusionClient, make_di_service_data
 
 from ..enums import ServiceStatus
 from ..models import Bookmark
+from ..views import BookmarkViewSet
 
 
 class ServiceBookmarkTestCase(APITestCase):
@@ -247,3 +250,27 @@ class ServiceBookmarkTestCase(APITestCase):
         response = self.client.get("/bookmarks/")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data), 2)
+
+    def test_list_di_bookmarks(self):
+        user = make_user()
+        self.client.force_authenticate(user=user)
+        di_services = [
+            make_di_service_data(source="di_source", id="1", nom="Service 1"),
+            make_di_service_data(source="di_source", id="2", nom="Service 2"),
+        ]
+        for di_id in ["di_source--1", "di_source--2", "di_source--inconnu"]:
+            baker.make("services.Bookmark", di_id=di_id, user=user)
+
+        with mock.patch.object(
+            BookmarkViewSet,
+            "get_di_client",
+            return_value=FakeDataInclusionClient(services=di_services),
+        ):
+            response = self.client.get("/bookmarks/")
+
+        self.assertEqual(response.status_code, 200)
+        services = {b["slug"]: b["service"] for b in response.data}
+        self.assertEqual(services["di_source--1"]["name"], "Service 1")
+        self.assertEqual(services["di_source--2"]["name"], "Service 2")
+        self.assertEqual(services["di_source--2"]["structure_name"], "Rouge Empire")
+        self.assertEqual(services["di_source--inconnu"], {})
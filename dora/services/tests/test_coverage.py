@@ -0,0 +1,137 @@
+from model_bakery import baker
+
+from dora.admin_express.models import AdminDivisionType
+from dora.core.test_utils import make_published_service, make_service
+from dora.services.coverage import rebuild_services_coverage
+from dora.services.enums import ServiceStatus
+from dora.services.models import Service, ServiceCoverage
+from dora.services.utils import (
+    filter_services_by_city_code,
+    filter_services_by_department,
+    filter_services_by_region,
+)
+
+
+def make_admin_divisions():
+    baker.make("Region", code="76")
+    baker.make("Region", code="11")
+    baker.make("Department", code="31", region="76")
+    baker.make("Department", code="75", region="11")
+    baker.make("EPCI", code="243100518", departments=["31"], regions=["76"])
+    baker.make("City", code="31555", department="31", region="76", epcis=["243100518"])
+    baker.make("City", code="31069", department="31", region="76", epcis=[])
+    baker.make("City", code="75056", department="75", region="11", epcis=[])
+
+
+def coverage_of(service):
+    return set(
+        ServiceCoverage.objects.filter(service=service).values_list(
+            "admin_division_type", "admin_division_code"
+        )
+    )
+
+
+def test_city_coverage_includes_parents():
+    make_admin_divisions()
+    service = make_published_service(
+        diffusion_zone_type=AdminDivisionType.CITY, diffusion_zone_details="31555"
+    )
+    assert coverage_of(service) == {
+        (AdminDivisionType.CITY, "31555"),
+        (AdminDivisionType.EPCI, "243100518"),
+        (AdminDivisionType.DEPARTMENT, "31"),
+        (AdminDivisionType.REGION, "76"),
+    }
+
+
+def test_department_coverage_includes_children():
+    make_admin_divisions()
+    service = make_published_service(
+        diffusion_zone_type=AdminDivisionType.DEPARTMENT, diffusion_zone_details="31"
+    )
+    assert coverage_of(service) == {
+        (AdminDivisionType.CITY, "31555"),
+        (AdminDivisionType.CITY, "31069"),
+        (AdminDivisionType.EPCI, "243100518"),
+        (AdminDivisionType.DEPARTMENT, "31"),
+        (AdminDivisionType.REGION, "76"),
+    }
+
+
+def test_country_coverage_is_a_single_row():
+    make_admin_divisions()
+    service = make_published_service(diffusion_zone_type=AdminDivisionType.COUNTRY)
+    assert coverage_of(service) == {(AdminDivisionType.COUNTRY, "")}
+
+
+def test_unpublished_services_have_no_coverage():
+    make_admin_divisions()
+    service = make_service(
+        status=ServiceStatus.DRAFT,
+        diffusion_zone_type=AdminDivisionType.CITY,
+        diffusion_zone_details="31555",
+    )
+    assert coverage_of(service) == set()
+
+    service.status = ServiceStatus.PUBLISHED
+    service.save()
+    assert (AdminDivisionType.CITY, "31555") in coverage_of(service)
+
+    service.status = ServiceStatus.ARCHIVED
+    service.save()
+    assert coverage_of(service) == set()
+
+
+def test_coverage_follows_diffusion_zone_changes():
+    make_admin_divisions()
+    service = make_published_service(
+        diffusion_zone_type=AdminDivisionType.CITY, diffusion_zone_details="31555"
+    )
+    service = Service.objects.get(pk=service.pk)
+    service.diffusion_zone_type = AdminDivisionType.REGION
+    service.diffusion_zone_details = "11"
+    service.save()
+    assert coverage_of(service) == {
+        (AdminDivisionType.CITY, "75056"),
+        (AdminDivisionType.DEPARTMENT, "75"),
+        (AdminDivisionType.REGION, "11"),
+    }
+
+
+def test_rebuild_services_coverage():
+    make_admin_divisions()
+    service = make_published_service(
+        diffusion_zone_type=AdminDivisionType.EPCI, diffusion_zone_details="243100518"
+    )
+    expected = coverage_of(service)
+    ServiceCoverage.objects.all().delete()
+
+    rebuild_services_coverage()
+
+    assert coverage_of(service) == expected
+
+
+def test_filter_services_by_admin_division():
+    make_admin_divisions()
+    in_toulouse = make_published_service(
+        diffusion_zone_type=AdminDivisionType.CITY, diffusion_zone_details="31555"
+    )
+    in_occitanie = make_published_service(
+        diffusion_zone_type=AdminDivisionType.REGION, diffusion_zone_details="76"
+    )
+    in_paris = make_published_service(
+        diffusion_zone_type=AdminDivisionType.CITY, diffusion_zone_details="75056"
+    )
+    everywhere = make_published_service(diffusion_zone_type=AdminDivisionType.COUNTRY)
+    services = Service.objects.published()
+
+    assert set(filter_services_by_city_code(services, "31069")) == {
+        in_occitanie,
+        everywhere,
+    }
+    assert set(filter_services_by_department(services, "31")) == {
+        in_toulouse,
+        in_occitanie,
+        everywhere,
+    }
+    assert set(filter_services_by_region(services, "11")) == {in_paris, everywhere}
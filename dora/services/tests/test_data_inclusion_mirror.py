@@ -0,0 +1,115 @@
+from unittest import mock
+
+from django.contrib.gis.geos import MultiPolygon, Point
+from django.core.management import call_command
+from model_bakery import baker
+
+from dora.core.test_utils import make_published_service
+from dora.data_inclusion.mirror import sync_data_inclusion_services
+from dora.data_inclusion.test_utils import FakeDataInclusionClient, make_di_service_data
+from dora.services.models import DataInclusionService, LocationKind
+from dora.services.search import search_services
+
+TOULOUSE = {"latitude": 43.6042600, "longitude": 1.4436700}
+
+
+def test_sync_is_incremental():
+    updated = make_di_service_data(thematiques=["famille--garde-denfants"])
+    deleted = make_di_service_data()
+    di_client = FakeDataInclusionClient(services=[updated, deleted])
+
+    counts = sync_data_inclusion_services(di_client)
+    assert counts == {"created": 2, "updated": 0, "unchanged": 0, "deleted": 0}
+
+    service = DataInclusionService.objects.get(slug=f"odspep--{updated['id']}")
+    assert service.categories == ["famille"]
+    assert service.subcategories == ["famille--garde-denfants"]
+    assert service.location_kinds == ["en-presentiel"]
+    assert (service.geom.x, service.geom.y) == (
+        updated["longitude"],
+        updated["latitude"],
+    )
+
+    updated["nom"] = "Nouveau nom"
+    created = make_di_service_data()
+    di_client.services = [updated, created]
+
+    counts = sync_data_inclusion_services(di_client)
+    assert counts == {"created": 1, "updated": 1, "unchanged": 0, "deleted": 1}
+    assert sorted(
+        DataInclusionService.objects.values_list("slug", flat=True)
+    ) == sorted([f"odspep--{updated['id']}", f"odspep--{created['id']}"])
+    service.refresh_from_db()
+    assert service.data["nom"] == "Nouveau nom"
+
+    counts = sync_data_inclusion_services(di_client)
+    assert counts == {"created": 0, "updated": 0, "unchanged": 2, "deleted": 0}
+
+
+def test_sync_leaves_other_sources_alone():
+    di_client = FakeDataInclusionClient(
+        services=[make_di_service_data(), make_di_service_data(source="soliguide")]
+    )
+    sync_data_inclusion_services(di_client)
+    di_client.services = []
+
+    counts = sync_data_inclusion_services(di_client, sources=["soliguide"])
+
+    assert counts["deleted"] == 1
+    assert list(DataInclusionService.objects.values_list("source", flat=True)) == [
+        "odspep"
+    ]
+
+
+def test_sync_command_requires_the_mirror(settings):
+    settings.DATA_INCLUSION_SEARCH_MIRROR = False
+
+    with mock.patch(
+        "dora.services.management.commands.sync_data_inclusion_services"
+        ".di_client_factory"
+    ) as di_client_factory:
+        call_command("sync_data_inclusion_services")
+
+    di_client_factory.assert_not_called()
+
+
+def test_search_mirrored_services(settings):
+    settings.DATA_INCLUSION_SEARCH_MIRROR = True
+    settings.DATA_INCLUSION_STREAM_SOURCES = None
+    toulouse_center = Point(TOULOUSE["longitude"], TOULOUSE["latitude"], srid=4326)
+    baker.make("Region", code="76")
+    baker.make("Department", code="31", region="76")
+    baker.make(
+        "City",
+        code="31555",
+        department="31",
+        region="76",
+        geom=MultiPolygon(toulouse_center.buffer(0.05)),
+    )
+
+    dora_service = make_published_service(
+        geom=toulouse_center,
+        diffusion_zone_type="country",
+    )
+    dora_service.location_kinds.set([LocationKind.objects.get(value="en-presentiel")])
+    di_service = make_di_service_data(
+        zone_diffusion_type="commune", zone_diffusion_code="31555", **TOULOUSE
+    )
+    other_city_service = make_di_service_data(
+        zone_diffusion_type="commune", zone_diffusion_code="46240", **TOULOUSE
+    )
+    sync_data_inclusion_services(
+        FakeDataInclusionClient(services=[di_service, other_city_service])
+    )
+
+    # l'API d·i n'est pas interrogée
+    results = search_services(
+        request=None, city_code="31555", di_client=FakeDataInclusionClient()
+    )
+
+    assert {result["slug"] for result in results} == {
+        dora_service.slug,
+        f"odspep--{di_service['id']}",
+    }
+    di_result = next(result for result in results if result.get("type") == "di")
+    assert di_result["distance"] < 5
@@ -0,0 +1,120 @@
+import pytest
+from django.core.cache import cache
+from model_bakery import baker
+
+from dora.core.test_utils import make_structure, make_user
+from dora.services.models import AccessCondition, ServiceCategory
+
+
+@pytest.fixture(autouse=True)
+def local_cache(settings):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def get_options(api_client, etag=None):
+    headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+    return api_client.get("/services-options/", **headers)
+
+
+def access_conditions(response):
+    return [c["value"] for c in response.data["access_conditions"]]
+
+
+def test_not_modified_options_are_not_queried(api_client, django_assert_num_queries):
+    user = make_user()
+    make_structure(user)
+    api_client.force_authenticate(user=user)
+
+    response = get_options(api_client)
+    assert response.status_code == 200
+    etag = response["ETag"]
+
+    with django_assert_num_queries(0):
+        response = get_options(api_client, etag)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+    # le contenu est servi depuis le cache
+    with django_assert_num_queries(0):
+        response = get_options(api_client, '"autre"')
+    assert response.status_code == 200
+    assert response["ETag"] == etag
+
+
+def test_choice_changes_invalidate_options(
+    api_client, django_capture_on_commit_callbacks
+):
+    user = make_user()
+    structure = make_structure(user)
+    api_client.force_authenticate(user=user)
+    etag = get_options(api_client)["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        condition = baker.make(AccessCondition, structure=structure)
+
+    response = get_options(api_client, etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert condition.id in access_conditions(response)
+
+
+def test_enum_changes_invalidate_options(
+    api_client, django_capture_on_commit_callbacks
+):
+    etag = get_options(api_client)["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ServiceCategory.objects.create(value="nouvelle", label="Nouvelle")
+
+    response = get_options(api_client, etag)
+    assert response.status_code == 200
+    assert "nouvelle" in [c["value"] for c in response.data["categories"]]
+
+
+def test_options_are_invalidated_on_commit(
+    api_client, django_capture_on_commit_callbacks
+):
+    etag = get_options(api_client)["ETag"]
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        ServiceCategory.objects.create(value="nouvelle", label="Nouvelle")
+        # pas de nouvelle version avant la validation de la transaction
+        assert get_options(api_client, etag).status_code == 304
+
+    for callback in callbacks:
+        callback()
+    assert get_options(api_client, etag).status_code == 200
+
+
+def test_options_are_cached_by_user_scope(api_client):
+    user = make_user()
+    other_user = make_user()
+    condition = baker.make(AccessCondition, structure=make_structure(user))
+    make_structure(other_user)
+
+    api_client.force_authenticate(user=user)
+    etag = get_options(api_client)["ETag"]
+    api_client.force_authenticate(user=other_user)
+    response = get_options(api_client, etag)
+
+    assert response.status_code == 200
+    assert condition.id not in access_conditions(response)
+
+
+def test_new_membership_invalidates_user_scope(api_client):
+    user = make_user()
+    structure = make_structure()
+    condition = baker.make(AccessCondition, structure=structure)
+    api_client.force_authenticate(user=user)
+    etag = get_options(api_client)["ETag"]
+
+    baker.make("structures.StructureMember", user=user, structure=structure)
+
+    response = get_options(api_client, etag)
+    assert response.status_code == 200
+    assert condition.id in access_conditions(response)
@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from model_bakery import baker
+
+from dora.core.test_utils import make_published_service, make_service
+from dora.services.enums import ServiceStatus
+from dora.services.models import LocationKind, ServiceKind, ServiceSearchDocument
+from dora.services.search_document import rebuild_services_search_documents
+
+
+def test_document_follows_m2m_changes():
+    baker.make("ServiceCategory", value="cat1", label="cat1")
+    cat2 = baker.make("ServiceCategory", value="cat2", label="cat2")
+    baker.make("ServiceSubCategory", value="cat1--sub1", label="cat1--sub1")
+    kind = baker.make(ServiceKind, value="kind1", label="kind1")
+    service = make_published_service(categories="cat1", subcategories="cat1--sub1")
+    service.kinds.set([kind])
+    service.location_kinds.set([LocationKind.objects.get(value="a-distance")])
+
+    document = ServiceSearchDocument.objects.get(pk=service.pk)
+    assert document.categories == ["cat1"]
+    assert document.subcategories == ["cat1--sub1"]
+    assert document.kinds == ["kind1"]
+    assert document.location_kinds == ["a-distance"]
+
+    service.categories.add(cat2)
+    service.location_kinds.clear()
+
+    document.refresh_from_db()
+    assert document.categories == ["cat1", "cat2"]
+    assert document.location_kinds == []
+
+
+def test_only_published_services_have_a_document():
+    service = make_service(status=ServiceStatus.DRAFT)
+    assert not ServiceSearchDocument.objects.filter(pk=service.pk).exists()
+
+    service.status = ServiceStatus.PUBLISHED
+    service.save()
+    assert ServiceSearchDocument.objects.filter(pk=service.pk).exists()
+
+    service.status = ServiceStatus.ARCHIVED
+    service.save()
+    assert not ServiceSearchDocument.objects.filter(pk=service.pk).exists()
+
+
+def test_rebuild_drops_suspended_services():
+    service = make_published_service(
+        suspension_date=timezone.now().date() + timedelta(days=1)
+    )
+    suspended_service = make_published_service()
+    assert ServiceSearchDocument.objects.count() == 2
+
+    suspended_service.suspension_date = timezone.now().date() - timedelta(days=1)
+    suspended_service.save()
+    ServiceSearchDocument.objects.all().delete()
+
+    rebuild_services_search_documents()
+
+    assert list(ServiceSearchDocument.objects.values_list("pk", flat=True)) == [
+        service.pk
+    ]
@@ -0,0 +1,39 @@
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from rest_framework.renderers import JSONRenderer
+
+from dora.core.test_utils import make_published_service
+from dora.services.models import LocationKind, Service
+from dora.services.serializers import SearchResultSerializer, serialize_search_results
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+def test_lean_serializer_output_is_identical():
+    on_site = make_published_service(
+        geom=Point(1.4436700, 43.6042600, srid=4326),
+    )
+    on_site.location_kinds.set([LocationKind.objects.get(value="en-presentiel")])
+    remote = make_published_service(publication_date=None)
+    remote.location_kinds.set([LocationKind.objects.get(value="a-distance")])
+    # les distances sont lues en base en mètres
+    raw_distances = {on_site.pk: D(m=1234.5678), remote.pk: None}
+    distances = {
+        pk: distance.km if distance is not None else None
+        for pk, distance in raw_distances.items()
+    }
+
+    services = list(Service.objects.filter(pk__in=distances))
+    for service in services:
+        service.distance = raw_distances[service.pk]
+    expected = {
+        service.pk: render(SearchResultSerializer(service).data) for service in services
+    }
+
+    results = serialize_search_results(
+        Service.objects.filter(pk__in=distances), distances
+    )
+
+    assert {pk: render(result) for pk, result in results.items()} == expected
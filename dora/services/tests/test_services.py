@@ -1,4 +1,6 @@
+import time
 from datetime import timedelta
+from unittest import mock
 
 import requests
 from django.contrib.gis.geos import MultiPolygon, Point
@@ -8,8 +10,9 @@ from django.utils import timezone
 from model_bakery import baker
 from rest_framework.test import APIRequestFactory, APITestCase
 
-from dora.admin_express.models import AdminDivisionType
+from dora.admin_express.models import AdminDivisionType, City
 from dora.core.test_utils import make_model, make_service, make_structure
+from dora.data_inclusion import CachedDataInclusionClient
 from dora.data_inclusion.test_utils import FakeDataInclusionClient, make_di_service_data
 from dora.services.enums import ServiceStatus
 from dora.services.migration_utils import (
@@ -1170,6 +1173,60 @@ class DataInclusionSearchTestCase(APITestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]["slug"], service_dora.slug)
 
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_close_coordinates_share_data_inclusion_cache_entry(self):
+        self.make_di_service(code_insee=self.city1.code)
+        self.di_client.search_services = mock.Mock(wraps=self.di_client.search_services)
+        di_client = CachedDataInclusionClient(self.di_client, ttl_seconds=60)
+
+        for lat, lon in [("48.8566", "2.3522"), ("48.85660", "2.352201")]:
+            request = self.factory.get(
+                "/search/", {"city": self.city1.code, "lat": lat, "lon": lon}
+            )
+            response = search(request, di_client=di_client)
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.di_client.search_services.call_count, 1)
+
+    @override_settings(DATA_INCLUSION_SEARCH_CONCURRENT=False)
+    def test_search_with_data_inclusion_and_dora_sequential(self):
+        service_dora = make_service(
+            status=ServiceStatus.PUBLISHED,
+            diffusion_zone_type=AdminDivisionType.CITY,
+            diffusion_zone_details=self.city1.code,
+        )
+        service_data = self.make_di_service(code_insee=self.city1.code)
+        request = self.factory.get("/search/", {"city": self.city1.code})
+        response = self.search(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+        d = response.data
+        assert service_dora.slug in [d[0]["slug"], d[1]["slug"]]
+        assert service_data["id"] in [d[0].get("id"), d[1].get("id")]
+
+    @override_settings(DATA_INCLUSION_SEARCH_DEADLINE_SECONDS=0.05)
+    def test_data_inclusion_deadline_exceeded(self):
+        service_dora = make_service(
+            status=ServiceStatus.PUBLISHED,
+            diffusion_zone_type=AdminDivisionType.CITY,
+            diffusion_zone_details=self.city1.code,
+        )
+        self.make_di_service(code_insee=self.city1.code)
+
+        class SlowDataInclusionClient(FakeDataInclusionClient):
+            def search_services(self, **kwargs):
+                time.sleep(0.5)
+                return super().search_services(**kwargs)
+
+        di_client = SlowDataInclusionClient(services=self.di_client.services)
+        request = self.factory.get("/search/", {"city": self.city1.code})
+        response = search(request, di_client=di_client)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["slug"], service_dora.slug)
+
     # TODO: FIXME
     # def test_on_site_first(self):
     #     self.make_di_service(
@@ -2330,6 +2387,23 @@ class ServiceSearchOrderingTestCase(APITestCase):
         response = self.client.get("/search/?city=31555")
         self.assertTrue(40 < response.data[1]["distance"] < 50)
 
+    def test_distance_from_city_center(self):
+        toulouse = City.objects.get(code="31555")
+        self.assertTrue(toulouse.geom.contains(toulouse.center))
+
+        service = make_service(
+            slug="s1",
+            status=ServiceStatus.PUBLISHED,
+            diffusion_zone_type=AdminDivisionType.COUNTRY,
+            geom=self.point_in_toulouse,
+        )
+        service.location_kinds.set([LocationKind.objects.get(value="en-presentiel")])
+
+        # la distance est calculée depuis le point représentatif de la commune,
+        # et non plus depuis son contour (qui contient le service)
+        response = self.client.get("/search/?city=31555")
+        self.assertTrue(0 < response.data[0]["distance"] < 5)
+
     def test_distance_no_more_than_100km(self):
         self.assertEqual(Service.objects.all().count(), 0)
         service1 = make_service(
@@ -2351,6 +2425,57 @@ class ServiceSearchOrderingTestCase(APITestCase):
         response = self.client.get("/search/?city=31555")
         self.assertEqual(len(response.data), 1)
 
+    def test_search_radius_can_be_extended(self):
+        service1 = make_service(
+            slug="s1",
+            status=ServiceStatus.PUBLISHED,
+            diffusion_zone_type=AdminDivisionType.COUNTRY,
+            geom=self.point_in_toulouse,
+        )
+        service1.location_kinds.set([LocationKind.objects.get(value="en-presentiel")])
+
+        service2 = make_service(
+            slug="s2",
+            status=ServiceStatus.PUBLISHED,
+            diffusion_zone_type=AdminDivisionType.COUNTRY,
+            geom=self.rocamadour_center,
+        )
+        service2.location_kinds.set([LocationKind.objects.get(value="en-presentiel")])
+
+        response = self.client.get("/search/?city=31555&radius=150")
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(response.data[1]["slug"], service2.slug)
+
+        response = self.client.get("/search/?city=31555&radius=1")
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["slug"], service1.slug)
+
+    def test_search_nearest(self):
+        template = {
+            "status": ServiceStatus.PUBLISHED,
+            "diffusion_zone_type": AdminDivisionType.COUNTRY,
+        }
+        service1 = make_service(slug="s1", geom=self.montauban_center, **template)
+        service1.location_kinds.set([LocationKind.objects.get(value="en-presentiel")])
+        service2 = make_service(slug="s2", geom=self.blagnac_center, **template)
+        service2.location_kinds.set([LocationKind.objects.get(value="en-presentiel")])
+        service3 = make_service(slug="s3", geom=self.point_in_toulouse, **template)
+        service3.location_kinds.set([LocationKind.objects.get(value="a-distance")])
+
+        response = self.client.get("/search/?city=31555&nearest=1")
+        # les services à distance ne sont pas concernés par la limite
+        self.assertEqual(
+            [s["slug"] for s in response.data], [service2.slug, service3.slug]
+        )
+
+    def test_search_invalid_radius(self):
+        response = self.client.get("/search/?city=31555&radius=abc")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/search/?city=31555&radius=nan")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/search/?city=31555&nearest=0")
+        self.assertEqual(response.status_code, 400)
+
     def test_displayed_if_remote_and_onsite_more_than_100km(self):
         self.assertEqual(Service.objects.all().count(), 0)
         service = make_service(
@@ -2387,6 +2512,42 @@ class ServiceSearchOrderingTestCase(APITestCase):
         response = self.client.get("/search/?city=31555")
         self.assertEqual(len(response.data), 1)
 
+    def test_paginated_search_matches_full_search(self):
+        template = {
+            "status": ServiceStatus.PUBLISHED,
+            "diffusion_zone_type": AdminDivisionType.DEPARTMENT,
+            "diffusion_zone_details": "31",
+        }
+        for i, point in enumerate(
+            [
+                self.toulouse_center,
+                self.point_in_toulouse,
+                self.blagnac_center,
+                self.montauban_center,
+            ]
+        ):
+            service = make_service(slug=f"on-site-{i}", geom=point, **template)
+            service.location_kinds.set(
+                [LocationKind.objects.get(value="en-presentiel")]
+            )
+        for i in range(3):
+            service = make_service(slug=f"remote-{i}", **template)
+            service.location_kinds.set([LocationKind.objects.get(value="a-distance")])
+
+        response = self.client.get("/search/?city=31555")
+        all_slugs = [s["slug"] for s in response.data]
+        self.assertEqual(len(all_slugs), 7)
+        # l'ordre est stable d'une requête à l'autre
+        response = self.client.get("/search/?city=31555")
+        self.assertEqual([s["slug"] for s in response.data], all_slugs)
+
+        paginated_slugs = []
+        for page in range(1, 4):
+            response = self.client.get(f"/search/?city=31555&page_size=3&page={page}")
+            self.assertEqual(response.data["count"], 7)
+            paginated_slugs += [s["slug"] for s in response.data["results"]]
+        self.assertEqual(paginated_slugs, all_slugs)
+
     def test_intercalate_remote(self):
         self.assertEqual(Service.objects.all().count(), 0)
         template = {
@@ -1,5 +1,6 @@
 from datetime import timedelta
 from io import StringIO
+from unittest import mock
 
 from django.core import mail
 from django.core.management import call_command
@@ -13,6 +14,7 @@ from dora.services.enums import ServiceStatus
 from dora.services.management.commands.send_saved_searches_notifications import (
     get_saved_search_notifications_to_send,
 )
+from dora.services.search import search_services
 
 from ..models import SavedSearch, SavedSearchFrequency
 
@@ -695,3 +697,147 @@ class ServiceSavedSearchNotificationTestCase(APITestCase):
 
         # ALORS je n'ai pas d'email
         self.assertEqual(len(mail.outbox), 0)
+
+    def make_saved_search(self, **kwargs):
+        return baker.make(
+            "SavedSearch",
+            user=baker.make("users.User", is_valid=True),
+            frequency=SavedSearchFrequency.MONTHLY,
+            city_label=SAVE_SEARCH_ARGS.get("city_label"),
+            city_code=SAVE_SEARCH_ARGS.get("city_code"),
+            last_notification_date=timezone.now() - timedelta(days=40),
+            **kwargs,
+        )
+
+    def test_identical_searches_are_evaluated_once(self):
+        # ÉTANT DONNÉ deux utilisateurs ayant sauvegardé la même recherche
+        self.make_saved_search()
+        self.make_saved_search()
+        make_service(
+            name=self.service_name,
+            status=ServiceStatus.PUBLISHED,
+            diffusion_zone_type=AdminDivisionType.CITY,
+            publication_date=timezone.now() - timedelta(days=20),
+            diffusion_zone_details=SAVE_SEARCH_ARGS.get("city_code"),
+        )
+
+        # QUAND j'envoie les notifications
+        with mock.patch(
+            "dora.services.saved_searches.search_services",
+            wraps=search_services,
+        ) as search:
+            self.call_command()
+
+        # ALORS la recherche n'est exécutée qu'une fois, et chacun reçoit un e-mail
+        self.assertEqual(search.call_count, 1)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_notifications_are_not_sent_twice(self):
+        # ÉTANT DONNÉ deux recherches sauvegardées avec de nouveaux services
+        saved_searches = [self.make_saved_search(), self.make_saved_search()]
+        make_service(
+            name=self.service_name,
+            status=ServiceStatus.PUBLISHED,
+            diffusion_zone_type=AdminDivisionType.CITY,
+            publication_date=timezone.now() - timedelta(days=20),
+            diffusion_zone_details=SAVE_SEARCH_ARGS.get("city_code"),
+        )
+
+        # QUAND l'envoi du second e-mail échoue
+        with mock.patch(
+            "dora.services.management.commands.send_saved_searches_notifications.send_mail",
+            side_effect=[None, ConnectionError()],
+        ):
+            with self.assertRaises(ConnectionError):
+                self.call_command()
+
+        # ALORS seule la seconde notification est envoyée à la reprise
+        notified = [
+            s.pk
+            for s in saved_searches
+            if SavedSearch.objects.get(pk=s.pk).last_notification_date
+            == timezone.localdate()
+        ]
+        self.assertEqual(len(notified), 1)
+        self.call_command()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            mail.outbox[0].to,
+            [next(s for s in saved_searches if s.pk not in notified).user.email],
+        )
+
+
+class SavedSearchNewServicesCountTestCase(APITestCase):
+    def setUp(self):
+        baker.make(Department, code="58", name="Nièvre")
+        baker.make(City, code="58211", name="Poil")
+        self.user = baker.make("users.User", is_valid=True)
+        self.client.force_authenticate(user=self.user)
+        self.saved_search = baker.make(
+            "SavedSearch",
+            user=self.user,
+            city_label=SAVE_SEARCH_ARGS.get("city_label"),
+            city_code=SAVE_SEARCH_ARGS.get("city_code"),
+        )
+
+    def update_counts(self):
+        call_command("update_saved_searches_new_services_counts", stdout=StringIO())
+        self.saved_search.refresh_from_db()
+
+    def test_list_serves_stored_count(self):
+        SavedSearch.objects.filter(pk=self.saved_search.pk).update(
+            new_services_count=3, new_services_count_date=timezone.now()
+        )
+
+        with mock.patch("dora.services.search.get_search_results") as search:
+            response = self.client.get("/saved-searches/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["new_services_count"], 3)
+        search.assert_not_called()
+
+    def test_count_is_invalidated_by_new_services(self):
+        self.update_counts()
+        self.assertEqual(self.saved_search.new_services_count, 0)
+        self.assertIsNotNone(self.saved_search.new_services_count_date)
+
+        make_service(
+            status=ServiceStatus.PUBLISHED,
+            diffusion_zone_type=AdminDivisionType.CITY,
+            publication_date=timezone.now() - timedelta(days=2),
+            diffusion_zone_details=SAVE_SEARCH_ARGS.get("city_code"),
+        )
+        self.saved_search.refresh_from_db()
+        self.assertIsNone(self.saved_search.new_services_count_date)
+
+        self.update_counts()
+        self.assertEqual(self.saved_search.new_services_count, 1)
+
+    def test_count_is_invalidated_by_unpublished_services(self):
+        service = make_service(
+            status=ServiceStatus.PUBLISHED,
+            diffusion_zone_type=AdminDivisionType.CITY,
+            publication_date=timezone.now() - timedelta(days=2),
+            diffusion_zone_details=SAVE_SEARCH_ARGS.get("city_code"),
+        )
+        self.update_counts()
+        self.assertEqual(self.saved_search.new_services_count, 1)
+
+        service.status = ServiceStatus.ARCHIVED
+        service.save()
+        self.saved_search.refresh_from_db()
+        self.assertIsNone(self.saved_search.new_services_count_date)
+
+        self.update_counts()
+        self.assertEqual(self.saved_search.new_services_count, 0)
+
+    def test_count_is_reset_when_search_changes(self):
+        self.update_counts()
+
+        response = self.client.patch(
+            f"/saved-searches/{self.saved_search.id}/", {"city_code": "58000"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.saved_search.refresh_from_db()
+        self.assertIsNone(self.saved_search.new_services_count)
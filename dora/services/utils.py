@@ -5,10 +5,11 @@ from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
-from dora.admin_express.models import EPCI, AdminDivisionType, City, Department, Region
+from dora.admin_express.models import AdminDivisionType, City, Department, Region
 from dora.admin_express.utils import arrdt_to_main_insee_code
 from dora.core.models import ModerationStatus
 from dora.services.enums import ServiceStatus
+from dora.services.models import ServiceCoverage
 
 SYNC_FIELDS = [
     "name",
@@ -132,86 +133,37 @@ def update_sync_checksum(service):
     return result
 
 
+def _filter_services_by_coverage(services, admin_division_type, code):
+    # Les services couvrant la division sont pré-calculés dans `ServiceCoverage`
+    # (voir `dora.services.coverage`) ; les services diffusés sur la France entière
+    # n'y ont qu'une seule ligne, commune à toutes les divisions.
+    # `services` peut aussi être un queryset de `ServiceSearchDocument`,
+    # dont la clé primaire est l'id du service.
+    covering_services = ServiceCoverage.objects.filter(
+        Q(admin_division_type=admin_division_type, admin_division_code=code)
+        | Q(admin_division_type=AdminDivisionType.COUNTRY)
+    ).values("service_id")
+    return services.filter(pk__in=covering_services)
+
+
 def filter_services_by_city_code(services, city_code):
     # Si la requete entrante contient un code insee d'arrondissement
     # on le converti pour récupérer le code de la commune entière
     city_code = arrdt_to_main_insee_code(city_code)
-    city = get_object_or_404(City, pk=city_code)
+    city = get_object_or_404(City.objects.defer("geom"), pk=city_code)
 
-    return services.filter(
-        Q(diffusion_zone_type=AdminDivisionType.COUNTRY)
-        | (
-            Q(diffusion_zone_type=AdminDivisionType.CITY)
-            & Q(diffusion_zone_details=city.code)
-        )
-        | (
-            Q(diffusion_zone_type=AdminDivisionType.EPCI)
-            & Q(diffusion_zone_details__in=city.epcis)
-        )
-        | (
-            Q(diffusion_zone_type=AdminDivisionType.DEPARTMENT)
-            & Q(diffusion_zone_details=city.department)
-        )
-        | (
-            Q(diffusion_zone_type=AdminDivisionType.REGION)
-            & Q(diffusion_zone_details=city.region)
-        )
-    )
+    return _filter_services_by_coverage(services, AdminDivisionType.CITY, city.code)
 
 
 def filter_services_by_department(services, dept_code):
-    department = get_object_or_404(Department, pk=dept_code)
+    department = get_object_or_404(Department.objects.defer("geom"), pk=dept_code)
 
-    return services.filter(
-        Q(diffusion_zone_type=AdminDivisionType.COUNTRY)
-        | (
-            Q(diffusion_zone_type=AdminDivisionType.CITY)
-            & Q(diffusion_zone_details__in=City.objects.filter(department=dept_code))
-        )
-        | (
-            Q(diffusion_zone_type=AdminDivisionType.EPCI)
-            & Q(
-                diffusion_zone_details__in=EPCI.objects.filter(
-                    departments__contains=[dept_code]
-                )
-            )
-        )
-        | (
-            Q(diffusion_zone_type=AdminDivisionType.DEPARTMENT)
-            & Q(diffusion_zone_details=department.code)
-        )
-        | (
-            Q(diffusion_zone_type=AdminDivisionType.REGION)
-            & Q(diffusion_zone_details=department.region)
-        )
+    return _filter_services_by_coverage(
+        services, AdminDivisionType.DEPARTMENT, department.code
     )
 
 
 def filter_services_by_region(services, region_code):
-    region = get_object_or_404(Region, pk=region_code)
+    region = get_object_or_404(Region.objects.defer("geom"), pk=region_code)
 
-    return services.filter(
-        Q(diffusion_zone_type=AdminDivisionType.COUNTRY)
-        | (
-            Q(diffusion_zone_type=AdminDivisionType.CITY)
-            & Q(diffusion_zone_details__in=City.objects.filter(region=region_code))
-        )
-        | (
-            Q(diffusion_zone_type=AdminDivisionType.EPCI)
-            & Q(
-                diffusion_zone_details__in=EPCI.objects.filter(
-                    regions__contains=[region_code]
-                )
-            )
-        )
-        | (
-            Q(diffusion_zone_type=AdminDivisionType.DEPARTMENT)
-            & Q(
-                diffusion_zone_details__in=Department.objects.filter(region=region_code)
-            )
-        )
-        | (
-            Q(diffusion_zone_type=AdminDivisionType.REGION)
-            & Q(diffusion_zone_details=region.code)
-        )
-    )
+    return _filter_services_by_coverage(services, AdminDivisionType.REGION, region.code)
@@ -1,3 +1,4 @@
+import math
 from datetime import timedelta
 from operator import itemgetter
 
@@ -6,6 +7,8 @@ from django.conf import settings
 from django.db.models import Q
 from django.http.response import Http404
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 from django.utils.timezone import now
 from rest_framework import (
     exceptions,
@@ -24,6 +27,7 @@ from dora import data_inclusion
 from dora.core.models import ModerationStatus
 from dora.core.notify import send_moderation_notification
 from dora.core.pagination import OptionalPageNumberPagination
+from dora.core.streaming import StreamingListMixin
 from dora.core.utils import TRUTHY_VALUES
 from dora.services.emails import send_service_feedback_email
 from dora.services.enums import ServiceStatus
@@ -47,6 +51,13 @@ from dora.services.models import (
     ServiceStatusHistoryItem,
     ServiceSubCategory,
 )
+from dora.services.options import (
+    get_cached_custom_choices,
+    get_cached_global_options,
+    get_options_etag,
+    get_options_version,
+    get_user_scope,
+)
 from dora.services.utils import synchronize_service_from_model
 from dora.stats.models import DeploymentLevel, DeploymentState
 from dora.structures.models import Structure, StructureMember
@@ -139,6 +150,7 @@ def get_visible_services(user):
 
 
 class ServiceViewSet(
+    StreamingListMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.RetrieveModelMixin,
@@ -369,6 +381,32 @@ class BookmarkViewSet(
             user=user,
         ).order_by("-creation_date")
 
+    def get_di_client(self):
+        return (
+            data_inclusion.get_shared_di_client() if not settings.IS_TESTING else None
+        )
+
+    def list(self, request):
+        bookmarks = list(
+            self.get_queryset().select_related("service__structure", "service__source")
+        )
+        # une seule série de requêtes concurrentes pour toutes les fiches d·i,
+        # plutôt qu'un appel séquentiel par favori
+        di_client = self.get_di_client()
+        di_services = (
+            data_inclusion.retrieve_services(
+                di_client, [bookmark.di_id for bookmark in bookmarks if bookmark.di_id]
+            )
+            if di_client is not None
+            else {}
+        )
+        serializer = self.get_serializer(
+            bookmarks,
+            many=True,
+            context={**self.get_serializer_context(), "di_services": di_services},
+        )
+        return Response(serializer.data)
+
     def create(self, request):
         slug = request.data.get("slug")
         is_di = request.data.get("is_di")
@@ -404,7 +442,12 @@ class SavedSearchViewSet(
 
     def get_queryset(self):
         user = self.request.user
-        return SavedSearch.objects.filter(user=user).order_by("-creation_date")
+        return (
+            SavedSearch.objects.filter(user=user)
+            .select_related("category")
+            .prefetch_related("subcategories", "kinds", "fees")
+            .order_by("-creation_date")
+        )
 
     def get_serializer(self, *args, **kwargs):
         if self.action == "list":
@@ -416,6 +459,13 @@ class SavedSearchViewSet(
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def perform_update(self, serializer):
+        if set(serializer.validated_data) - {"frequency"}:
+            # les paramètres de la recherche ont changé : compteur à recalculer
+            serializer.save(new_services_count=None, new_services_count_date=None)
+        else:
+            serializer.save()
+
     @action(
         detail=True,
         methods=["get"],
@@ -560,6 +610,12 @@ class ModelViewSet(ServiceViewSet):
 @api_view()
 @permission_classes([permissions.AllowAny])
 def options(request):
+    version = get_options_version()
+    scope = get_user_scope(request.user)
+    etag = get_options_etag(version, scope)
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
     class CustomChoiceSerializer(serializers.ModelSerializer):
         value = serializers.IntegerField(source="id")
         label = serializers.CharField(source="name")
@@ -640,65 +696,83 @@ def options(request):
 
         return choices.filter(filters)
 
+    def get_global_options():
+        # lu en base plutôt que dans `enum_table` : le registre d'un autre
+        # process que celui de la modification peut être en retard, et le
+        # résultat est gardé en cache jusqu'à la version suivante
+        return {
+            "categories": ServiceCategorySerializer(
+                ServiceCategory.objects.all(), many=True
+            ).data,
+            "subcategories": ServiceSubCategorySerializer(
+                ServiceSubCategory.objects.all(), many=True
+            ).data,
+            "kinds": ServiceKindSerializer(
+                ServiceKind.objects.all().order_by("label"), many=True
+            ).data,
+            "fee_conditions": ServiceFeeSerializer(
+                ServiceFee.objects.all(), many=True
+            ).data,
+            "beneficiaries_access_modes": BeneficiaryAccessModeSerializer(
+                BeneficiaryAccessMode.objects.all(), many=True
+            ).data,
+            "coach_orientation_modes": CoachOrientationModeSerializer(
+                CoachOrientationMode.objects.all(), many=True
+            ).data,
+            "location_kinds": LocationKindSerializer(
+                LocationKind.objects.all(), many=True
+            ).data,
+            "diffusion_zone_type": [
+                {"value": c[0], "label": c[1]} for c in AdminDivisionType.choices
+            ],
+            "deployment_departments": [
+                s["department_code"]
+                for s in DeploymentState.objects.filter(
+                    state__in=[DeploymentLevel.IN_PROGRESS, DeploymentLevel.FINALIZING]
+                ).values()
+            ],
+        }
+
+    def get_custom_choices():
+        return {
+            "access_conditions": AccessConditionSerializer(
+                filter_custom_choices(
+                    AccessCondition.objects.select_related("structure").all()
+                ),
+                many=True,
+                context={"request": request},
+            ).data,
+            "concerned_public": ConcernedPublicSerializer(
+                filter_custom_choices(
+                    ConcernedPublic.objects.select_related("structure").all()
+                ),
+                many=True,
+                context={"request": request},
+            ).data,
+            "requirements": RequirementSerializer(
+                filter_custom_choices(
+                    Requirement.objects.select_related("structure").all()
+                ),
+                many=True,
+                context={"request": request},
+            ).data,
+            "credentials": CredentialSerializer(
+                filter_custom_choices(
+                    Credential.objects.select_related("structure").all()
+                ),
+                many=True,
+                context={"request": request},
+            ).data,
+        }
+
     result = {
-        "categories": ServiceCategorySerializer(
-            ServiceCategory.objects.all(), many=True
-        ).data,
-        "subcategories": ServiceSubCategorySerializer(
-            ServiceSubCategory.objects.all(), many=True
-        ).data,
-        "kinds": ServiceKindSerializer(
-            ServiceKind.objects.all().order_by("label"), many=True
-        ).data,
-        "fee_conditions": ServiceFeeSerializer(
-            ServiceFee.objects.all(), many=True
-        ).data,
-        "beneficiaries_access_modes": BeneficiaryAccessModeSerializer(
-            BeneficiaryAccessMode.objects.all(), many=True
-        ).data,
-        "coach_orientation_modes": CoachOrientationModeSerializer(
-            CoachOrientationMode.objects.all(), many=True
-        ).data,
-        "location_kinds": LocationKindSerializer(
-            LocationKind.objects.all(), many=True
-        ).data,
-        "access_conditions": AccessConditionSerializer(
-            filter_custom_choices(
-                AccessCondition.objects.select_related("structure").all()
-            ),
-            many=True,
-            context={"request": request},
-        ).data,
-        "concerned_public": ConcernedPublicSerializer(
-            filter_custom_choices(
-                ConcernedPublic.objects.select_related("structure").all()
-            ),
-            many=True,
-            context={"request": request},
-        ).data,
-        "requirements": RequirementSerializer(
-            filter_custom_choices(
-                Requirement.objects.select_related("structure").all()
-            ),
-            many=True,
-            context={"request": request},
-        ).data,
-        "credentials": CredentialSerializer(
-            filter_custom_choices(Credential.objects.select_related("structure").all()),
-            many=True,
-            context={"request": request},
-        ).data,
-        "diffusion_zone_type": [
-            {"value": c[0], "label": c[1]} for c in AdminDivisionType.choices
-        ],
-        "deployment_departments": [
-            s["department_code"]
-            for s in DeploymentState.objects.filter(
-                state__in=[DeploymentLevel.IN_PROGRESS, DeploymentLevel.FINALIZING]
-            ).values()
-        ],
+        **get_cached_global_options(version, get_global_options),
+        **get_cached_custom_choices(version, scope, get_custom_choices),
     }
-    return Response(result)
+    response = Response(result, headers={"ETag": etag})
+    # le navigateur revalide systématiquement sa copie, via `If-None-Match`
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 @api_view()
@@ -738,14 +812,36 @@ def search(request, di_client=None):
     fees = request.GET.get("fees")
     lat = request.GET.get("lat")
     lon = request.GET.get("lon")
+    radius = request.GET.get("radius")
+    nearest = request.GET.get("nearest")
+
+    from .search import MAX_RADIUS, get_search_results
+
+    try:
+        # lat / lon sont convertis ici pour que des coordonnées écrites
+        # différemment partagent la même entrée du cache d·i
+        lat = float(lat) if lat else None
+        lon = float(lon) if lon else None
+        radius = float(radius) if radius else None
+        nearest = int(nearest) if nearest else None
+    except ValueError:
+        raise exceptions.ValidationError(
+            "lat, lon, radius et nearest doivent être numériques"
+        )
+    # `float` accepte aussi `nan` et `inf`, que la comparaison laisserait passer
+    if (radius is not None and not (math.isfinite(radius) and radius > 0)) or (
+        nearest is not None and nearest <= 0
+    ):
+        raise exceptions.ValidationError("radius et nearest doivent être positifs")
+    if radius is not None:
+        radius = min(radius, MAX_RADIUS)
 
     categories_list = categories.split(",") if categories is not None else None
     subcategories_list = subcategories.split(",") if subcategories is not None else None
     kinds_list = kinds.split(",") if kinds is not None else None
     fees_list = fees.split(",") if fees is not None else None
-    from .search import search_services
 
-    sorted_results = search_services(
+    sorted_results = get_search_results(
         request=request,
         di_client=di_client,
         city_code=city_code,
@@ -755,6 +851,15 @@ def search(request, di_client=None):
         fees=fees_list,
         lat=lat,
         lon=lon,
+        radius=radius,
+        nearest=nearest,
     )
 
-    return Response(sorted_results)
+    # Si `page_size` est renseigné, seuls les résultats de la page demandée
+    # sont sérialisés
+    paginator = OptionalPageNumberPagination()
+    page = paginator.paginate_queryset(sorted_results, request)
+    if page is not None:
+        return paginator.get_paginated_response(page)
+
+    return Response(sorted_results[:])
@@ -1,8 +1,8 @@
-from django.db.models import Q
 from rest_framework import permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
+from dora.core.enum_registry import enum_table
 from dora.core.utils import code_insee_to_code_dept, get_object_or_none
 from dora.orientations.models import Orientation
 from dora.services.models import Service, ServiceCategory, ServiceSubCategory
@@ -28,15 +28,19 @@ def log_event(request):
         # On loggue également toutes les catégories des sous-catégories demandées
         subcats_cats_values = set(subcat.split("--")[0] for subcat in subcats_values)
 
-        all_categories = ServiceCategory.objects.filter(
-            Q(value__in=cats_values) | Q(value__in=subcats_cats_values)
+        all_categories = enum_table(ServiceCategory).filter(
+            {*cats_values, *subcats_cats_values}
         )
 
-        all_subcategories = ServiceSubCategory.objects.filter(value__in=subcats_values)
-        for category_value in cats_values:
-            all_subcategories |= ServiceSubCategory.objects.filter(
-                value__startswith=category_value
-            )
+        subcategories = enum_table(ServiceSubCategory)
+        all_subcategories = {
+            *subcategories.filter(subcats_values),
+            *(
+                subcategory
+                for category_value in cats_values
+                for subcategory in subcategories.startswith(category_value)
+            ),
+        }
         return all_categories, all_subcategories
 
     tag = request.data.get("tag")
@@ -6,7 +6,9 @@ from django.conf import settings
 from django.contrib.gis.geos import Point
 from django.core.management.base import BaseCommand
 
-from dora.admin_express.models import City
+from dora.admin_express.geocoding import find_division
+from dora.admin_express.models import AdminDivisionType, City
+from dora.admin_express.registry import get_city
 from dora.admin_express.utils import arrdt_to_main_insee_code
 from dora.sirene.models import Establishment
 
@@ -154,9 +156,9 @@ class Command(BaseCommand):
                 if commune_implantation[:3] in ["975", "977", "978", "986", "987"]:
                     # Les COM ne sont pas dans Admin Express
                     continue
-                city = City.objects.get_from_code(
-                    arrdt_to_main_insee_code(commune_implantation)
-                )
+                city = City.objects.filter(
+                    code=arrdt_to_main_insee_code(commune_implantation)
+                ).first()
                 if not city:
                     self.print_error(
                         writer,
@@ -170,7 +172,9 @@ class Command(BaseCommand):
                 if not point.within(city.geom):
                     dist = point.distance(city.geom)
                     if dist > 1:
-                        real_city = City.objects.filter(geom__covers=point).first()
+                        real_city = get_city(
+                            find_division(AdminDivisionType.CITY, point)
+                        )
                         self.print_error(
                             writer,
                             agency,
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:20
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("structures", "0063_structure_is_obsolete"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="structure",
+            index=models.Index(
+                django.db.models.expressions.OrderBy(
+                    django.db.models.expressions.F("modification_date"),
+                    nulls_first=True,
+                ),
+                django.db.models.expressions.F("id"),
+                name="structure_modif_date_id_idx",
+            ),
+        ),
+    ]
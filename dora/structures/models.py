@@ -1,3 +1,5 @@
+import itertools
+import time
 import uuid
 from typing import Optional
 
@@ -12,7 +14,14 @@ from django.utils.crypto import get_random_string
 from django.utils.text import slugify
 
 from dora.admin_express.utils import get_clean_city_name
-from dora.core.models import EnumModel, LogItem, ModerationMixin, ModerationStatus
+from dora.core.models import (
+    ChangeLogObjectType,
+    EnumModel,
+    LogItem,
+    ModerationMixin,
+    ModerationStatus,
+    record_change,
+)
 from dora.core.utils import code_insee_to_code_dept
 from dora.core.validators import (
     validate_accesslibre_url,
@@ -135,6 +144,78 @@ class StructureMember(models.Model):
         send_access_granted_notification(self)
 
 
+# incrémenté à chaque changement de rattachement, pour invalider les
+# `UserMemberships` déjà chargés dans ce processus
+_memberships_generation = itertools.count()
+_current_memberships_generation = next(_memberships_generation)
+
+# durée de vie maximale des rattachements chargés pour un utilisateur, pour les
+# changements faits par un autre processus (l'utilisateur d'une requête ne vit
+# normalement que le temps de celle-ci)
+USER_MEMBERSHIPS_TTL = 60
+
+
+class UserMemberships:
+    """Rattachements d'un utilisateur aux structures.
+
+    Chargés une fois pour l'utilisateur (voir `get_user_memberships`), ils
+    permettent de vérifier ses droits sur toute une liste de structures ou de
+    services sans requête par objet.
+    """
+
+    def __init__(self, user):
+        self.user_id = user.id
+        self.generation = _current_memberships_generation
+        self.loaded_at = time.monotonic()
+        self.structure_ids = set()
+        self.admin_structure_ids = set()
+        for structure_id, is_admin in StructureMember.objects.filter(
+            user_id=user.id
+        ).values_list("structure_id", "is_admin"):
+            self.structure_ids.add(structure_id)
+            if is_admin:
+                self.admin_structure_ids.add(structure_id)
+        self._pending_structure_ids = None
+
+    def is_stale(self):
+        return (
+            self.generation != _current_memberships_generation
+            or time.monotonic() - self.loaded_at > USER_MEMBERSHIPS_TTL
+        )
+
+    def is_member(self, structure_id):
+        return structure_id in self.structure_ids
+
+    def is_admin(self, structure_id):
+        return structure_id in self.admin_structure_ids
+
+    def is_pending_member(self, structure_id):
+        if self._pending_structure_ids is None:
+            self._pending_structure_ids = set(
+                StructurePutativeMember.objects.filter(
+                    user_id=self.user_id, invited_by_admin=False
+                ).values_list("structure_id", flat=True)
+            )
+        return structure_id in self._pending_structure_ids
+
+
+def get_user_memberships(user) -> Optional[UserMemberships]:
+    # conservés sur l'instance de l'utilisateur, c'est-à-dire le temps
+    # de la requête pour `request.user`
+    if not user.is_authenticated:
+        return None
+    memberships = getattr(user, "_structure_memberships", None)
+    if memberships is None or memberships.user_id != user.id or memberships.is_stale():
+        memberships = UserMemberships(user)
+        user._structure_memberships = memberships
+    return memberships
+
+
+def _invalidate_user_memberships(sender, **kwargs):
+    global _current_memberships_generation
+    _current_memberships_generation = next(_memberships_generation)
+
+
 class StructureSource(EnumModel):
     class Meta:
         verbose_name = "Source"
@@ -281,6 +362,15 @@ class Structure(ModerationMixin, models.Model):
     objects = StructureManager()
 
     class Meta:
+        indexes = [
+            # parcours de l'API par date de modification (voir
+            # `dora.core.pagination.OptionalCursorPagination`)
+            models.Index(
+                F("modification_date").asc(nulls_first=True),
+                F("id"),
+                name="structure_modif_date_id_idx",
+            ),
+        ]
         constraints = [
             models.CheckConstraint(
                 name="%(app_label)s_%(class)s_valid_or_null_siren",
@@ -340,14 +430,12 @@ class Structure(ModerationMixin, models.Model):
         )
 
     def is_member(self, user):
-        return StructureMember.objects.filter(
-            structure_id=self.id, user_id=user.id
-        ).exists()
+        memberships = get_user_memberships(user)
+        return memberships is not None and memberships.is_member(self.id)
 
     def is_admin(self, user):
-        return StructureMember.objects.filter(
-            structure_id=self.id, user_id=user.id, is_admin=True
-        ).exists()
+        memberships = get_user_memberships(user)
+        return memberships is not None and memberships.is_admin(self.id)
 
     def is_manager(self, user: User):
         return (
@@ -373,9 +461,8 @@ class Structure(ModerationMixin, models.Model):
         return len(self.admins)
 
     def is_pending_member(self, user):
-        return StructurePutativeMember.objects.filter(
-            structure_id=self.id, user_id=user.id, invited_by_admin=False
-        ).exists()
+        memberships = get_user_memberships(user)
+        return memberships is not None and memberships.is_pending_member(self.id)
 
     def post_create_branch(self, branch, user, source):
         branch.creator = user
@@ -440,3 +527,69 @@ class Structure(ModerationMixin, models.Model):
             .order_by(F("user__last_login").desc(nulls_last=True))
             .first()
         )
+
+
+def _record_structure_change(sender, instance, **kwargs):
+    record_change(ChangeLogObjectType.STRUCTURE, instance.pk)
+
+
+def _record_member_change(sender, instance, **kwargs):
+    # les structures d·i sans membre ne sont pas exposées par l'API
+    record_change(ChangeLogObjectType.STRUCTURE, instance.structure_id)
+
+
+def _record_structure_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        _record_structure_change(Structure, instance)
+    elif pk_set:
+        for structure_id in pk_set:
+            record_change(ChangeLogObjectType.STRUCTURE, structure_id)
+
+
+# flux de modifications de l'API (voir `dora.core.models.ChangeLogEntry`)
+models.signals.post_save.connect(
+    _record_structure_change,
+    sender=Structure,
+    dispatch_uid="structure_change_log_save",
+)
+models.signals.post_delete.connect(
+    _record_structure_change,
+    sender=Structure,
+    dispatch_uid="structure_change_log_delete",
+)
+models.signals.post_save.connect(
+    _record_member_change,
+    sender=StructureMember,
+    dispatch_uid="structure_member_change_log_save",
+)
+models.signals.post_delete.connect(
+    _record_member_change,
+    sender=StructureMember,
+    dispatch_uid="structure_member_change_log_delete",
+)
+for _field in ("national_labels", "members"):
+    models.signals.m2m_changed.connect(
+        _record_structure_m2m_change,
+        sender=getattr(Structure, _field).through,
+        dispatch_uid=f"structure_change_log_{_field}",
+    )
+
+# droits des utilisateurs (voir `get_user_memberships`)
+for _sender in (StructureMember, StructurePutativeMember):
+    models.signals.post_save.connect(
+        _invalidate_user_memberships,
+        sender=_sender,
+        dispatch_uid=f"{_sender.__name__}_invalidate_user_memberships_save",
+    )
+    models.signals.post_delete.connect(
+        _invalidate_user_memberships,
+        sender=_sender,
+        dispatch_uid=f"{_sender.__name__}_invalidate_user_memberships_delete",
+    )
+models.signals.m2m_changed.connect(
+    _invalidate_user_memberships,
+    sender=Structure.members.through,
+    dispatch_uid="structure_members_invalidate_user_memberships",
+)
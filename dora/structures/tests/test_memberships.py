@@ -0,0 +1,81 @@
+from django.contrib.auth.models import AnonymousUser
+
+from dora.core.test_utils import make_service, make_structure, make_user
+from dora.services.enums import ServiceStatus
+from dora.services.models import Service
+from dora.structures.models import StructureMember, StructurePutativeMember
+
+
+def test_memberships_are_loaded_once(django_assert_num_queries):
+    admin_of = make_structure()
+    member_of = make_structure()
+    other = make_structure()
+    user = make_user(structure=admin_of, is_admin=True)
+    StructureMember.objects.create(user=user, structure=member_of)
+
+    with django_assert_num_queries(1):
+        assert [True, True, False] == [
+            s.is_member(user) for s in (admin_of, member_of, other)
+        ]
+        assert [True, False, False] == [
+            s.is_admin(user) for s in (admin_of, member_of, other)
+        ]
+        assert admin_of.can_edit_informations(user)
+        assert not member_of.can_edit_members(user)
+        assert member_of.can_edit_services(user)
+        assert not other.can_view_members(user)
+
+
+def test_service_permissions_do_not_query_per_service(django_assert_num_queries):
+    user = make_user()
+    structure = make_structure(user)
+    for _ in range(3):
+        make_service(structure=structure, status=ServiceStatus.DRAFT)
+        make_service(status=ServiceStatus.DRAFT)
+    services = list(Service.objects.select_related("structure"))
+
+    with django_assert_num_queries(1):
+        assert 3 == sum(s.can_write(user) for s in services)
+        assert 3 == sum(s.can_read(user) for s in services)
+
+
+def test_manager_can_write_without_membership():
+    user = make_user(is_manager=True, department="31")
+    service = make_service(
+        structure=make_structure(department="31"), status=ServiceStatus.DRAFT
+    )
+
+    assert service.can_write(user)
+
+
+def test_membership_changes_are_visible():
+    user = make_user()
+    structure = make_structure()
+    assert not structure.is_member(user)
+    assert not structure.is_pending_member(user)
+
+    StructurePutativeMember.objects.create(user=user, structure=structure)
+    assert structure.is_pending_member(user)
+
+    member = StructureMember.objects.create(user=user, structure=structure)
+    assert structure.is_member(user)
+    assert not structure.is_admin(user)
+
+    member.is_admin = True
+    member.save()
+    assert structure.is_admin(user)
+
+    member.delete()
+    assert not structure.is_member(user)
+
+    structure.members.add(user)
+    assert structure.is_member(user)
+
+
+def test_anonymous_user_is_not_member():
+    structure = make_structure(make_user())
+    user = AnonymousUser()
+
+    assert not structure.is_member(user)
+    assert not structure.is_admin(user)
+    assert not structure.is_pending_member(user)
@@ -6,9 +6,11 @@ from rest_framework import exceptions, mixins, permissions, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 
+from dora.core.enum_registry import enum_table
 from dora.core.models import ModerationStatus
 from dora.core.notify import send_moderation_notification
 from dora.core.pagination import OptionalPageNumberPagination
+from dora.core.streaming import StreamingListMixin
 from dora.services.enums import ServiceStatus
 from dora.structures.emails import send_invitation_email
 from dora.structures.models import (
@@ -34,6 +36,7 @@ from .serializers import (
 
 
 class StructureViewSet(
+    StreamingListMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -349,15 +352,15 @@ def options(request):
     result = {
         "typologies": [
             {"value": c.value, "label": c.label}
-            for c in StructureTypology.objects.all().order_by("label")
+            for c in enum_table(StructureTypology).ordered_by_label()
         ],
         "national_labels": [
             {"value": c.value, "label": c.label}
-            for c in StructureNationalLabel.objects.all().order_by("label")
+            for c in enum_table(StructureNationalLabel).ordered_by_label()
         ],
         "sources": [
             {"value": c.value, "label": c.label}
-            for c in StructureSource.objects.all().order_by("label")
+            for c in enum_table(StructureSource).ordered_by_label()
         ],
     }
     return Response(result)
@@ -4,6 +4,7 @@ from rest_framework.exceptions import PermissionDenied
 from dora.core.models import ModerationStatus
 from dora.core.notify import send_moderation_notification
 from dora.core.pagination import OptionalPageNumberPagination
+from dora.core.streaming import StreamingListMixin
 from dora.core.utils import TRUTHY_VALUES
 from dora.services.enums import ServiceStatus
 from dora.services.models import Service
@@ -55,6 +56,7 @@ class ModerationMixin:
 
 
 class StructureAdminViewSet(
+    StreamingListMixin,
     ModerationMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -93,6 +95,7 @@ class StructureAdminViewSet(
 
 
 class ServiceAdminViewSet(
+    StreamingListMixin,
     ModerationMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -0,0 +1,4 @@
+#!/bin/bash
+
+echo "Génération des exports complets de l'API"
+python /app/manage.py generate_api_snapshots
@@ -0,0 +1,4 @@
+#!/bin/bash
+
+echo "Reconstruction des documents de recherche des services"
+python /app/manage.py rebuild_services_search_documents
@@ -0,0 +1,4 @@
+#!/bin/bash
+
+echo "Synchronisation de la copie locale des services data·inclusion"
+python /app/manage.py sync_data_inclusion_services
@@ -0,0 +1,4 @@
+#!/bin/bash
+
+echo "Mise à jour du journal des modifications de l'API"
+python /app/manage.py update_change_log
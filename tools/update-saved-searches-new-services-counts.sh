@@ -0,0 +1,4 @@
+#!/bin/bash
+
+echo "Mise à jour des compteurs de nouveaux services des recherches sauvegardées"
+python /app/manage.py update_saved_searches_new_services_counts